@@ -11,15 +11,20 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# `manage.py migrate` runs inside the app, whose logging is already set up
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from db.database import Base
+from db.database import Base, DATABASE_URL
+import models  # noqa: F401  (registers the tables on Base.metadata)
 target_metadata = Base.metadata
 
+# Migrate the app's database rather than the placeholder in alembic.ini
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -57,6 +62,14 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # `manage.py migrate` passes a connection from the app's async engine
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
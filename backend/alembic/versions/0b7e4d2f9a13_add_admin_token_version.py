@@ -0,0 +1,29 @@
+"""Add token_version to admin_users
+
+Revision ID: 0b7e4d2f9a13
+Revises: f2a9c6e1d8b4
+Create Date: 2026-10-17 21:14:09.731266
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e4d2f9a13'
+down_revision: Union[str, Sequence[str], None] = 'f2a9c6e1d8b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('admin_users')}
+    if 'token_version' not in existing:
+        op.add_column('admin_users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('admin_users', 'token_version')
@@ -0,0 +1,56 @@
+"""Add full-text search index for posts
+
+Revision ID: 3f6b2c9d8a41
+Revises: e35dd642acea
+Create Date: 2026-10-17 09:12:04.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from core.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6b2c9d8a41'
+down_revision: Union[str, Sequence[str], None] = 'e35dd642acea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector")
+        # In the language the app searches with (see PostgresSearchBackend)
+        op.execute(sa.text(
+            "UPDATE posts SET search_vector = "
+            "setweight(to_tsvector(CAST(:language AS regconfig), coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector(CAST(:language AS regconfig), coalesce(summary, '')), 'B') || "
+            "setweight(to_tsvector(CAST(:language AS regconfig), coalesce(content_md, '')), 'C')"
+        ).bindparams(language=settings.SEARCH_LANGUAGE))
+        op.execute("CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)")
+    elif dialect == 'sqlite':
+        # Databases created before migrations were tracked may have it
+        if sa.inspect(op.get_bind()).has_table('posts_fts'):
+            return
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+            "post_id UNINDEXED, title, summary, content_md, tokenize='porter unicode61')"
+        )
+        op.execute(
+            "INSERT INTO posts_fts (post_id, title, summary, content_md) "
+            "SELECT id, title, coalesce(summary, ''), coalesce(content_md, '') FROM posts"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_posts_search_vector")
+        op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS search_vector")
+    elif dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS posts_fts")
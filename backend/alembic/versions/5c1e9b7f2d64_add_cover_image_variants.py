@@ -0,0 +1,29 @@
+"""Add cover_image_variants to posts
+
+Revision ID: 5c1e9b7f2d64
+Revises: 8d2e4a7c1b93
+Create Date: 2026-10-17 18:20:12.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9b7f2d64'
+down_revision: Union[str, Sequence[str], None] = '8d2e4a7c1b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('posts')}
+    if 'cover_image_variants' not in existing:
+        op.add_column('posts', sa.Column('cover_image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'cover_image_variants')
@@ -0,0 +1,50 @@
+"""Add normalized post_tags index
+
+Revision ID: 8d2e4a7c1b93
+Revises: 3f6b2c9d8a41
+Create Date: 2026-10-17 10:02:41.553107
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4a7c1b93'
+down_revision: Union[str, Sequence[str], None] = '3f6b2c9d8a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created before migrations were tracked may have it
+    if sa.inspect(op.get_bind()).has_table('post_tags'):
+        return
+    post_tags = op.create_table('post_tags',
+    sa.Column('post_id', sa.String(), nullable=False),
+    sa.Column('tag', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'tag')
+    )
+    op.create_index('ix_post_tags_tag_post_id', 'post_tags', ['tag', 'post_id'], unique=False)
+
+    # Backfill from the JSON tags column
+    posts = sa.table('posts', sa.column('id', sa.String()), sa.column('tags', sa.JSON()))
+    rows = []
+    for post_id, tags in op.get_bind().execute(sa.select(posts.c.id, posts.c.tags)):
+        seen = set()
+        for tag in tags or []:
+            normalized = tag.strip().lower()
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                rows.append({'post_id': post_id, 'tag': normalized})
+    if rows:
+        op.bulk_insert(post_tags, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_post_tags_tag_post_id', table_name='post_tags')
+    op.drop_table('post_tags')
@@ -0,0 +1,38 @@
+"""Add rendered Markdown columns to posts
+
+Revision ID: a7d3f1c9e25b
+Revises: 5c1e9b7f2d64
+Create Date: 2026-10-17 19:42:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3f1c9e25b'
+down_revision: Union[str, Sequence[str], None] = '5c1e9b7f2d64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('posts')}
+    for column in (
+        sa.Column('content_html', sa.Text(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('content_toc', sa.JSON(), nullable=True),
+        sa.Column('reading_time_minutes', sa.Integer(), nullable=True),
+    ):
+        if column.name not in existing:
+            op.add_column('posts', column)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'reading_time_minutes')
+    op.drop_column('posts', 'content_toc')
+    op.drop_column('posts', 'content_hash')
+    op.drop_column('posts', 'content_html')
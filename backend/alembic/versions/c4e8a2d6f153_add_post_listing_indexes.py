@@ -0,0 +1,33 @@
+"""Add covering indexes for the public post listing
+
+Revision ID: c4e8a2d6f153
+Revises: a7d3f1c9e25b
+Create Date: 2026-10-17 19:05:12.284611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2d6f153'
+down_revision: Union[str, Sequence[str], None] = 'a7d3f1c9e25b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_LISTING_COLUMNS = ['status', 'deleted', 'pinned', 'published_at', 'id', 'updated_at', 'created_at']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_posts_listing', 'posts', _LISTING_COLUMNS, unique=False, if_not_exists=True)
+    op.create_index(
+        'ix_posts_type_listing', 'posts', ['type'] + _LISTING_COLUMNS, unique=False, if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_type_listing', table_name='posts')
+    op.drop_index('ix_posts_listing', table_name='posts')
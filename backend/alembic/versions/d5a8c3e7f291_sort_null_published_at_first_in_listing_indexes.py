@@ -0,0 +1,45 @@
+"""Sort NULL published_at first in the listing indexes on Postgres
+
+Revision ID: d5a8c3e7f291
+Revises: 0b7e4d2f9a13
+Create Date: 2026-10-17 22:05:41.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8c3e7f291'
+down_revision: Union[str, Sequence[str], None] = '0b7e4d2f9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXES = {'ix_posts_listing': [], 'ix_posts_type_listing': ['type']}
+
+
+def _recreate(published_at) -> None:
+    for name, leading in _INDEXES.items():
+        op.drop_index(name, table_name='posts', if_exists=True)
+        op.create_index(
+            name, 'posts',
+            leading + ['status', 'deleted', 'pinned', published_at, 'id', 'updated_at', 'created_at'],
+            unique=False,
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The listing orders by published_at DESC NULLS LAST. SQLite indexes
+    # already sort NULLs first, which a backward scan needs, and cannot say so
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _recreate(sa.text('published_at NULLS FIRST'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _recreate('published_at')
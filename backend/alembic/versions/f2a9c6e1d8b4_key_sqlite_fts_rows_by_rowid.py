@@ -0,0 +1,41 @@
+"""Key SQLite full-text rows by a stable integer rowid
+
+Revision ID: f2a9c6e1d8b4
+Revises: c4e8a2d6f153
+Create Date: 2026-10-17 20:41:37.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c6e1d8b4'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a2d6f153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite' or not sa.inspect(op.get_bind()).has_table('posts_fts'):
+        return
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS posts_fts_keys ("
+        "rowid INTEGER PRIMARY KEY, post_id VARCHAR NOT NULL UNIQUE)"
+    )
+    op.execute("INSERT INTO posts_fts_keys (post_id) SELECT id FROM posts WHERE true ON CONFLICT (post_id) DO NOTHING")
+    # Re-insert every post under its key's rowid
+    op.execute("DELETE FROM posts_fts")
+    op.execute(
+        "INSERT INTO posts_fts (rowid, post_id, title, summary, content_md) "
+        "SELECT k.rowid, p.id, p.title, coalesce(p.summary, ''), coalesce(p.content_md, '') "
+        "FROM posts p JOIN posts_fts_keys k ON k.post_id = p.id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # posts_fts keeps working without the keys, deleting by post_id again
+    op.execute("DROP TABLE IF EXISTS posts_fts_keys")
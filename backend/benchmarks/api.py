@@ -0,0 +1,273 @@
+"""Load and latency benchmark suite for the public and admin API.
+
+Seeds a database with a reproducible corpus (see `benchmarks.dataset`),
+then drives the real app in-process over ASGI, one scenario at a time:
+list pages with filters, search and deep offset/cursor pages, `get_post`
+by id, slug and as HTML, login, and admin creates and updates. Each
+scenario reports p50/p95/p99 latency, throughput and non-2xx responses.
+
+Results are written as JSON with the run's settings, so two runs can be
+compared; `--compare` prints the change in latency and throughput
+against an earlier result file:
+
+    python -m benchmarks.api --posts 10000 --output before.json
+    # ...change the code...
+    python -m benchmarks.api --posts 10000 --output after.json --compare before.json
+
+Set DATABASE_URL to benchmark Postgres or to keep a large seeded SQLite
+file between runs; with `--reuse`, an already seeded database is used as
+is; admin_create adds a few posts to it on every run. The response
+cache is off unless CACHE_BACKEND is set, so requests reach the database.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple
+
+from benchmarks.common import configure_environment, create_schema, run_load
+from benchmarks.dataset import CorpusOptions, popular_tags, seed_corpus
+
+configure_environment()
+
+import httpx  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.exc import DBAPIError  # noqa: E402
+
+from core.config import settings  # noqa: E402
+from core.security import password_hasher  # noqa: E402
+from db.database import SessionLocal, engine  # noqa: E402
+from db.init_db import init_db  # noqa: E402
+from main import app  # noqa: E402
+from models.post import Post, PostStatus  # noqa: E402
+from utils.pagination import LISTING_ORDER, encode_cursor  # noqa: E402
+
+# One log line per request would dominate the output
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+PREFIX = settings.API_PREFIX or ""
+SAMPLE_SIZE = 500
+# Metrics compared by --compare, and whether a higher value is better
+COMPARED = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "rps": True}
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    # Called once per request; returns (path, request kwargs)
+    next_request: Callable[[], tuple]
+    # Scale down the request count for slow scenarios such as bcrypt logins
+    weight: float = 1.0
+
+
+class Fixtures(NamedTuple):
+    published: int
+    ids: List[str]
+    slugs: List[str]
+    deep_page: int
+    deep_cursor: str
+
+
+async def load_fixtures(page_size: int) -> Fixtures:
+    """Sample ids and slugs and find a page ~90% of the way through the listing."""
+    visible = (Post.status == PostStatus.published, Post.deleted == False)
+    async with SessionLocal() as db:
+        published = await db.scalar(select(func.count()).select_from(Post).where(*visible))
+        sample = (await db.execute(
+            select(Post.id, Post.slug).where(*visible).order_by(Post.id).limit(SAMPLE_SIZE)
+        )).all()
+        deep_offset = max(0, int(published * 0.9) - 1)
+        anchor = (await db.execute(
+            select(Post.id, Post.pinned, Post.published_at).where(*visible)
+            .order_by(*LISTING_ORDER)
+            .offset(deep_offset).limit(1)
+        )).one()
+    return Fixtures(
+        published=published,
+        ids=[row.id for row in sample],
+        slugs=[row.slug for row in sample],
+        deep_page=deep_offset // page_size + 1,
+        deep_cursor=encode_cursor(anchor),
+    )
+
+
+def cycle_path(paths) -> Callable[[], tuple]:
+    iterator = itertools.cycle(paths)
+    return lambda: (next(iterator), {})
+
+
+def build_scenarios(fixtures: Fixtures, token: str) -> List[Scenario]:
+    posts = f"{PREFIX}/posts"
+    first, second, _ = popular_tags()
+    auth = {"Authorization": f"Bearer {token}"}
+    created = itertools.count()
+    updated = itertools.cycle(fixtures.ids)
+
+    def create_request() -> tuple:
+        n = next(created)
+        return f"{PREFIX}/admin/posts", {"headers": auth, "json": {
+            "title": f"Benchmark post {n}",
+            "summary": "Written by the benchmark suite",
+            "content_md": f"# Benchmark post {n}\n\n" + "Some markdown content. " * 100,
+            "type": "tech",
+            "status": "published",
+            "tags": [first, "benchmark"],
+        }}
+
+    def update_request() -> tuple:
+        return f"{PREFIX}/admin/posts/{next(updated)}", {"headers": auth, "json": {
+            "summary": f"Updated by the benchmark suite at {time.perf_counter()}",
+        }}
+
+    credentials = {"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD}
+    return [
+        Scenario("list_first_page", "GET", cycle_path([posts])),
+        Scenario("list_type", "GET", cycle_path([f"{posts}?type=tech", f"{posts}?type=recipe"])),
+        Scenario("list_tag", "GET", cycle_path([f"{posts}?tag={first}", f"{posts}?tag={second}"])),
+        Scenario("list_tags_all", "GET", cycle_path([f"{posts}?tags={first}&tags={second}"])),
+        Scenario("list_search", "GET", cycle_path([f"{posts}?q=garlic", f"{posts}?q=database+index"])),
+        Scenario("list_deep_offset", "GET", cycle_path([f"{posts}?page={fixtures.deep_page}"])),
+        Scenario("list_deep_cursor", "GET", cycle_path([f"{posts}?cursor={fixtures.deep_cursor}"])),
+        Scenario("list_sparse_fields", "GET", cycle_path([f"{posts}?fields=slug,title,cover_image&page_size=50"])),
+        Scenario("get_by_id", "GET", cycle_path([f"{posts}/{post_id}" for post_id in fixtures.ids])),
+        Scenario("get_by_slug", "GET", cycle_path([f"{posts}/{slug}" for slug in fixtures.slugs])),
+        Scenario("get_html", "GET", cycle_path([f"{posts}/{slug}?format=html" for slug in fixtures.slugs])),
+        Scenario("login", "POST", lambda: (f"{PREFIX}/auth/login", {"data": credentials}), weight=0.1),
+        Scenario("admin_create", "POST", create_request, weight=0.25),
+        Scenario("admin_update", "PUT", update_request, weight=0.25),
+    ]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, args: argparse.Namespace) -> Dict:
+    statuses: Dict[str, int] = {}
+
+    async def request() -> None:
+        path, kwargs = scenario.next_request()
+        response = await client.request(scenario.method, path, **kwargs)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    for _ in range(args.warmup):
+        await request()
+    statuses.clear()
+    total = max(1, int(args.requests * scenario.weight))
+    result = await run_load(request, total, args.concurrency)
+    result["errors"] = sum(count for code, count in statuses.items() if not code.startswith("2"))
+    result["statuses"] = statuses
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: Dict, baseline: Dict) -> None:
+    """Print each scenario's change against `baseline`; negative latency deltas are improvements."""
+    for key in ("database", "corpus", "concurrency", "cache_backend"):
+        if baseline.get("meta", {}).get(key) != results["meta"][key]:
+            print(f"Note: {key} differs from the baseline, so the numbers are not like for like")
+    print(f"{'scenario':<22}" + "".join(f"{metric:>18}" for metric in COMPARED))
+    for name, current in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        cells = []
+        for metric, higher_is_better in COMPARED.items():
+            old, new = before[metric], current[metric]
+            change = (new - old) / old if old else 0.0
+            better = change > 0 if higher_is_better else change < 0
+            cells.append(f"{new:>9} {change:+6.1%}{'*' if better and abs(change) >= 0.05 else ' '}")
+        print(f"{name:<22}" + "".join(f"{cell:>18}" for cell in cells))
+    print("* = at least 5% better than the baseline")
+
+
+async def already_seeded() -> bool:
+    async with SessionLocal() as db:
+        try:
+            return bool(await db.scalar(select(func.count()).select_from(Post)))
+        except DBAPIError:
+            # No schema yet
+            return False
+
+
+async def main(args: argparse.Namespace) -> None:
+    options = CorpusOptions(
+        posts=args.posts, seed=args.seed, body_words=args.body_words,
+        pinned_ratio=args.pinned_ratio, draft_ratio=args.draft_ratio,
+    )
+    try:
+        if not (args.reuse and await already_seeded()):
+            started = time.perf_counter()
+            await create_schema()
+            await seed_corpus(options, progress=True)
+            print(f"Seeded {args.posts} posts in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        await init_db()
+        fixtures = await load_fixtures(page_size=10)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            login = await client.post(f"{PREFIX}/auth/login", data={
+                "username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD,
+            })
+            login.raise_for_status()
+            scenarios = build_scenarios(fixtures, login.json()["access_token"])
+            if args.scenarios:
+                scenarios = [scenario for scenario in scenarios if scenario.name in args.scenarios]
+            results = {
+                "meta": {
+                    "started_at": datetime.now(timezone.utc).isoformat(),
+                    "revision": git_revision(),
+                    "python": platform.python_version(),
+                    "database": engine.dialect.name,
+                    "cache_backend": settings.CACHE_BACKEND,
+                    "corpus": options._asdict(),
+                    "published_posts": fixtures.published,
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+                },
+                "scenarios": {},
+            }
+            for scenario in scenarios:
+                results["scenarios"][scenario.name] = await run_scenario(client, scenario, args)
+                print(f"{scenario.name}: {results['scenarios'][scenario.name]}", file=sys.stderr)
+
+        output = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(output + "\n")
+        else:
+            print(output)
+        if args.compare:
+            with open(args.compare) as f:
+                compare(results, json.load(f))
+    finally:
+        password_hasher.shutdown()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1000, help="Posts to seed, e.g. 1000 to 1000000")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the corpus")
+    parser.add_argument("--body-words", type=int, default=600, help="Approximate Markdown words per post")
+    parser.add_argument("--pinned-ratio", type=float, default=0.01)
+    parser.add_argument("--draft-ratio", type=float, default=0.05)
+    parser.add_argument("--reuse", action="store_true", help="Skip seeding when the database already has posts")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario, before its weight")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each scenario")
+    parser.add_argument("--scenarios", nargs="+", help="Only run these scenarios")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="A previous --output file to compare against")
+    asyncio.run(main(parser.parse_args()))
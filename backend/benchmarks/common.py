@@ -0,0 +1,112 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run in-process against a throwaway SQLite database unless
+DATABASE_URL is already set. Call `configure_environment()` before
+importing anything from the app, since settings are read at import time.
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List
+
+
+def configure_environment(**overrides: str) -> str:
+    """Fill in the settings the app requires and return the database URL."""
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    defaults = {
+        "SECRET_KEY": "benchmark-secret",
+        "ADMIN_USERNAME": "admin",
+        "ADMIN_PASSWORD": "benchmark-password",
+        "AWS_ACCESS_KEY_ID": "benchmark",
+        "AWS_SECRET_ACCESS_KEY": "benchmark",
+        "AWS_REGION": "us-east-1",
+        "S3_BUCKET_NAME": "benchmark",
+        "CACHE_BACKEND": "none",
+    }
+    defaults.update(overrides)
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    return os.environ["DATABASE_URL"]
+
+
+async def create_schema() -> None:
+    from db.database import engine
+    from models import Base
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed_posts(count: int, batch_size: int = 1000, body_words: int = 150) -> None:
+    """Insert `count` published posts with unique slugs and ~`body_words` words of Markdown."""
+    from sqlalchemy import insert
+    from db.database import SessionLocal
+    from models.post import Post, PostStatus, PostType
+
+    now = datetime.now(timezone.utc)
+    async with SessionLocal() as db:
+        for start in range(0, count, batch_size):
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "slug": f"post-{i}",
+                    "title": f"Post {i}",
+                    "summary": f"Summary of post {i}",
+                    "content_md": f"# Post {i}\n\n" + "Some markdown content. " * (body_words // 3),
+                    "type": PostType.recipe if i % 2 else PostType.tech,
+                    "status": PostStatus.published,
+                    "tags": [],
+                    "external_links": [],
+                    "published_at": now - timedelta(minutes=i),
+                    "deleted": False,
+                    "pinned": i % 50 == 0,
+                }
+                for i in range(start, min(start + batch_size, count))
+            ]
+            await db.execute(insert(Post), rows)
+        await db.commit()
+
+
+async def run_load(
+    request: Callable[[], Awaitable[object]],
+    total_requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """Issue `total_requests` calls with at most `concurrency` in flight."""
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await request()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total_requests)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed)
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    return {
+        "requests": len(ordered),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(percentile(0.50), 2),
+        "p95_ms": round(percentile(0.95), 2),
+        "p99_ms": round(percentile(0.99), 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+    }
@@ -0,0 +1,101 @@
+"""Bytes saved and CPU spent by response compression.
+
+Part one compresses two representative bodies, a post with a long
+Markdown body and a 100-post list page, with every available encoding at
+the per-request and the cached levels. Part two serves `GET /posts/{slug}`
+with `Accept-Encoding: br, gzip, zstd`:
+
+- `identity`: cache hit, client accepts no compression
+- `precompressed`: cache hit, the stored compressed body is sent as is
+- `compressed_per_request`: response cache disabled, so every request
+  loads the post and the middleware compresses it
+
+    python -m benchmarks.compression --body-words 1500 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import configure_environment, create_schema, run_load, seed_posts
+
+configure_environment(CACHE_BACKEND="memory")
+
+import httpx  # noqa: E402
+
+from core.config import settings  # noqa: E402
+from db.database import engine  # noqa: E402
+from main import app  # noqa: E402
+from utils.cache import NullCache, response_cache  # noqa: E402
+from utils.compression import compress, enabled_encodings  # noqa: E402
+
+PREFIX = settings.API_PREFIX or ""
+ACCEPT_ALL = "br, gzip, zstd"
+
+
+def codec_table(body: bytes, iterations: int) -> dict:
+    table = {"identity_bytes": len(body)}
+    for encoding in enabled_encodings():
+        for label, levels in (("per_request", settings.COMPRESSION_LEVELS),
+                              ("cached", settings.COMPRESSION_CACHED_LEVELS)):
+            level = levels[encoding]
+            compressed = compress(body, encoding, level)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                compress(body, encoding, level)
+            elapsed = (time.perf_counter() - started) / iterations
+            table[f"{encoding}@{level} ({label})"] = {
+                "bytes": len(compressed),
+                "saved": f"{1 - len(compressed) / len(body):.1%}",
+                "us_per_body": round(elapsed * 1_000_000, 1),
+            }
+    return table
+
+
+async def fetch_raw(client: httpx.AsyncClient, url: str, headers: dict) -> httpx.Response:
+    # Read the bytes as sent, so the client's decompression is not timed
+    async with client.stream("GET", url, headers=headers) as response:
+        response.wire_bytes = len(b"".join([chunk async for chunk in response.aiter_raw()]))
+    return response
+
+
+async def measure(client: httpx.AsyncClient, url: str, accept: str, args: argparse.Namespace) -> dict:
+    headers = {"Accept-Encoding": accept}
+    response = await fetch_raw(client, url, headers)
+    result = await run_load(lambda: fetch_raw(client, url, headers), args.requests, args.concurrency)
+    result.update({"encoding": response.headers.get("content-encoding", "identity"), "wire_bytes": response.wire_bytes})
+    return result
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        await create_schema()
+        await seed_posts(args.posts, body_words=args.body_words)
+        transport = httpx.ASGITransport(app=app)
+        results = {"encodings": enabled_encodings()}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            post_url = f"{PREFIX}/posts/post-1"
+            post_body = (await client.get(post_url, headers={"Accept-Encoding": "identity"})).content
+            list_body = (await client.get(
+                f"{PREFIX}/posts?page_size=100", headers={"Accept-Encoding": "identity"}
+            )).content
+            results["post_detail"] = codec_table(post_body, args.iterations)
+            results["list_page_100"] = codec_table(list_body, args.iterations)
+
+            results["identity"] = await measure(client, post_url, "identity", args)
+            results["precompressed"] = await measure(client, post_url, ACCEPT_ALL, args)
+            response_cache.backend = NullCache()
+            results["compressed_per_request"] = await measure(client, post_url, ACCEPT_ALL, args)
+        print(json.dumps(results, indent=2))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--body-words", type=int, default=1500, help="Approximate Markdown words per post")
+    parser.add_argument("--iterations", type=int, default=50, help="Compressions per codec and level")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
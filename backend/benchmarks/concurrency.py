@@ -0,0 +1,97 @@
+"""Compare request throughput of the async DB layer with the old blocking one.
+
+Both variants serve the same listing query from an `async def` endpoint:
+`blocking` runs it on a synchronous Session (the pre-AsyncSession setup),
+`async` awaits it on an AsyncSession. `--db-latency-ms` adds a per-query
+sleep inside the database call to stand in for a network round trip.
+
+    python -m benchmarks.concurrency --requests 400 --concurrency 50 --db-latency-ms 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import configure_environment, create_schema, run_load, seed_posts
+
+configure_environment()
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy import create_engine, desc, event, func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from core.dependencies import get_db  # noqa: E402
+from db.database import DATABASE_URL, engine  # noqa: E402
+from models.post import Post, PostStatus  # noqa: E402
+from schemas.post import PostResponse  # noqa: E402
+
+
+def listing_query(latency_ms: float):
+    query = select(Post).where(Post.status == PostStatus.published, Post.deleted == False)
+    if latency_ms:
+        # An uncorrelated scalar subquery runs once per query, not once per row
+        query = query.where(select(func.sleep_ms(latency_ms)).scalar_subquery() == 0)
+    return query.order_by(desc(Post.pinned), desc(Post.published_at)).limit(10)
+
+
+def install_sleep_function(sync_engine) -> None:
+    @event.listens_for(sync_engine, "connect")
+    def register(dbapi_connection, connection_record):
+        def sleep_ms(ms):
+            time.sleep(ms / 1000)
+            return 0
+        dbapi_connection.create_function("sleep_ms", 1, sleep_ms)
+
+
+def build_app(latency_ms: float) -> FastAPI:
+    app = FastAPI()
+    sync_engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    SyncSession = sessionmaker(bind=sync_engine)
+    if DATABASE_URL.startswith("sqlite"):
+        install_sleep_function(sync_engine)
+
+    @app.get("/blocking")
+    async def blocking():
+        with SyncSession() as db:
+            posts = db.execute(listing_query(latency_ms)).scalars().all()
+            return [PostResponse.model_validate(p) for p in posts]
+
+    @app.get("/async")
+    async def non_blocking(db: AsyncSession = Depends(get_db)):
+        posts = (await db.execute(listing_query(latency_ms))).scalars().all()
+        return [PostResponse.model_validate(p) for p in posts]
+
+    return app
+
+
+async def main(args: argparse.Namespace) -> None:
+    if DATABASE_URL.startswith("sqlite"):
+        # Before the first connection, so every pooled connection has it
+        install_sleep_function(engine.sync_engine)
+    try:
+        await create_schema()
+        await seed_posts(args.posts)
+        app = build_app(args.db_latency_ms)
+        transport = httpx.ASGITransport(app=app)
+        results = {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for variant in ("blocking", "async"):
+                await client.get(f"/{variant}")  # warm up pools
+                results[variant] = await run_load(
+                    lambda: client.get(f"/{variant}"), args.requests, args.concurrency
+                )
+        results["speedup"] = round(results["async"]["rps"] / results["blocking"]["rps"], 2)
+        print(json.dumps(results, indent=2))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
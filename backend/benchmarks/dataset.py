@@ -0,0 +1,176 @@
+"""A reproducible corpus of realistic posts for the benchmarks.
+
+Posts get Markdown bodies with headings, lists, code blocks and links,
+1-5 tags drawn from a long-tailed pool (a few tags are on most posts,
+most tags on few), and configurable pinned, draft and deleted ratios.
+The same `seed` always produces the same rows, ids included, so runs
+against separately seeded databases stay comparable.
+
+Bodies are rendered once per template and shared between posts, which is
+what keeps seeding a million posts down to minutes; titles, slugs, tags
+and dates are unique per post.
+"""
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple
+
+TAG_POOL_SIZE = 200
+# Fixed, so the seeded rows do not depend on when they were seeded
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+_TECH_WORDS = (
+    "async database query index latency cache python fastapi postgres sqlite request "
+    "response pool connection thread worker deploy docker container build pipeline "
+    "schema migration endpoint router middleware token benchmark profile memory cpu "
+    "throughput queue retry timeout backend frontend api json stream compression"
+).split()
+_RECIPE_WORDS = (
+    "garlic onion butter flour sourdough oven bake simmer roast chicken tomato basil "
+    "olive oil salt pepper lemon rice noodle broth ginger chili cumin yogurt honey "
+    "dough knead proof skillet braise marinade sauce crispy tender fresh weeknight"
+).split()
+_COMMON_WORDS = (
+    "the a and of to in is it that for with on this was as be at by from or an "
+    "first then next until about after before while into over really simple quick"
+).split()
+_LANGUAGES = ("python", "sql", "bash", "json", "typescript")
+
+
+class CorpusOptions(NamedTuple):
+    posts: int
+    seed: int = 42
+    body_words: int = 600
+    pinned_ratio: float = 0.01
+    draft_ratio: float = 0.05
+    deleted_ratio: float = 0.01
+    templates: int = 64  # distinct bodies per post type
+
+
+def _sentence(rng: random.Random, topic: List[str], words: int) -> str:
+    chosen = [rng.choice(topic) if rng.random() < 0.4 else rng.choice(_COMMON_WORDS) for _ in range(words)]
+    return " ".join(chosen).capitalize() + "."
+
+
+def _paragraph(rng: random.Random, topic: List[str], words: int) -> str:
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(8, 20))
+        sentences.append(_sentence(rng, topic, length))
+        words -= length
+    return " ".join(sentences)
+
+
+def markdown_body(rng: random.Random, post_type: str, words: int) -> str:
+    """A Markdown document of roughly `words` words in the style of a `post_type` post."""
+    topic = _TECH_WORDS if post_type == "tech" else _RECIPE_WORDS
+    blocks = [_paragraph(rng, topic, 40)]
+    written = 40
+    section = 0
+    while written < words:
+        section += 1
+        blocks.append(f"## {rng.choice(topic).capitalize()} {rng.choice(topic)} {section}")
+        kind = rng.random()
+        if kind < 0.25:
+            items = rng.randint(3, 7)
+            blocks.append("\n".join(f"- {_sentence(rng, topic, 6)}" for _ in range(items)))
+            written += items * 6
+        elif kind < 0.4 and post_type == "tech":
+            lines = rng.randint(4, 12)
+            code = "\n".join(f"{rng.choice(topic)} = {rng.choice(topic)}({rng.randint(0, 99)})" for _ in range(lines))
+            blocks.append(f"```{rng.choice(_LANGUAGES)}\n{code}\n```")
+            written += lines * 3
+        elif kind < 0.4:
+            steps = rng.randint(3, 8)
+            blocks.append("\n".join(f"{n}. {_sentence(rng, topic, 10)}" for n in range(1, steps + 1)))
+            written += steps * 10
+        words_here = rng.randint(60, 140)
+        paragraph = _paragraph(rng, topic, words_here)
+        if rng.random() < 0.3:
+            paragraph += f" See [the {rng.choice(topic)} notes](https://example.com/{rng.choice(topic)})."
+        blocks.append(paragraph)
+        written += words_here
+    return "\n\n".join(blocks) + "\n"
+
+
+def tag_pool() -> List[str]:
+    return [f"{word}-{n}" if n else word for n in range(4) for word in _TECH_WORDS + _RECIPE_WORDS][:TAG_POOL_SIZE]
+
+
+def popular_tags(count: int = 3) -> List[str]:
+    """The most frequently assigned tags, useful as filter values."""
+    return tag_pool()[:count]
+
+
+def generate_posts(options: CorpusOptions, batch_size: int = 1000):
+    """Yield batches of (post rows, post_tag rows) for `options.posts` posts."""
+    from utils.markdown import render_markdown
+    from utils.slug import slugify
+
+    rng = random.Random(options.seed)
+    pool = tag_pool()
+    # Zipf-like weights: the n-th tag is assigned about 1/n as often as the first
+    tag_weights = [1 / rank for rank in range(1, len(pool) + 1)]
+    rendered: Dict[str, list] = {}
+    for post_type in ("tech", "recipe"):
+        rendered[post_type] = []
+        for _ in range(options.templates):
+            source = markdown_body(rng, post_type, options.body_words)
+            rendered[post_type].append((source, render_markdown(source)))
+
+    for start in range(0, options.posts, batch_size):
+        posts, post_tags = [], []
+        for i in range(start, min(start + batch_size, options.posts)):
+            post_type = "tech" if rng.random() < 0.5 else "recipe"
+            source, html = rng.choice(rendered[post_type])
+            tags = list(dict.fromkeys(rng.choices(pool, weights=tag_weights, k=rng.randint(1, 5))))
+            draft = rng.random() < options.draft_ratio
+            topic = _TECH_WORDS if post_type == "tech" else _RECIPE_WORDS
+            title = f"{rng.choice(topic).capitalize()} {rng.choice(topic)} and {rng.choice(topic)} #{i}"
+            post_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            posts.append({
+                "id": post_id,
+                "slug": slugify(title),
+                "title": title,
+                "summary": _sentence(rng, topic, 20),
+                "content_md": source,
+                "content_html": html.html,
+                "content_hash": html.content_hash,
+                "content_toc": html.toc,
+                "reading_time_minutes": html.reading_time_minutes,
+                "type": post_type,
+                "status": "draft" if draft else "published",
+                "tags": tags,
+                "external_links": [],
+                # Roughly one post every three hours, newest first
+                "published_at": None if draft else EPOCH - timedelta(minutes=180 * i + rng.randint(0, 179)),
+                "deleted": rng.random() < options.deleted_ratio,
+                "pinned": rng.random() < options.pinned_ratio,
+            })
+            post_tags.extend({"post_id": post_id, "tag": tag} for tag in tags)
+        yield posts, post_tags
+
+
+async def seed_corpus(options: CorpusOptions, batch_size: int = 1000, progress: bool = False) -> None:
+    """Insert the corpus and build the full-text index."""
+    from sqlalchemy import insert
+    from db.database import SessionLocal, engine
+    from models.post import Post
+    from models.post_tag import PostTag
+    from utils.search import get_search_backend
+
+    search = get_search_backend()
+    await search.ensure_schema(engine)
+    async with SessionLocal() as db:
+        inserted = 0
+        for posts, post_tags in generate_posts(options, batch_size):
+            await db.execute(insert(Post), posts)
+            await db.execute(insert(PostTag), post_tags)
+            inserted += len(posts)
+            # Commit per batch so a large seed does not build one huge transaction
+            await db.commit()
+            if progress and inserted % (batch_size * 50) == 0:
+                print(f"seeded {inserted}/{options.posts} posts", file=sys.stderr)
+        await search.rebuild(db)
+        await db.commit()
@@ -0,0 +1,104 @@
+"""Measure what list pages cost with and without the Markdown body.
+
+Three variants serve `GET /posts` for the same seeded posts:
+`full_rows` loads whole rows and serializes `PostResponse` (the previous
+behaviour), `summary` is the real endpoint returning `PostSummary` with
+`content_md` left unloaded, and `sparse` adds `fields=` for a card view.
+Each variant reports response size, query time and request latency.
+
+    python -m benchmarks.list_payload --posts 2000 --body-words 1500 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import configure_environment, create_schema, run_load, seed_posts
+
+configure_environment()
+
+import httpx  # noqa: E402
+from fastapi import Depends, Query  # noqa: E402
+from fastapi.responses import Response  # noqa: E402
+from sqlalchemy import desc, event, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+from core.config import settings  # noqa: E402
+from core.dependencies import get_db  # noqa: E402
+from db.database import engine  # noqa: E402
+from main import app  # noqa: E402
+from models.post import Post, PostStatus  # noqa: E402
+from schemas.post import PostResponse  # noqa: E402
+
+PREFIX = settings.API_PREFIX or ""
+CARD_FIELDS = "slug,title,summary,type,tags,cover_image,published_at"
+
+
+@app.get("/bench/full-rows")
+async def full_rows(db: AsyncSession = Depends(get_db), page_size: int = Query(10)):
+    query = (
+        select(Post)
+        .where(Post.status == PostStatus.published, Post.deleted == False)
+        .order_by(desc(Post.pinned), desc(Post.published_at), desc(Post.id))
+        .limit(page_size)
+    )
+    posts = (await db.execute(query)).scalars().all()
+    body = "[" + ",".join(PostResponse.model_validate(p).model_dump_json() for p in posts) + "]"
+    return Response(body, media_type="application/json")
+
+
+class QueryTimer:
+    """Total time spent in cursor.execute, from engine events."""
+
+    def __init__(self, sync_engine):
+        self.seconds = 0.0
+        event.listen(sync_engine, "before_cursor_execute", self._before)
+        event.listen(sync_engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        context._bench_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.seconds += time.perf_counter() - context._bench_started
+
+
+async def measure(client: httpx.AsyncClient, url: str, timer: QueryTimer, args: argparse.Namespace) -> dict:
+    response = await client.get(url)
+    response.raise_for_status()
+    timer.seconds = 0.0
+    result = await run_load(lambda: client.get(url), args.requests, 1)
+    result["bytes"] = len(response.content)
+    result["query_ms_per_request"] = round(timer.seconds * 1000 / args.requests, 3)
+    return result
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        await create_schema()
+        await seed_posts(args.posts, body_words=args.body_words)
+        timer = QueryTimer(engine.sync_engine)
+        transport = httpx.ASGITransport(app=app)
+        results = {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for page_size in args.page_sizes:
+                variants = {
+                    "full_rows": f"/bench/full-rows?page_size={page_size}",
+                    # Counting is the same for every variant, so leave it out
+                    "summary": f"{PREFIX}/posts?page_size={page_size}&include_total=false",
+                    "sparse": f"{PREFIX}/posts?page_size={page_size}&include_total=false&fields={CARD_FIELDS}",
+                }
+                page = {name: await measure(client, url, timer, args) for name, url in variants.items()}
+                page["summary_bytes_saved"] = f"{1 - page['summary']['bytes'] / page['full_rows']['bytes']:.0%}"
+                results[f"page_size={page_size}"] = page
+        print(json.dumps(results, indent=2))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--body-words", type=int, default=1500, help="Approximate Markdown words per post")
+    parser.add_argument("--requests", type=int, default=200, help="Sequential requests per variant")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100])
+    asyncio.run(main(parser.parse_args()))
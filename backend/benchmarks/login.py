@@ -0,0 +1,87 @@
+"""Measure login throughput and how much logins slow down public reads.
+
+Two variants run the same logins while a steady stream of `GET /posts`
+reads is in flight: `inline` verifies the password on the event loop (the
+previous behaviour), `pooled` is the real `/auth/login`, which verifies on
+the bcrypt thread pool. Pool size, queue limit and cost factor come from
+the usual settings:
+
+    PASSWORD_HASH_WORKERS=4 BCRYPT_ROUNDS=12 python -m benchmarks.login --logins 40 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import configure_environment, create_schema, run_load, seed_posts
+
+configure_environment()
+
+import httpx  # noqa: E402
+from fastapi import Depends, HTTPException  # noqa: E402
+from fastapi.security import OAuth2PasswordRequestForm  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+from core.config import settings  # noqa: E402
+from core.dependencies import get_db  # noqa: E402
+from core.security import password_hasher, verify_password  # noqa: E402
+from db.database import engine  # noqa: E402
+from db.init_db import init_db  # noqa: E402
+from main import app  # noqa: E402
+from models.admin_user import AdminUser  # noqa: E402
+
+PREFIX = settings.API_PREFIX or ""
+
+
+@app.post("/bench/inline-login")
+async def inline_login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = (await db.execute(select(AdminUser).where(AdminUser.username == form_data.username))).scalar_one()
+    if not verify_password(form_data.password, user.password_hash):
+        raise HTTPException(status_code=401)
+    return {"ok": True}
+
+
+async def measure(client: httpx.AsyncClient, path: str, args: argparse.Namespace) -> dict:
+    credentials = {"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD}
+    statuses = []
+
+    async def login():
+        response = await client.post(path, data=credentials)
+        statuses.append(response.status_code)
+
+    logins = asyncio.create_task(run_load(login, args.logins, args.concurrency))
+    reads = await run_load(lambda: client.get(f"{PREFIX}/posts?page_size=10"), args.reads, args.read_concurrency)
+    result = {"login": await logins, "reads_during_logins": reads}
+    result["login"]["rejected_503"] = statuses.count(503)
+    return result
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        await create_schema()
+        await seed_posts(args.posts)
+        await init_db()
+        transport = httpx.ASGITransport(app=app)
+        results = {
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "workers": password_hasher.max_workers,
+            "queue_limit": password_hasher.queue_limit,
+        }
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.get(f"{PREFIX}/posts")  # warm up pools
+            results["inline"] = await measure(client, "/bench/inline-login", args)
+            results["pooled"] = await measure(client, f"{PREFIX}/auth/login", args)
+        print(json.dumps(results, indent=2))
+    finally:
+        password_hasher.shutdown()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--reads", type=int, default=400)
+    parser.add_argument("--read-concurrency", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
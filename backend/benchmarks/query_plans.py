@@ -0,0 +1,184 @@
+"""Check that the hot public queries are planned as index scans.
+
+Seeds the benchmark corpus (100k posts by default), then EXPLAINs the
+queries the posts router actually runs: the first, type-filtered, deep
+offset and cursor listing pages, and `get_post` by id and by slug. Each
+listing must read the listing index in order, with no sort step, and each
+lookup must use its unique index. Plans are checked twice, before and
+after ANALYZE, since a freshly migrated database has no statistics.
+
+Works on SQLite (EXPLAIN QUERY PLAN) and Postgres (EXPLAIN, JSON format);
+the exit status is 1 when a plan regresses, so it can run in CI:
+
+    python -m benchmarks.query_plans --posts 100000
+    DATABASE_URL=postgresql://localhost/bench python -m benchmarks.query_plans
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from benchmarks.common import configure_environment, create_schema
+from benchmarks.dataset import CorpusOptions, seed_corpus
+
+configure_environment()
+
+from sqlalchemy import func, select, text  # noqa: E402
+from sqlalchemy.exc import DBAPIError  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.sql.expression import ClauseElement, Executable, Select  # noqa: E402
+
+from db.database import SessionLocal, dispose_engine, get_engine  # noqa: E402
+from models.post import Post, PostType  # noqa: E402
+from routers.posts import lookup_queries  # noqa: E402
+from utils.pagination import LISTING_ORDER, encode_cursor, keyset_filter, listing_query  # noqa: E402
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN a statement, keeping its bound parameters as parameters."""
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN (FORMAT JSON) "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+class Check(NamedTuple):
+    name: str
+    statement: Select
+    # Any of these indexes satisfies the check
+    indexes: Tuple[str, ...]
+    # Listings must come out of the index already ordered
+    no_sort: bool = False
+
+
+class Plan(NamedTuple):
+    indexes: List[str]
+    sorts: bool
+    detail: object
+
+
+async def explain(db, statement: Select) -> Plan:
+    rows = (await db.execute(Explain(statement))).all()
+    if db.bind.dialect.name == "sqlite":
+        details = [row.detail for row in rows]
+        indexes = [word for detail in details for word in detail.replace("(", " ").split() if word.startswith(("ix_", "sqlite_autoindex_"))]
+        return Plan(indexes, any("TEMP B-TREE FOR ORDER BY" in detail for detail in details), details)
+
+    plan = rows[0][0]
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    indexes, sorts = [], False
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            indexes.append(node["Index Name"])
+        sorts = sorts or node["Node Type"] in ("Sort", "Incremental Sort")
+        nodes.extend(node.get("Plans", []))
+    return Plan(indexes, sorts, plan)
+
+
+async def build_checks(db, primary_key_index: str) -> List[Check]:
+    listing = listing_query().order_by(*LISTING_ORDER)
+    published = await db.scalar(select(func.count()).select_from(listing_query().subquery()))
+    deep_offset = max(0, int(published * 0.9) - 1)
+    anchor = (await db.execute(listing.offset(deep_offset).limit(1))).one()
+    sample = (await db.execute(listing_query().with_only_columns(Post.id, Post.slug).limit(1))).one()
+    return [
+        Check("list_first_page", listing.limit(10), ("ix_posts_listing",), no_sort=True),
+        Check(
+            "list_type", listing_query(PostType.recipe).order_by(*LISTING_ORDER).limit(10),
+            ("ix_posts_type_listing",), no_sort=True,
+        ),
+        Check("list_deep_offset", listing.offset(deep_offset).limit(10), ("ix_posts_listing",), no_sort=True),
+        Check(
+            "list_deep_cursor", listing.where(keyset_filter(encode_cursor(anchor))).limit(11),
+            ("ix_posts_listing",), no_sort=True,
+        ),
+        Check("get_by_id", lookup_queries(sample.id, Post)[0], (primary_key_index,)),
+        Check("get_by_slug", lookup_queries(sample.slug, Post)[0], ("ix_posts_slug",)),
+    ]
+
+
+async def analyze() -> None:
+    engine = get_engine()
+    if engine.dialect.name == "sqlite":
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+        return
+    # VACUUM also fills the visibility map that index-only scans rely on
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE posts"))
+
+
+async def already_seeded() -> bool:
+    async with SessionLocal() as db:
+        try:
+            return bool(await db.scalar(select(func.count()).select_from(Post)))
+        except DBAPIError:
+            return False
+
+
+async def run_checks(checks: List[Check]) -> Dict:
+    results = {}
+    async with SessionLocal() as db:
+        for check in checks:
+            plan = await explain(db, check.statement)
+            problems: List[Optional[str]] = [
+                None if set(plan.indexes) & set(check.indexes) else f"does not use {' or '.join(check.indexes)}",
+                "sorts the rows" if check.no_sort and plan.sorts else None,
+            ]
+            results[check.name] = {
+                "ok": not any(problems),
+                "problems": [problem for problem in problems if problem],
+                "indexes": plan.indexes,
+                "plan": plan.detail,
+            }
+    return results
+
+
+async def main(args: argparse.Namespace) -> int:
+    try:
+        if not (args.reuse and await already_seeded()):
+            await create_schema()
+            await seed_corpus(CorpusOptions(posts=args.posts, body_words=args.body_words), progress=True)
+        dialect = get_engine().dialect.name
+        primary_key_index = "sqlite_autoindex_posts_1" if dialect == "sqlite" else "posts_pkey"
+        async with SessionLocal() as db:
+            checks = await build_checks(db, primary_key_index)
+
+        results = {"database": dialect, "posts": args.posts, "fresh": await run_checks(checks)}
+        await analyze()
+        results["analyzed"] = await run_checks(checks)
+    finally:
+        await dispose_engine()
+
+    failures = [
+        f"{stage}/{name}: {', '.join(result['problems'])}"
+        for stage in ("fresh", "analyzed")
+        for name, result in results[stage].items()
+        if not result["ok"]
+    ]
+    if not args.verbose:
+        for stage in ("fresh", "analyzed"):
+            for result in results[stage].values():
+                del result["plan"]
+    results["failures"] = failures
+    print(json.dumps(results, indent=2, default=str))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--body-words", type=int, default=50, help="Plans do not depend on body size")
+    parser.add_argument("--reuse", action="store_true", help="Skip seeding when the database already has posts")
+    parser.add_argument("--verbose", action="store_true", help="Include the raw plans")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,133 @@
+"""Exercise read-replica routing locally with two SQLite files.
+
+The replica is a copy of the primary's file, so it stands still while the
+primary takes writes, like a replica with unbounded lag. That makes the
+routing observable from the outside:
+
+1. A post created by the admin is visible to the admin, whose token
+   wrote recently and so reads from the primary, but missing from public reads of a fresh
+   client (they hit the replica).
+2. The replica's file is removed: the fresh client's next read cannot
+   connect to it, takes it out of rotation and reads the post from the
+   primary.
+3. The replica is restored: it is back in rotation after a health check.
+
+Prints each step and exits 1 if one fails:
+
+    python -m benchmarks.replicas
+"""
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from contextlib import closing
+
+from benchmarks.common import configure_environment, seed_posts
+
+_ROOT = tempfile.mkdtemp(prefix="bench-replicas-")
+_PRIMARY = os.path.join(_ROOT, "primary.db")
+_REPLICA_DIR = os.path.join(_ROOT, "replica")
+_REPLICA = os.path.join(_REPLICA_DIR, "replica.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_PRIMARY}")
+os.environ.setdefault("DATABASE_REPLICA_URLS", f"sqlite:///{_REPLICA}")
+configure_environment(
+    BCRYPT_ROUNDS="4", REPLICA_HEALTH_CHECK_SECONDS="0.2", REPLICA_RETRY_SECONDS="60", METRICS_ENABLED="true",
+)
+
+import httpx  # noqa: E402
+
+from core.config import settings  # noqa: E402
+from core.security import password_hasher  # noqa: E402
+from db.database import dispose_engine  # noqa: E402
+from db.init_db import migrate  # noqa: E402
+from db.replicas import replica_router  # noqa: E402
+from main import app  # noqa: E402
+
+PREFIX = settings.API_PREFIX or ""
+
+
+def copy_primary_to_replica() -> None:
+    os.makedirs(_REPLICA_DIR, exist_ok=True)
+    # The backup API includes commits still in the primary's WAL file
+    with closing(sqlite3.connect(_PRIMARY)) as primary, closing(sqlite3.connect(_REPLICA)) as replica:
+        primary.backup(replica)
+
+
+def read_sessions(metrics: str) -> dict:
+    counts = {}
+    for line in metrics.splitlines():
+        if line.startswith("db_read_sessions_total{"):
+            labels, value = line.rsplit(" ", 1)
+            counts[labels.split('"')[1]] = float(value)
+    return counts
+
+
+async def main() -> int:
+    if not os.environ["DATABASE_URL"].startswith("sqlite:///" + _ROOT):
+        print("Uses its own SQLite files; unset DATABASE_URL and DATABASE_REPLICA_URLS", file=sys.stderr)
+        return 2
+    steps = []
+
+    def check(name: str, ok: bool, **details) -> None:
+        steps.append({"step": name, "ok": ok, **details})
+        print(f"{'ok  ' if ok else 'FAIL'} {name} {details}", file=sys.stderr)
+
+    await migrate()
+    await seed_posts(50)
+    await dispose_engine()
+    copy_primary_to_replica()
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as admin, \
+                    httpx.AsyncClient(transport=transport, base_url="http://bench") as visitor:
+                login = await admin.post(f"{PREFIX}/auth/login", data={
+                    "username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD,
+                })
+                login.raise_for_status()
+                admin.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+                created = await admin.post(
+                    f"{PREFIX}/admin/posts",
+                    json={"title": "Written to the primary", "content_md": "Hello", "type": "tech", "status": "published"},
+                )
+                created.raise_for_status()
+                path = f"{PREFIX}/posts/{created.json()['slug']}"
+
+                status = (await admin.get(path)).status_code
+                check("admin reads its own write from the primary", status == 200, status=status)
+                check("listing from the replica", (await visitor.get(f"{PREFIX}/posts")).status_code == 200)
+                status = (await visitor.get(path)).status_code
+                check("fresh client reads the replica, which lacks the post", status == 404, status=status)
+
+                # Existing pooled connections would keep the unlinked file open
+                shutil.rmtree(_REPLICA_DIR)
+                await replica_router.replicas[0].engine.dispose()
+                status = (await visitor.get(path)).status_code
+                check("fresh client fails over to the primary", status == 200, status=status)
+                health = (await visitor.get(f"{PREFIX}/health/healthz")).json()
+                check("the failed read takes the replica out", not health["replicas"]["replica0"]["healthy"], health=health["replicas"])
+
+                copy_primary_to_replica()
+                await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_SECONDS * 3)
+                health = (await visitor.get(f"{PREFIX}/health/healthz")).json()
+                check("restored replica is back in rotation", health["replicas"]["replica0"]["healthy"])
+                status = (await visitor.get(path)).status_code
+                check("fresh client reads the restored replica", status == 200, status=status)
+
+                sessions = read_sessions((await visitor.get("/metrics")).text)
+                check("metrics count reads per database", set(sessions) == {"primary", "replica0"}, sessions=sessions)
+    finally:
+        password_hasher.shutdown()
+        await dispose_engine()
+        shutil.rmtree(_ROOT, ignore_errors=True)
+
+    print(json.dumps(steps, indent=2))
+    return 0 if all(step["ok"] for step in steps) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
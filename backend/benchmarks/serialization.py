@@ -0,0 +1,114 @@
+"""Per-request CPU cost of serializing a `PostList` page.
+
+The same page of posts is serialized four ways, repeatedly, with no I/O
+in the timed loop:
+
+- `encoder_full`: PostResponse built from ORM objects, then FastAPI's
+  jsonable_encoder and json.dumps (a `response_model` endpoint returning
+  ORM objects through the stock JSONResponse)
+- `pydantic_full`: the same models with Pydantic's model_dump_json
+- `pydantic_summary`: PostSummary models from ORM objects
+- `rows_orjson`: what `GET /posts` does now, plain dicts from row tuples
+  encoded with orjson
+
+    python -m benchmarks.serialization --page-sizes 10 100 --iterations 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import configure_environment, create_schema, seed_posts
+
+configure_environment()
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import desc, select, update  # noqa: E402
+
+from db.database import SessionLocal, engine  # noqa: E402
+from models.post import Post  # noqa: E402
+from schemas.post import SUMMARY_FIELD_COLUMNS, PostList, PostResponse, PostSummary, summary_data  # noqa: E402
+from utils.responses import dumps  # noqa: E402
+
+VARIANTS = [
+    {"url": f"https://bench.s3.us-east-1.amazonaws.com/posts/cover/{width}w.webp",
+     "width": width, "height": width * 2 // 3, "format": "webp"}
+    for width in (320, 640, 1280)
+]
+
+
+def page_meta(total: int, page_size: int) -> dict:
+    return {"total": total, "page": 1, "page_size": page_size,
+            "total_pages": (total + page_size - 1) // page_size, "next_cursor": None, "has_more": None}
+
+
+def serializers(posts, rows, total: int, page_size: int):
+    meta = page_meta(total, page_size)
+    return {
+        "encoder_full": lambda: json.dumps(jsonable_encoder(
+            PostList.model_construct(posts=[PostResponse.model_validate(p) for p in posts], **meta)
+        )).encode(),
+        "pydantic_full": lambda: PostList.model_construct(
+            posts=[PostResponse.model_validate(p) for p in posts], **meta
+        ).model_dump_json().encode(),
+        "pydantic_summary": lambda: PostList(
+            posts=[PostSummary.model_validate(p) for p in posts], **meta
+        ).model_dump_json().encode(),
+        "rows_orjson": lambda: dumps({"posts": [summary_data(row) for row in rows], **meta}),
+    }
+
+
+def time_per_call(func, iterations: int) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+async def load(page_size: int):
+    columns = sorted({c for cols in SUMMARY_FIELD_COLUMNS.values() for c in cols})
+    order = (desc(Post.pinned), desc(Post.published_at), desc(Post.id))
+    async with SessionLocal() as db:
+        posts = (await db.execute(select(Post).order_by(*order).limit(page_size))).scalars().all()
+        rows = (await db.execute(
+            select(*(getattr(Post, c) for c in columns)).order_by(*order).limit(page_size)
+        )).all()
+    return posts, rows
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        await create_schema()
+        await seed_posts(args.posts)
+        async with SessionLocal() as db:
+            await db.execute(update(Post).values(
+                cover_image_url="https://bench.s3.us-east-1.amazonaws.com/posts/cover.png",
+                cover_image_variants=VARIANTS, reading_time_minutes=1,
+            ))
+            await db.commit()
+
+        results = {}
+        for page_size in args.page_sizes:
+            posts, rows = await load(page_size)
+            funcs = serializers(posts, rows, args.posts, page_size)
+            # The fast path must produce the same document as the summary models
+            assert json.loads(funcs["rows_orjson"]()) == json.loads(funcs["pydantic_summary"]())
+            timings = {name: round(time_per_call(func, args.iterations), 1) for name, func in funcs.items()}
+            results[f"page_size={page_size}"] = {
+                "us_per_request": timings,
+                "bytes": {name: len(func()) for name, func in funcs.items()},
+                "speedup_vs_encoder_full": round(timings["encoder_full"] / timings["rows_orjson"], 1),
+                "speedup_vs_pydantic_summary": round(timings["pydantic_summary"] / timings["rows_orjson"], 1),
+            }
+        print(json.dumps(results, indent=2))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--iterations", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+"""Measure snapshot publishing: a full publish, and bursts of admin edits.
+
+Seeds the benchmark corpus, publishes every snapshot to a temporary
+directory, then runs a burst of concurrent admin edits through the API
+twice: debounced (the configured SNAPSHOT_DEBOUNCE_SECONDS) and with no
+debounce. Reports how many publish batches and document writes each burst
+caused, and checks that the published documents match the API's responses:
+
+    python -m benchmarks.snapshots --posts 5000 --edits 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.common import configure_environment, create_schema
+from benchmarks.dataset import CorpusOptions, seed_corpus
+
+_SNAPSHOT_DIR = tempfile.mkdtemp(prefix="bench-snapshots-")
+configure_environment(
+    BCRYPT_ROUNDS="4", SNAPSHOTS_ENABLED="true", SNAPSHOT_TARGET="local", SNAPSHOT_DIR=_SNAPSHOT_DIR,
+    SNAPSHOT_DEBOUNCE_SECONDS="0.5",
+)
+
+import httpx  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from core.config import settings  # noqa: E402
+from core.security import password_hasher  # noqa: E402
+from db.database import SessionLocal, dispose_engine  # noqa: E402
+from db.init_db import init_db  # noqa: E402
+from main import app  # noqa: E402
+from models.post import Post  # noqa: E402
+from utils.pagination import VISIBLE  # noqa: E402
+from utils.snapshots import Listing, post_path, snapshot_publisher  # noqa: E402
+
+PREFIX = settings.API_PREFIX or ""
+
+
+def read_document(path: str):
+    with open(os.path.join(_SNAPSHOT_DIR, path), "rb") as f:
+        return json.load(f)
+
+
+async def burst(client: httpx.AsyncClient, auth: dict, post_ids: list, debounce: float) -> dict:
+    """Edit every post at once and wait for the snapshots to catch up."""
+    snapshot_publisher.debounce = debounce
+    batches = snapshot_publisher.batches
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(
+        client.put(f"{PREFIX}/admin/posts/{post_id}", headers=auth, json={"summary": f"Edited at {time.time()}"})
+        for post_id in post_ids
+    ))
+    await snapshot_publisher.wait()
+    return {
+        "debounce_seconds": debounce,
+        "edits": len(post_ids),
+        "errors": sum(response.status_code != 200 for response in responses),
+        "publish_batches": snapshot_publisher.batches - batches,
+        "seconds_until_published": round(time.perf_counter() - started, 2),
+    }
+
+
+async def main(args: argparse.Namespace) -> int:
+    results = {"posts": args.posts}
+    try:
+        await create_schema()
+        await seed_corpus(CorpusOptions(posts=args.posts, body_words=args.body_words))
+        await init_db()
+
+        started = time.perf_counter()
+        results["full_publish"] = await snapshot_publisher.publish_all()
+        results["full_publish"]["seconds"] = round(time.perf_counter() - started, 2)
+
+        async with SessionLocal() as db:
+            post_ids = list(await db.scalars(select(Post.id).where(*VISIBLE).limit(args.edits)))
+
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                login = await client.post(f"{PREFIX}/auth/login", data={
+                    "username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD,
+                })
+                login.raise_for_status()
+                auth = {"Authorization": f"Bearer {login.json()['access_token']}"}
+                results["bursts"] = [
+                    await burst(client, auth, post_ids, settings.SNAPSHOT_DEBOUNCE_SECONDS),
+                    await burst(client, auth, post_ids, 0),
+                ]
+
+                # The published documents must be what the API serves
+                listing = (await client.get(f"{PREFIX}/posts")).json()
+                post = (await client.get(f"{PREFIX}/posts/{listing['posts'][0]['slug']}")).json()
+                results["matches_api"] = {
+                    "list_page_1": read_document(Listing("all").path(1)) == listing,
+                    "post": read_document(post_path(post["slug"])) == post,
+                }
+    finally:
+        password_hasher.shutdown()
+        await dispose_engine()
+        shutil.rmtree(_SNAPSHOT_DIR, ignore_errors=True)
+
+    print(json.dumps(results, indent=2))
+    return 0 if all(results["matches_api"].values()) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--body-words", type=int, default=300)
+    parser.add_argument("--edits", type=int, default=50, help="Posts edited in each burst")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,119 @@
+"""Measure cold start: importing the app, startup and the first requests.
+
+Each run is a fresh interpreter, like a newly scheduled instance: it
+imports `main`, runs the lifespan startup, then times the first
+`GET /posts` (which opens the first database connection) and a second one
+for comparison. The database is migrated and seeded once beforehand.
+
+`lazy` is the normal configuration; `auto_migrate` sets AUTO_MIGRATE to
+show what migrating on every boot would cost. Medians of the `lazy` runs
+are checked against the budgets, and the exit status is 1 when one is
+exceeded, so the script can guard against startup regressions in CI:
+
+    python -m benchmarks.startup --runs 5 --budget-import-ms 1500 --budget-first-request-ms 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import configure_environment, seed_posts
+
+configure_environment()
+
+# Runs in the child process; prints one JSON line
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+import asyncio, httpx
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            timings = []
+            for _ in range(2):
+                request_started = time.perf_counter()
+                response = await client.get(sys.argv[1])
+                response.raise_for_status()
+                timings.append(time.perf_counter() - request_started)
+    return ready, timings
+
+ready, (first, second) = asyncio.run(run())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": first * 1000,
+    "second_request_ms": second * 1000,
+}))
+"""
+
+METRICS = ("import_ms", "startup_ms", "first_request_ms", "second_request_ms", "process_ms")
+
+
+def run_child(path: str, env: dict) -> dict:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD, path], env=env, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Interpreter startup to exit, as a process supervisor would see it
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def summarize_runs(runs: list) -> dict:
+    return {
+        metric: {
+            "median": round(statistics.median(run[metric] for run in runs), 1),
+            "max": round(max(run[metric] for run in runs), 1),
+        }
+        for metric in METRICS
+    }
+
+
+async def prepare(posts: int) -> None:
+    from db.database import dispose_engine
+    from db.init_db import migrate
+
+    await migrate()
+    await seed_posts(posts)
+    await dispose_engine()
+
+
+def main(args: argparse.Namespace) -> int:
+    asyncio.run(prepare(args.posts))
+    path = f"{os.environ.get('API_PREFIX', '')}/posts"
+    variants = {"lazy": {}, "auto_migrate": {"AUTO_MIGRATE": "true"}}
+    results = {}
+    for name, overrides in variants.items():
+        env = {**os.environ, **overrides}
+        runs = [run_child(path, env) for _ in range(args.runs)]
+        results[name] = summarize_runs(runs)
+
+    budgets = {"import_ms": args.budget_import_ms, "first_request_ms": args.budget_first_request_ms}
+    over = {
+        metric: {"median": results["lazy"][metric]["median"], "budget": budget}
+        for metric, budget in budgets.items()
+        if results["lazy"][metric]["median"] > budget
+    }
+    results["budgets"] = budgets
+    results["over_budget"] = over
+    print(json.dumps(results, indent=2))
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per variant")
+    parser.add_argument("--posts", type=int, default=100)
+    parser.add_argument("--budget-import-ms", type=float, default=1500)
+    parser.add_argument("--budget-first-request-ms", type=float, default=300)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+"""Measure NDJSON export and bulk import throughput.
+
+Seeds the benchmark corpus, exports it to a temporary file, recreates the
+schema and imports the file back, reporting posts per minute and the
+process's peak memory after each step. Flat peak memory across post counts
+is the sign that export and import stream:
+
+    python -m benchmarks.transfer --posts 50000 --gzip
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks.common import configure_environment, create_schema
+from benchmarks.dataset import CorpusOptions, seed_corpus
+
+configure_environment()
+
+from sqlalchemy import func, select  # noqa: E402
+
+from db.database import SessionLocal, engine  # noqa: E402
+from models.post import Post  # noqa: E402
+from utils.post_transfer import PostImporter, export_posts, ndjson_lines  # noqa: E402
+from utils.search import get_search_backend  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def read_file(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            yield chunk
+
+
+async def main(args: argparse.Namespace) -> None:
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "posts.ndjson" + (".gz" if args.gzip else ""))
+    try:
+        await create_schema()
+        await seed_corpus(CorpusOptions(posts=args.posts, body_words=args.body_words))
+        results = {"posts": args.posts, "seeded_peak_rss_mb": peak_rss_mb()}
+
+        started = time.perf_counter()
+        with open(path, "wb") as f:
+            async for chunk in export_posts(compress=args.gzip):
+                f.write(chunk)
+        elapsed = time.perf_counter() - started
+        results["export"] = {
+            "seconds": round(elapsed, 2),
+            "posts_per_minute": round(args.posts / elapsed * 60),
+            "file_mb": round(os.path.getsize(path) / 1e6, 1),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+        await create_schema()
+        async with SessionLocal() as db:
+            # drop_all leaves the full-text table alone; empty it too
+            await get_search_backend().rebuild(db)
+            await db.commit()
+        started = time.perf_counter()
+        async with SessionLocal() as db:
+            outcome = await PostImporter(db, args.chunk_size).run(ndjson_lines(read_file(path)))
+            count = await db.scalar(select(func.count()).select_from(Post))
+        elapsed = time.perf_counter() - started
+        results["import"] = {
+            "seconds": round(elapsed, 2),
+            "posts_per_minute": round(outcome.imported / elapsed * 60),
+            "imported": outcome.imported,
+            "failed": outcome.failed,
+            "rows_after": count,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        print(json.dumps(results, indent=2))
+    finally:
+        os.remove(path) if os.path.exists(path) else None
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--body-words", type=int, default=600)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--gzip", action="store_true", help="Export and import a gzipped file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,170 @@
+import hashlib
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.security import decode_token
+from models.admin_user import AdminUser
+from utils.cache import CacheBackend, RedisCache, TTLCache, response_cache
+
+class AdminIdentity(NamedTuple):
+    """The parts of an admin record needed to accept a token."""
+    id: int
+    username: str
+    token_version: int
+
+
+def identity_for(admin: AdminUser) -> AdminIdentity:
+    return AdminIdentity(admin.id, admin.username, admin.token_version or 0)
+
+
+class AdminAuthCache:
+    """Per-worker caches behind `get_current_admin`.
+
+    Decoded claims are kept per token digest and admin records per
+    username, both bounded and short-lived. Revoked token ids are held
+    until the token would have expired anyway, and mirrored to `shared`
+    (when given) so a logout reaches every worker. Admins who wrote in the
+    last `write_window` seconds are tracked the same way, so their public
+    reads can skip lagging replicas on any worker.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 60.0,
+        shared: Optional[CacheBackend] = None,
+        prefix: str = "auth:",
+        write_window: float = 10.0,
+    ):
+        self.ttl = ttl
+        self.shared = shared
+        self.prefix = prefix
+        self.write_window = write_window
+        self._claims = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._admins = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._writers = TTLCache(maxsize=maxsize, ttl=write_window)
+        # Not an LRU: a revocation must never be evicted before the token expires
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    def _remaining(claims: Dict[str, Any]) -> float:
+        return float(claims.get("exp", 0)) - time.time()
+
+    def _revoked_key(self, jti: str) -> str:
+        return f"{self.prefix}revoked:{jti}"
+
+    def _wrote_key(self, username: str) -> str:
+        return f"{self.prefix}wrote:{username}"
+
+    def decode(self, token: str) -> Optional[Dict[str, Any]]:
+        """Verified claims of `token`, or None if it is invalid or expired."""
+        key = self._digest(token)
+        claims = self._claims.get(key)
+        if claims is None:
+            claims = decode_token(token)
+            if claims is None:
+                return None
+            # Never cache past the token's own expiry
+            self._claims.set(key, claims, ttl=min(self.ttl, self._remaining(claims)))
+        return claims
+
+    async def revoke(self, claims: Dict[str, Any]) -> None:
+        jti = claims.get("jti")
+        if not jti:
+            return
+        expires_at = float(claims.get("exp", 0))
+        now = time.time()
+        with self._lock:
+            self._revoked = {k: v for k, v in self._revoked.items() if v > now}
+            self._revoked[jti] = expires_at
+        if self.shared is not None:
+            await self.shared.set(self._revoked_key(jti), b"1", ttl=max(expires_at - now, 1))
+
+    async def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        jti = claims.get("jti")
+        if not jti:
+            # Tokens without an id cannot be revoked, so they are not accepted
+            return True
+        if jti in self._revoked:
+            return True
+        if self.shared is not None and await self.shared.get(self._revoked_key(jti)) is not None:
+            with self._lock:
+                self._revoked[jti] = float(claims.get("exp", 0))
+            return True
+        return False
+
+    async def record_write(self, username: str) -> None:
+        self._writers.set(username, True)
+        if self.shared is not None:
+            await self.shared.set(self._wrote_key(username), b"1", ttl=self.write_window)
+
+    async def wrote_recently(self, username: str) -> bool:
+        if self._writers.get(username):
+            return True
+        return self.shared is not None and await self.shared.get(self._wrote_key(username)) is not None
+
+    def remember_admin(self, admin: AdminUser) -> AdminIdentity:
+        identity = identity_for(admin)
+        self._admins.set(identity.username, identity)
+        return identity
+
+    async def get_admin(self, db: AsyncSession, username: str) -> Optional[AdminIdentity]:
+        identity = self._admins.get(username)
+        if identity is None:
+            result = await db.execute(select(AdminUser).where(AdminUser.username == username))
+            admin = result.scalar_one_or_none()
+            if admin is None:
+                return None
+            identity = self.remember_admin(admin)
+        return identity
+
+    def invalidate_admin(self, username: str) -> None:
+        self._admins.delete(username)
+
+    def clear(self) -> None:
+        self._claims.clear()
+        self._admins.clear()
+        self._writers.clear()
+        with self._lock:
+            self._revoked.clear()
+
+
+admin_auth_cache = AdminAuthCache(
+    maxsize=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+    shared=response_cache.backend if isinstance(response_cache.backend, RedisCache) else None,
+    write_window=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+_CHANGED_ADMINS = "changed_admin_usernames"
+
+@event.listens_for(AdminUser, "after_update")
+@event.listens_for(AdminUser, "after_delete")
+def _record_admin_change(mapper, connection, target: AdminUser) -> None:
+    # Collected per session and applied on commit, so a concurrent request
+    # cannot re-cache the old row between the flush and the commit
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_ADMINS, set()).update(usernames)
+    else:
+        for username in usernames:
+            admin_auth_cache.invalidate_admin(username)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_admins(session: Session) -> None:
+    for username in session.info.pop(_CHANGED_ADMINS, ()):
+        admin_auth_cache.invalidate_admin(username)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changed_admins(session: Session, previous_transaction) -> None:
+    session.info.pop(_CHANGED_ADMINS, None)
@@ -1,6 +1,6 @@
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import field_validator
+from pydantic import Field, field_validator
 import os
 
 class Settings(BaseSettings):
@@ -15,6 +15,16 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Verified tokens and admin records are cached per worker for this many
+    # seconds; revocations are shared through CACHE_URL when CACHE_BACKEND=redis,
+    # which is therefore required with several workers (WEB_CONCURRENCY)
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 256
+    # bcrypt runs on a dedicated thread pool; requests beyond workers + queue
+    # limit get a 503. Raising BCRYPT_ROUNDS rehashes passwords on next login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 16
     
     # Admin
     ADMIN_USERNAME: str
@@ -22,6 +32,30 @@ class Settings(BaseSettings):
     
     # Database - UPDATED: Remove hardcoded default, let it come from env
     DATABASE_URL: str
+
+    # Read replicas (same dialect as DATABASE_URL), comma-separated. Public
+    # GET /posts requests read from a healthy replica; everything else, and
+    # public reads with the token of an admin who wrote in the last
+    # READ_YOUR_WRITES_SECONDS, uses the primary. Replicas are pinged every
+    # REPLICA_HEALTH_CHECK_SECONDS; a failing one is skipped for
+    # REPLICA_RETRY_SECONDS. For
+    # READ_YOUR_WRITES_SECONDS after any write, what replicas return is not
+    # put in the response cache, so keep it above the replicas' usual lag.
+    DATABASE_REPLICA_URLS: str = ""
+    READ_YOUR_WRITES_SECONDS: int = 10
+    REPLICA_HEALTH_CHECK_SECONDS: float = 5
+    REPLICA_RETRY_SECONDS: float = 30
+
+    # Run `manage.py migrate` (schema and admin user) on every startup instead
+    # of as a deploy step; convenient locally, slower cold starts elsewhere
+    AUTO_MIGRATE: bool = False
+
+    # Connection pool (ignored for SQLite); timeouts are in seconds
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 300
+    DB_CONNECT_TIMEOUT: float = 10
     
     # CORS - UPDATED: Added both www and non-www versions
     CORS_ORIGINS: List[str] = [
@@ -36,6 +70,60 @@ class Settings(BaseSettings):
     API_PREFIX: str = ""
     DOCS_URL: str = "/docs"
     REDOC_URL: str = "/redoc"
+
+    # Worker processes serving the app; uvicorn and gunicorn read the same
+    # variable. State kept per process is refused when there are several.
+    WEB_CONCURRENCY: int = 1
+
+    # Search: "auto" picks Postgres tsvector, SQLite FTS5 or the in-process index
+    SEARCH_BACKEND: str = "auto"
+    # Postgres text search configuration; run `manage.py rebuild-search-index` after changing it
+    SEARCH_LANGUAGE: str = "english"
+
+    # Seconds a cursor-pagination total may be reused before it is recounted
+    LIST_COUNT_CACHE_TTL: int = 60
+
+    # Response cache for public post endpoints: "memory", "redis" or "none".
+    # The memory backend is per worker; several workers need redis.
+    CACHE_BACKEND: str = "memory"
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_MAX_ENTRIES: int = 2048
+
+    # Cache-Control sent with public post responses (browsers and CDN)
+    POSTS_CACHE_CONTROL: str = "public, max-age=60, stale-while-revalidate=300"
+
+    # SQL profiling (off by default): attributes queries to requests, logs
+    # statements slower than SQL_SLOW_QUERY_MS with their parameters and
+    # requests over SQL_QUERY_BUDGET queries or repeating one statement
+    # SQL_N_PLUS_ONE_THRESHOLD times. Timelines: GET /debug/queries/{id}.
+    SQL_PROFILING: bool = False
+    SQL_SLOW_QUERY_MS: float = 100
+    SQL_QUERY_BUDGET: int = 20
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Prometheus metrics at /metrics, served once METRICS_TOKEN is set and
+    # required from scrapers as a bearer token. METRICS_ENABLED=true serves
+    # them without a token, for a port only the scraper can reach; false
+    # turns them off.
+    METRICS_TOKEN: Optional[str] = None
+    METRICS_ENABLED: Optional[bool] = Field(None, validate_default=True)
+
+    @field_validator("METRICS_ENABLED")
+    @classmethod
+    def enable_metrics_with_token(cls, v, info):
+        if v is None:
+            return bool(info.data.get("METRICS_TOKEN"))
+        return v
+
+    # Response compression, in server preference order; "br" and "zstd" need
+    # the "compression" extra and are skipped without it. Empty disables it.
+    COMPRESSION_ENCODINGS: List[str] = ["br", "zstd", "gzip"]
+    COMPRESSION_MIN_SIZE: int = 1024
+    # Levels for responses compressed per request, and for cached responses,
+    # which are compressed once when the cache is filled
+    COMPRESSION_LEVELS: Dict[str, int] = {"br": 4, "zstd": 3, "gzip": 6}
+    COMPRESSION_CACHED_LEVELS: Dict[str, int] = {"br": 6, "zstd": 9, "gzip": 9}
     
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
@@ -62,9 +150,36 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: str
     AWS_REGION: str
     S3_BUCKET_NAME: str
+    # Set to use an S3-compatible stand-in (moto server, MinIO, ...)
+    S3_ENDPOINT_URL: Optional[str] = None
+    # Uploads stream to S3 in parts of this size (S3's minimum is 5MB)
+    S3_MULTIPART_PART_SIZE: int = 5 * 1024 * 1024
+    MAX_IMAGE_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    # Lifetime of presigned browser-to-S3 upload URLs
+    S3_PRESIGN_EXPIRES_SECONDS: int = 300
+
+    # Static JSON snapshots of the first SNAPSHOT_PAGES listing pages (all
+    # posts, per type and per tag) and of every published post, rewritten
+    # after admin writes for a CDN to serve. Writes are batched: a rebuild
+    # starts once no write came in for SNAPSHOT_DEBOUNCE_SECONDS, or at the
+    # latest SNAPSHOT_MAX_DELAY_SECONDS after the first pending one.
+    # SNAPSHOT_TARGET is "s3" (keys under SNAPSHOT_PREFIX in S3_BUCKET_NAME)
+    # or "local" (files under SNAPSHOT_DIR).
+    SNAPSHOTS_ENABLED: bool = False
+    SNAPSHOT_TARGET: str = "s3"
+    SNAPSHOT_PREFIX: str = "snapshots/"
+    SNAPSHOT_DIR: str = "./snapshots"
+    SNAPSHOT_PAGES: int = 3
+    SNAPSHOT_PAGE_SIZE: int = 10
+    SNAPSHOT_DEBOUNCE_SECONDS: float = 2
+    SNAPSHOT_MAX_DELAY_SECONDS: float = 30
+
+    # Resized cover variants (needs the "images" extra). Formats are Pillow
+    # names, e.g. ["webp", "avif"]; an empty width list disables variants.
+    IMAGE_VARIANT_WIDTHS: List[int] = [320, 640, 1280]
+    IMAGE_VARIANT_FORMATS: List[str] = ["webp"]
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_PROCESS_WORKERS: int = 2
     
 
 settings = Settings()
-
-# Debug print (remove in production)
-print(f"Loaded DATABASE_URL: {settings.DATABASE_URL[:30]}..." if settings.DATABASE_URL else "No DATABASE_URL!")
\ No newline at end of file
@@ -1,23 +1,79 @@
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from typing import Annotated, AsyncIterator, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from db.database import SessionLocal
-from core.security import verify_token
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.database import SessionLocal, WriteSessionLocal
+from db.replicas import REPLICA_ERRORS, Replica, replica_router
+from core.auth_cache import admin_auth_cache
+from core.config import settings
 from models.admin_user import AdminUser
+from utils.metrics import db_read_sessions
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_db():
-    db = SessionLocal()
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with SessionLocal() as db:
+        yield db
+
+async def get_write_db() -> AsyncIterator[AsyncSession]:
+    """A session for endpoints that write; on SQLite it takes the write lock as it begins."""
+    async with WriteSessionLocal() as db:
+        yield db
+
+async def _reads_from_primary(request: Request) -> bool:
+    # Public endpoints do not require a token, but an admin's client may send one
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    claims = admin_auth_cache.decode(token)
+    return claims is not None and await admin_auth_cache.wrote_recently(claims["sub"])
+
+def from_replica(db: AsyncSession) -> bool:
+    """Whether `db` reads from a replica, whose rows may lag the primary."""
+    return "replica" in db.info
+
+async def _connect_replica(replica: Replica) -> Optional[AsyncSession]:
+    db = SessionLocal(bind=replica.engine)
     try:
+        # Connecting up front lets an unreachable replica fall back to the
+        # primary before the endpoint runs
+        await db.connection()
+    except REPLICA_ERRORS as e:
+        await db.close()
+        replica_router.mark_down(replica, e)
+        return None
+    db.info["replica"] = replica.name
+    return db
+
+async def get_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """A session for public reads: a healthy replica, or the primary.
+
+    Requests carrying the token of an admin who wrote recently read from
+    the primary, so they see their own writes. A replica that cannot be reached is taken out of rotation
+    and the request reads from the primary instead; one that fails in the
+    middle of a request is taken out too, but that request fails.
+    """
+    replica = None
+    if replica_router.enabled and not await _reads_from_primary(request):
+        replica = replica_router.pick()
+    db = await _connect_replica(replica) if replica else None
+    if db is not None:
+        db_read_sessions.inc(replica.name)
+        try:
+            yield db
+        except REPLICA_ERRORS as e:
+            replica_router.mark_down(replica, e)
+            raise
+        finally:
+            await db.close()
+        return
+    db_read_sessions.inc("primary")
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 async def get_current_admin(
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> AdminUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -25,12 +81,28 @@ async def get_current_admin(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    username = verify_token(token)
-    if username is None:
+    # Decoded claims and the admin record come from a short-lived cache, so
+    # most admin requests never touch the database here
+    claims = admin_auth_cache.decode(token)
+    if claims is None or await admin_auth_cache.is_revoked(claims):
         raise credentials_exception
         
-    user = db.query(AdminUser).filter(AdminUser.username == username).first()
-    if user is None:
+    identity = await admin_auth_cache.get_admin(db, claims["sub"])
+    # Tokens issued before a password change carry an older version
+    if identity is None or claims.get("ver") != identity.token_version:
         raise credentials_exception
         
-    return user
\ No newline at end of file
+    return AdminUser(id=identity.id, username=identity.username)
+
+async def read_your_writes(
+    request: Request,
+    current_admin: AdminUser = Depends(get_current_admin),
+) -> None:
+    """Send the admin's public reads to the primary for a while after a write.
+
+    Keyed on the token's subject rather than a cookie, so it also holds for
+    a frontend that calls the API cross-site without credentials.
+    """
+    if not replica_router.enabled or request.method in ("GET", "HEAD", "OPTIONS"):
+        return
+    await admin_auth_cache.record_write(current_admin.username)
@@ -1,10 +1,22 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from core.config import settings
+from utils.metrics import password_hash_duration, password_hash_queue_wait
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes below BCRYPT_ROUNDS are reported by needs_update and upgraded on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -12,22 +24,103 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the hashing pool and its queue are full."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL, so threads give real parallelism. At most
+    `max_workers + queue_limit` calls may be pending; beyond that calls
+    fail fast with `PasswordHasherBusy` instead of piling up.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int = 2, queue_limit: int = 16):
+        self.context = context
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="bcrypt"
+                )
+            return self._executor
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.max_workers + self.queue_limit:
+                raise PasswordHasherBusy("Password hashing pool is saturated")
+            self._pending += 1
+        queued = time.perf_counter()
+
+        def timed() -> Any:
+            started = time.perf_counter()
+            password_hash_queue_wait.observe(started - queued)
+            try:
+                return fn(*args)
+            finally:
+                password_hash_duration.observe(time.perf_counter() - started, fn.__name__)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), timed)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also return a new hash if the stored one uses outdated settings."""
+        return await self._run(self.context.verify_and_update, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    pwd_context,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT,
+)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # jti lets a single token be revoked on logout
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[str]:
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return username
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    if payload.get("sub") is None:
+        return None
+    return payload
+
+def verify_token(token: str) -> Optional[str]:
+    payload = decode_token(token)
+    return payload["sub"] if payload else None
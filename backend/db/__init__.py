@@ -1,4 +1,4 @@
 """Database module."""
-from db.database import Base, SessionLocal, engine
+from db.database import Base, SessionLocal, dispose_engine, get_engine
 
-__all__ = ["Base", "SessionLocal", "engine"]
\ No newline at end of file
+__all__ = ["Base", "SessionLocal", "dispose_engine", "get_engine"]
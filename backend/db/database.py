@@ -1,10 +1,11 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 from core.config import settings
-
-# Debug: Check what DATABASE_URL we're getting
-print(f"DATABASE_URL from settings: {settings.DATABASE_URL}")
+from utils.metrics import TimedQueuePool, register_pool_gauges
+from utils.query_profiler import install_query_profiler
 
 # Validate DATABASE_URL exists
 if not settings.DATABASE_URL:
@@ -15,21 +16,135 @@ DATABASE_URL = settings.DATABASE_URL
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# Create engine with appropriate settings
-if DATABASE_URL.startswith("sqlite"):
-    # SQLite settings
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False}
-    )
-else:
-    # PostgreSQL settings
-    engine = create_engine(
-        DATABASE_URL,
-        pool_pre_ping=True,  # Verify connections before using
-        pool_recycle=300,    # Recycle connections after 5 minutes
-    )
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-Base = declarative_base()
\ No newline at end of file
+def to_async_url(url: str) -> str:
+    """Point a sync database URL at its async driver (asyncpg / aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg spells libpq's sslmode as ssl
+        if "sslmode" in parsed.query:
+            query = dict(parsed.query)
+            query["ssl"] = query.pop("sslmode")
+            parsed = parsed.set(query=query)
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+def _use_sqlite_transactions(engine: AsyncEngine) -> None:
+    """Let SQLAlchemy, not the sqlite3 driver, begin transactions.
+
+    The driver defers BEGIN until the first write and ignores SAVEPOINT, so
+    a savepoint could run outside any transaction and commit on RELEASE.
+    This is SQLAlchemy's documented recipe for SQLite savepoints. Reads now
+    hold their transaction until the session ends, so the database runs in
+    WAL mode, where readers do not block a writer's commit. Engines with the
+    `sqlite_begin` execution option begin with it, e.g. BEGIN IMMEDIATE.
+    """
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _begin(conn):
+        mode = conn.get_execution_options().get("sqlite_begin")
+        conn.exec_driver_sql(f"BEGIN {mode}" if mode else "BEGIN")
+
+def create_engine_for(url: str) -> AsyncEngine:
+    """An async engine for a sync-style URL, with the app's pool settings."""
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    if url.startswith("sqlite"):
+        # SQLite settings
+        engine = create_async_engine(
+            to_async_url(url),
+            poolclass=TimedQueuePool,
+            connect_args={"check_same_thread": False}
+        )
+        _use_sqlite_transactions(engine)
+    else:
+        # PostgreSQL settings
+        engine = create_async_engine(
+            to_async_url(url),
+            poolclass=TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_pre_ping=True,  # Verify connections before using
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            connect_args={"timeout": settings.DB_CONNECT_TIMEOUT},
+        )
+    if settings.SQL_PROFILING:
+        install_query_profiler(engine)
+    return engine
+
+_engine: Optional[AsyncEngine] = None
+
+def get_engine() -> AsyncEngine:
+    """The process-wide engine, created on first use.
+
+    Creating it loads the database driver, so importing the app stays
+    cheap and nothing touches the database until a request needs it.
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_engine_for(DATABASE_URL)
+    return _engine
+
+async def dispose_engine() -> None:
+    """Close pooled connections, without creating an engine that was never used."""
+    if _engine is not None:
+        await _engine.dispose()
+
+# Engines by the `database` label of the pool metrics; replicas add theirs
+pool_engines: Dict[str, AsyncEngine] = {}
+
+def _open_engines() -> Dict[str, AsyncEngine]:
+    engines = dict(pool_engines)
+    if _engine is not None:
+        engines["primary"] = _engine
+    return engines
+
+register_pool_gauges(_open_engines)
+
+def __getattr__(name: str):
+    # `from db.database import engine` keeps working, creating the engine then
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class _LazySessionmaker(async_sessionmaker):
+    """Binds to the engine when the first session is opened."""
+
+    def __init__(self, engine_options: Optional[Dict[str, Any]] = None, **kw):
+        super().__init__(**kw)
+        self.engine_options = engine_options
+
+    def __call__(self, **local_kw) -> AsyncSession:
+        if self.kw.get("bind") is None:
+            engine = get_engine()
+            if self.engine_options:
+                engine = engine.execution_options(**self.engine_options)
+            self.configure(bind=engine)
+        return super().__call__(**local_kw)
+
+SessionLocal = _LazySessionmaker(
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Sessions that write. On SQLite their transactions take the write lock as
+# they begin: in WAL mode one that read first cannot start writing once
+# another writer has committed, and fails instead of waiting.
+WriteSessionLocal = _LazySessionmaker(
+    engine_options={"sqlite_begin": "IMMEDIATE"},
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+Base = declarative_base()
@@ -1,31 +1,82 @@
 import logging
-from sqlalchemy.orm import Session
-from db.database import SessionLocal
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, select
+from db.database import Base, WriteSessionLocal, get_engine
 from models.admin_user import AdminUser
-from core.security import get_password_hash
+from core.security import password_hasher
 from core.config import settings
+from utils.search import get_search_backend
 
 logger = logging.getLogger(__name__)
 
-def init_db():
-    db = SessionLocal()
-    try:
-        # Check if admin user exists
-        admin = db.query(AdminUser).filter(
-            AdminUser.username == settings.ADMIN_USERNAME
-        ).first()
-        
-        if not admin:
-            # Create admin user
-            admin = AdminUser(
-                username=settings.ADMIN_USERNAME,
-                password_hash=get_password_hash(settings.ADMIN_PASSWORD)
-            )
-            db.add(admin)
-            db.commit()
-            logger.info(f"Admin user '{settings.ADMIN_USERNAME}' created")
-        else:
-            logger.info(f"Admin user '{settings.ADMIN_USERNAME}' already exists")
-            
-    finally:
-        db.close()
\ No newline at end of file
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+# The schema of databases created with create_all before migrations were
+# tracked; the migrations after it skip objects that already exist
+BASELINE_REVISION = "e35dd642acea"
+
+def _alembic_config(connection) -> Config:
+    config = Config(ALEMBIC_INI)
+    # Migrate on this connection, and leave the app's logging alone
+    config.attributes["connection"] = connection
+    config.attributes["configure_logger"] = False
+    return config
+
+def _migrate_schema(connection) -> str:
+    tables = set(inspect(connection).get_table_names())
+    config = _alembic_config(connection)
+    if "posts" not in tables:
+        # A brand-new database gets the current schema in one step
+        Base.metadata.create_all(connection)
+        command.stamp(config, "head")
+        return "created"
+    if "alembic_version" not in tables:
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+    return "upgraded"
+
+async def create_schema():
+    """Bring the schema up to date with Alembic, then the search schema.
+
+    A brand-new database is created from the models and stamped at the
+    head revision; any other database is upgraded to head.
+    """
+    engine = get_engine()
+    async with engine.begin() as conn:
+        outcome = await conn.run_sync(_migrate_schema)
+    logger.info(f"Database schema {outcome}")
+    await get_search_backend().ensure_schema(engine)
+
+async def init_db():
+    """Create the admin user if it is missing.
+
+    The usual case, an existing admin, costs one indexed lookup; the
+    password is only hashed when the user has to be created.
+    """
+    async with WriteSessionLocal() as db:
+        exists = await db.scalar(
+            select(AdminUser.id).where(AdminUser.username == settings.ADMIN_USERNAME).limit(1)
+        )
+        if exists is not None:
+            logger.debug(f"Admin user '{settings.ADMIN_USERNAME}' already exists")
+            return
+
+        # Create admin user
+        admin = AdminUser(
+            username=settings.ADMIN_USERNAME,
+            password_hash=await password_hasher.hash(settings.ADMIN_PASSWORD)
+        )
+        db.add(admin)
+        await db.commit()
+        logger.info(f"Admin user '{settings.ADMIN_USERNAME}' created")
+
+async def migrate():
+    """Prepare the database: schema first, then the admin user.
+
+    Run by `manage.py migrate` as a deploy step, so serving processes start
+    without touching the database (unless AUTO_MIGRATE is set).
+    """
+    await create_schema()
+    await init_db()
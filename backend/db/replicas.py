@@ -0,0 +1,123 @@
+"""Read replicas for public reads, with failover to the primary."""
+import asyncio
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from core.config import settings
+from db.database import create_engine_for, pool_engines
+from utils.metrics import db_replica_failures
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the replica could not be reached, as opposed to a bad query
+REPLICA_ERRORS = (OperationalError, OSError, asyncio.TimeoutError)
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.down_until = 0.0
+        self.last_error: Optional[str] = None
+        self._engine: Optional[AsyncEngine] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        # Created on first use, like the primary's
+        if self._engine is None:
+            self._engine = create_engine_for(self.url)
+            pool_engines[self.name] = self._engine
+        return self._engine
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+class ReplicaRouter:
+    """Hands out healthy replicas round robin.
+
+    A replica that cannot be reached, by a request or by the periodic
+    health check, leaves the rotation for `retry_seconds`, or until a
+    health check succeeds. With no healthy replica, or none configured,
+    `pick` returns None and reads go to the primary.
+    """
+
+    def __init__(self, urls: List[str], retry_seconds: float, check_interval: float):
+        self.replicas = [Replica(f"replica{n}", url) for n, url in enumerate(urls)]
+        self.retry_seconds = retry_seconds
+        self.check_interval = check_interval
+        self._turn = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def mark_down(self, replica: Replica, error: BaseException) -> None:
+        if replica.healthy:
+            logger.warning(f"Replica {replica.name} unreachable, reading from the primary: {error!r}")
+        replica.down_until = time.monotonic() + self.retry_seconds
+        replica.last_error = repr(error)
+        db_replica_failures.inc(replica.name)
+
+    def mark_up(self, replica: Replica) -> None:
+        if not replica.healthy:
+            logger.info(f"Replica {replica.name} is back in rotation")
+        replica.down_until = 0.0
+        replica.last_error = None
+
+    async def check(self) -> None:
+        """Ping every replica once, updating which ones are in rotation."""
+        async def ping(replica: Replica) -> None:
+            try:
+                async with asyncio.timeout(self.check_interval):
+                    async with replica.engine.connect() as conn:
+                        await conn.execute(text("SELECT 1"))
+            except REPLICA_ERRORS as e:
+                self.mark_down(replica, e)
+            else:
+                self.mark_up(replica)
+
+        await asyncio.gather(*(ping(replica) for replica in self.replicas))
+
+    async def _check_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Replica health check failed")
+
+    def start(self) -> None:
+        """Start health checks on the running event loop; a no-op without replicas."""
+        if self.enabled and self._health_task is None:
+            self._health_task = asyncio.create_task(self._check_periodically())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for replica in self.replicas:
+            if replica._engine is not None:
+                await replica._engine.dispose()
+
+    def status(self) -> Dict[str, dict]:
+        return {
+            replica.name: {"healthy": replica.healthy, "error": replica.last_error}
+            for replica in self.replicas
+        }
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    retry_seconds=settings.REPLICA_RETRY_SECONDS,
+    check_interval=settings.REPLICA_HEALTH_CHECK_SECONDS,
+)
@@ -1,14 +1,22 @@
 ### `main.py`
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
+from core.auth_cache import admin_auth_cache
 from core.config import settings
-from db.database import engine
-from db.init_db import init_db
-from models import Base
-from routers import auth, admin, posts, health
+from core.security import PasswordHasherBusy, password_hasher
+from db.database import dispose_engine
+from db.replicas import replica_router
+from db.init_db import migrate
+from routers import auth, admin, posts, health, metrics, debug
+from utils.compression import CompressionMiddleware
+from utils.images import image_processor
+from utils.metrics import MetricsMiddleware
+from utils.query_profiler import QueryProfilerMiddleware
+from utils.responses import ORJSONResponse
+from utils.snapshots import snapshot_publisher
 
 # Configure logging
 logging.basicConfig(
@@ -19,13 +27,26 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup does no database work: the schema and admin user come from
+    # `manage.py migrate`, and the engine connects on the first request
     logger.info("Starting up...")
-    Base.metadata.create_all(bind=engine)
-    init_db()
+    if settings.WEB_CONCURRENCY > 1 and admin_auth_cache.shared is None:
+        # A logout would only revoke the token in the worker that handled it
+        raise RuntimeError("Running several workers requires CACHE_BACKEND=redis, which shares token revocations")
+    if settings.AUTO_MIGRATE:
+        await migrate()
+    replica_router.start()
+    if settings.SNAPSHOTS_ENABLED:
+        snapshot_publisher.start()
     yield
     # Shutdown
     logger.info("Shutting down...")
+    # Publishes pending snapshot changes, so it runs before the engine goes
+    await snapshot_publisher.close()
+    password_hasher.shutdown()
+    image_processor.shutdown()
+    await replica_router.close()
+    await dispose_engine()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -33,9 +54,17 @@ app = FastAPI(
     version=settings.APP_VERSION,
     docs_url=settings.DOCS_URL,
     redoc_url=settings.REDOC_URL,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Compress responses the cache has not already compressed
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    levels=settings.COMPRESSION_LEVELS,
+)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -45,12 +74,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.SQL_PROFILING:
+    app.add_middleware(QueryProfilerMiddleware)
+
+# Outermost, so latency covers compression and CORS handling too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return ORJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many login attempts in progress, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
 # Include routers
 api_prefix = settings.API_PREFIX or ""
 app.include_router(health.router, prefix=f"{api_prefix}/health", tags=["health"])
 app.include_router(auth.router, prefix=f"{api_prefix}/auth", tags=["auth"])
 app.include_router(admin.router, prefix=f"{api_prefix}/admin", tags=["admin"])
 app.include_router(posts.router, prefix=f"{api_prefix}/posts", tags=["posts"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+if settings.SQL_PROFILING:
+    app.include_router(debug.router, prefix=f"{api_prefix}/debug", tags=["debug"])
 
 @app.get("/")
 async def root():
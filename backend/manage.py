@@ -0,0 +1,204 @@
+"""Management commands.
+
+Usage:
+    python manage.py migrate
+    python manage.py rebuild-search-index
+    python manage.py generate-image-variants [--force] [--concurrency N]
+    python manage.py render-markdown [--force] [--batch-size N]
+    python manage.py export-posts [--output FILE] [--gzip] [--status S] [--type T] [--exclude-deleted]
+    python manage.py import-posts FILE [--chunk-size N]
+    python manage.py publish-snapshots
+
+With SNAPSHOTS_ENABLED, commands that change posts publish the affected
+snapshots before they exit, as the API does after admin writes.
+"""
+import argparse
+import asyncio
+import gzip
+import logging
+import sys
+
+from sqlalchemy import select
+
+from core.config import settings
+from db.database import SessionLocal, WriteSessionLocal, dispose_engine, get_engine
+from db.init_db import migrate as migrate_database
+from models.post import Post, PostStatus, PostType
+from utils.cache import post_state, response_cache
+from utils.images import attach_cover_variants, image_processor
+from utils.markdown import apply_rendered_content
+from utils.post_transfer import IMPORT_CHUNK_SIZE, PostImporter, export_posts as stream_posts, ndjson_lines
+from utils.search import get_search_backend
+from utils.snapshots import snapshot_publisher
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate(args: argparse.Namespace) -> int:
+    """Upgrade the schema to the head revision, then create the admin user."""
+    await migrate_database()
+    print("Database is up to date")
+    return 0
+
+
+async def rebuild_search_index(args: argparse.Namespace) -> int:
+    """Recreate the full-text index for every post."""
+    backend = get_search_backend()
+    if backend.name == "memory":
+        print("The in-process search index is built by each API worker on first search; nothing to do.")
+        return 0
+    await backend.ensure_schema(get_engine())
+    async with WriteSessionLocal() as db:
+        count = await backend.rebuild(db)
+        await db.commit()
+    print(f"Rebuilt '{backend.name}' search index for {count} posts")
+    return 0
+
+
+async def generate_image_variants(args: argparse.Namespace) -> int:
+    """Generate responsive variants for existing cover images."""
+    if not image_processor.enabled:
+        print("Image variants are disabled or Pillow lacks a requested format; nothing to do.")
+        return 1
+    query = select(Post.id, Post.cover_image_url).where(Post.cover_image_url.is_not(None))
+    if not args.force:
+        query = query.where(Post.cover_image_variants.is_(None))
+    async with SessionLocal() as db:
+        covers = [(row.id, row.cover_image_url) for row in await db.execute(query)
+                  if image_processor.owns(row.cover_image_url)]
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def process(post_id: str, cover_url: str) -> bool:
+        async with semaphore:
+            return await attach_cover_variants(post_id, cover_url)
+
+    try:
+        results = await asyncio.gather(*(process(post_id, url) for post_id, url in covers))
+    finally:
+        image_processor.shutdown()
+    print(f"Generated image variants for {sum(results)} of {len(covers)} posts")
+    return 0 if all(results) else 1
+
+
+async def render_markdown(args: argparse.Namespace) -> int:
+    """Re-render stored HTML for posts whose Markdown or renderer changed."""
+    async with WriteSessionLocal() as db:
+        ids = list(await db.scalars(select(Post.id).order_by(Post.id)))
+        changes = {}
+        for start in range(0, len(ids), args.batch_size):
+            posts = await db.scalars(select(Post).where(Post.id.in_(ids[start:start + args.batch_size])))
+            for post in posts:
+                if apply_rendered_content(post, force=args.force):
+                    changes[post.id] = [post_state(post)]
+            await db.commit()
+            # Rendered posts are not needed once committed
+            db.expunge_all()
+    await response_cache.invalidate_posts(changes)
+    print(f"Rendered Markdown for {len(changes)} of {len(ids)} posts")
+    return 0
+
+
+async def export_posts(args: argparse.Namespace) -> int:
+    """Write posts as NDJSON to a file or stdout."""
+    target = open(args.output, "wb") if args.output != "-" else sys.stdout.buffer
+    output = gzip.GzipFile(fileobj=target, mode="wb") if args.gzip else target
+    count = 0
+    try:
+        async for chunk in stream_posts(
+            status=args.status, post_type=args.type, include_deleted=not args.exclude_deleted
+        ):
+            output.write(chunk)
+            count += chunk.count(b"\n")
+    finally:
+        if args.gzip:
+            output.close()
+        if target is not sys.stdout.buffer:
+            target.close()
+    print(f"Exported {count} posts", file=sys.stderr)
+    return 0
+
+
+async def import_posts(args: argparse.Namespace) -> int:
+    """Import posts from an NDJSON file, plain or gzipped."""
+    async def read_chunks():
+        with (open(args.file, "rb") if args.file != "-" else sys.stdin.buffer) as f:
+            while chunk := f.read(1024 * 1024):
+                yield chunk
+
+    await get_search_backend().ensure_schema(get_engine())
+    async with WriteSessionLocal() as db:
+        result = await PostImporter(db, args.chunk_size).run(ndjson_lines(read_chunks()))
+    for error in result.errors:
+        print(f"line {error.line}: {error.error}", file=sys.stderr)
+    print(f"Imported {result.imported} posts, skipped {result.skipped} existing, {result.failed} failed")
+    return 0 if result.completed and not result.failed else 1
+
+
+async def publish_snapshots(args: argparse.Namespace) -> int:
+    """Publish every snapshot document, e.g. after enabling snapshots or changing SNAPSHOT_PAGES."""
+    result = await snapshot_publisher.publish_all()
+    print(
+        f"Published {result['listings']} lists and {result['posts']} posts: "
+        f"{result['written']} documents written, {result['deleted']} deleted"
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Recipe Tech Backend management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_command = commands.add_parser("migrate", help="Apply migrations and create the admin user (run on deploy)")
+    migrate_command.set_defaults(handler=migrate)
+
+    rebuild = commands.add_parser("rebuild-search-index", help="Rebuild the full-text search index")
+    rebuild.set_defaults(handler=rebuild_search_index)
+
+    variants = commands.add_parser("generate-image-variants", help="Backfill resized cover image variants")
+    variants.add_argument("--force", action="store_true", help="Regenerate posts that already have variants")
+    variants.add_argument("--concurrency", type=int, default=4, help="Covers processed at once")
+    variants.set_defaults(handler=generate_image_variants)
+
+    render = commands.add_parser("render-markdown", help="Re-render stored Markdown HTML after renderer changes")
+    render.add_argument("--force", action="store_true", help="Re-render posts whose content hash is current")
+    render.add_argument("--batch-size", type=int, default=200, help="Posts loaded and committed at once")
+    render.set_defaults(handler=render_markdown)
+
+    export = commands.add_parser("export-posts", help="Export posts, drafts and deleted ones included, as NDJSON")
+    export.add_argument("--output", default="-", help="File to write (default: stdout)")
+    export.add_argument("--gzip", action="store_true", help="Gzip the output")
+    export.add_argument("--status", choices=[s.value for s in PostStatus], help="Only posts with this status")
+    export.add_argument("--type", choices=[t.value for t in PostType], help="Only posts of this type")
+    export.add_argument("--exclude-deleted", action="store_true", help="Leave out soft-deleted posts")
+    export.set_defaults(handler=export_posts)
+
+    load = commands.add_parser("import-posts", help="Import posts from an NDJSON export")
+    load.add_argument("file", help="NDJSON file, plain or gzipped ('-' for stdin)")
+    load.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Posts inserted and committed at once")
+    load.set_defaults(handler=import_posts)
+
+    publish = commands.add_parser("publish-snapshots", help="Publish all listing and post snapshots")
+    publish.set_defaults(handler=publish_snapshots)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = build_parser().parse_args(argv)
+    return asyncio.run(_run(args))
+
+
+async def _run(args: argparse.Namespace) -> int:
+    if settings.SNAPSHOTS_ENABLED:
+        snapshot_publisher.start()
+    try:
+        return await args.handler(args)
+    finally:
+        await snapshot_publisher.close()
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
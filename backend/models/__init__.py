@@ -2,5 +2,6 @@
 from db.database import Base
 from models.admin_user import AdminUser
 from models.post import Post
+from models.post_tag import PostTag
 
-__all__ = ["Base", "AdminUser", "Post"]
\ No newline at end of file
+__all__ = ["Base", "AdminUser", "Post", "PostTag"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, event, inspect
 from sqlalchemy.sql import func
 from db.database import Base
 
@@ -8,5 +8,15 @@ class AdminUser(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
+    # Carried in tokens and raised on every password change, which revokes
+    # the tokens issued before it. Bump it when changing a password in SQL.
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+@event.listens_for(AdminUser, "before_update")
+def _bump_token_version(mapper, connection, target: AdminUser) -> None:
+    # The rehash on login writes the column with a Core UPDATE, since the
+    # password itself is unchanged and sessions should survive it
+    if inspect(target).attrs.password_hash.history.has_changes():
+        target.token_version = (target.token_version or 0) + 1
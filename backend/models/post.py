@@ -1,6 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Text, DateTime, Boolean, Enum, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, DateTime, Boolean, Enum, Integer, JSON, Index, column
 from sqlalchemy.sql import func
 import enum
 from db.database import Base
@@ -13,6 +12,20 @@ class PostStatus(str, enum.Enum):
     draft = "draft"
     published = "published"
 
+def _listing_indexes(name: str, *leading: str):
+    """One listing index, declared for each dialect.
+
+    The listing reads the index backwards for `published_at DESC NULLS
+    LAST`, so NULLs must sort first in it. SQLite already sorts them first
+    and cannot declare it; Postgres sorts them last unless told.
+    """
+    columns = (*leading, "status", "deleted", "pinned")
+    trailing = ("id", "updated_at", "created_at")
+    return (
+        Index(name, *columns, "published_at", *trailing).ddl_if(dialect="sqlite"),
+        Index(name, *columns, column("published_at").nulls_first(), *trailing).ddl_if(dialect="postgresql"),
+    )
+
 class Post(Base):
     __tablename__ = "posts"
     
@@ -21,13 +34,29 @@ class Post(Base):
     title = Column(String, nullable=False)
     summary = Column(Text)
     content_md = Column(Text)
+    # Rendered from content_md on write; content_hash covers the source and renderer version
+    content_html = Column(Text, nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    content_toc = Column(JSON, nullable=True)
+    reading_time_minutes = Column(Integer, nullable=True)
     type = Column(Enum(PostType), nullable=False)
     status = Column(Enum(PostStatus), default=PostStatus.draft)
     tags = Column(JSON, default=list)
     cover_image_url = Column(String, nullable=True)
+    # [{"url", "width", "height", "format"}, ...] generated from the cover
+    cover_image_variants = Column(JSON(none_as_null=True), nullable=True)
     external_links = Column(JSON, default=list)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     published_at = Column(DateTime(timezone=True), nullable=True)
     deleted = Column(Boolean, default=False)
-    pinned = Column(Boolean, default=False, nullable=False)
\ No newline at end of file
+    pinned = Column(Boolean, default=False, nullable=False)
+
+    # The public listing filters on status and deleted and sorts by
+    # (pinned, published_at, id), so an index scan returns pages already
+    # in order. The trailing timestamps make it covering for the narrow
+    # page query; the type-prefixed variant serves ?type= listings.
+    __table_args__ = (
+        *_listing_indexes("ix_posts_listing"),
+        *_listing_indexes("ix_posts_type_listing", "type"),
+    )
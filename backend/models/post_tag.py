@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, ForeignKey, Index
+from db.database import Base
+
+class PostTag(Base):
+    """Normalized tag index; `Post.tags` stays the source of the tag list."""
+    __tablename__ = "post_tags"
+    
+    post_id = Column(String, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_post_tags_tag_post_id", "tag", "post_id"),
+    )
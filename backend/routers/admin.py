@@ -1,32 +1,47 @@
+import re
 from datetime import datetime, timezone
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from core.dependencies import get_db, get_current_admin
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
+from core.dependencies import get_current_admin, get_write_db, read_your_writes
 from models.admin_user import AdminUser
-from models.post import Post, PostStatus
-from schemas.post import PostCreate, PostUpdate, PostResponse
-from utils.slug import generate_unique_slug
+from models.post import Post, PostStatus, PostType
+from schemas.post import BatchRequest, BatchResponse, ImportResponse, PostCreate, PostUpdate, PostResponse
+from schemas.upload import PresignRequest, PresignResponse, UploadComplete, UploadResult
+from utils.slug import assign_unique_slug
 from utils.s3 import s3_service
+from utils.markdown import apply_rendered_content
+from utils.images import attach_cover_variants, image_processor
+from utils.uploads import EXTENSIONS, UploadRejected, UploadTooLarge, image_chunks, multipart_file
+from utils.search import get_search_backend
+from utils.tags import delete_post_tags, sync_post_tags
+from utils.batch import PostBatch
+from utils.post_transfer import IMPORT_CHUNK_SIZE, PostImporter, export_posts, ndjson_lines
+from utils.responses import ORJSONResponse
+from utils.cache import response_cache, post_state
 
-router = APIRouter()
+# Writes here go to the primary; the dependency keeps the admin's public reads there too
+router = APIRouter(dependencies=[Depends(read_your_writes)])
+
+# Keys handed out by S3Service.new_key; anything else is not ours to attach
+_UPLOAD_KEY_RE = re.compile(r"posts/[0-9a-f-]{36}\.(jpg|png|gif|webp)")
 
 @router.post("/posts", response_model=PostResponse)
 async def create_post(
     post_data: PostCreate,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_write_db),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    # Generate unique slug
-    slug = generate_unique_slug(post_data.title, db)
-    
     # Set published_at if status is published
     published_at = None
     if post_data.status == PostStatus.published:
         published_at = datetime.now(timezone.utc)
     
     db_post = Post(
-        slug=slug,
         title=post_data.title,
         summary=post_data.summary,
         content_md=post_data.content_md,
@@ -37,21 +52,81 @@ async def create_post(
         external_links=post_data.external_links or [],
         published_at=published_at
     )
+    apply_rendered_content(db_post)
     
-    db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    # Slug is picked and flushed together, retrying if a concurrent insert wins it
+    await assign_unique_slug(db, db_post, post_data.title)
+    await sync_post_tags(db, db_post)
+    await get_search_backend().index_post(db, db_post)
+    await db.commit()
+    await db.refresh(db_post)
+    await response_cache.invalidate_post(db_post.id, post_state(db_post))
+    if db_post.cover_image_url:
+        background_tasks.add_task(attach_cover_variants, db_post.id, db_post.cover_image_url)
     
     return db_post
 
+@router.post("/posts/batch", response_model=BatchResponse)
+async def batch_posts(
+    batch: BatchRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_write_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Apply create/update/delete/pin/unpin operations in one transaction and
+    report a result per operation. In atomic mode a single failing item
+    rolls back the batch and the response is a 400.
+    """
+    outcome = await PostBatch(db, batch.operations).run(batch.mode)
+    if not outcome.response.committed:
+        return ORJSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=outcome.response)
+    for post_id, cover_url in outcome.new_covers:
+        background_tasks.add_task(attach_cover_variants, post_id, cover_url)
+    return outcome.response
+
+@router.get("/posts/export")
+async def export_posts_ndjson(
+    status: Optional[PostStatus] = None,
+    type: Optional[PostType] = None,
+    include_deleted: bool = True,
+    gzip: bool = False,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Stream every post, drafts and soft-deleted ones included, as NDJSON
+    (one JSON object per line), gzipped as a file with `gzip=true`.
+    """
+    filename = "posts.ndjson.gz" if gzip else "posts.ndjson"
+    return StreamingResponse(
+        export_posts(status=status, post_type=type, include_deleted=include_deleted, compress=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.post("/posts/import", response_model=ImportResponse)
+async def import_posts_ndjson(
+    request: Request,
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=5000),
+    db: AsyncSession = Depends(get_write_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Import posts from an NDJSON body, plain or gzipped, such as an export.
+    Lines whose id already exists are skipped; invalid lines are reported.
+    The body is read as it arrives and committed `chunk_size` posts at a time.
+    """
+    return await PostImporter(db, chunk_size).run(ndjson_lines(request.stream()))
+
 @router.put("/posts/{post_id}", response_model=PostResponse)
 async def update_post(
     post_id: str,
     post_data: PostUpdate,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_write_db),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    db_post = db.query(Post).filter(Post.id == post_id).first()
+    db_post = (await db.execute(select(Post).where(Post.id == post_id))).scalar_one_or_none()
     
     if not db_post:
         raise HTTPException(
@@ -59,12 +134,16 @@ async def update_post(
             detail="Post not found"
         )
     
+    previous_state = post_state(db_post)
+
     # Update fields if provided
     update_data = post_data.model_dump(exclude_unset=True)
     
-    # Handle slug update if title changed
-    if "title" in update_data and update_data["title"] != db_post.title:
-        update_data["slug"] = generate_unique_slug(update_data["title"], db, exclude_id=post_id)
+    title_changed = "title" in update_data and update_data["title"] != db_post.title
+    cover_changed = "cover_image_url" in update_data and update_data["cover_image_url"] != db_post.cover_image_url
+    if cover_changed:
+        # Old variants belong to the old image; new ones are generated after the response
+        update_data["cover_image_variants"] = None
     
     # Handle published_at
     if "status" in update_data:
@@ -75,21 +154,33 @@ async def update_post(
     
     for key, value in update_data.items():
         setattr(db_post, key, value)
+    # Only re-renders when content_md (or the renderer) changed
+    apply_rendered_content(db_post)
+    if "tags" in update_data:
+        await sync_post_tags(db, db_post)
     
     db_post.updated_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(db_post)
+    await db.flush()
+    # Handle slug update if title changed
+    if title_changed:
+        await assign_unique_slug(db, db_post, db_post.title, exclude_id=post_id)
+    await get_search_backend().index_post(db, db_post)
+    await db.commit()
+    await db.refresh(db_post)
+    await response_cache.invalidate_post(db_post.id, previous_state, post_state(db_post))
+    if cover_changed and db_post.cover_image_url:
+        background_tasks.add_task(attach_cover_variants, db_post.id, db_post.cover_image_url)
     
     return db_post
 
 @router.delete("/posts/{post_id}")
 async def delete_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_admin: AdminUser = Depends(get_current_admin),
     soft_delete: bool = True
 ):
-    db_post = db.query(Post).filter(Post.id == post_id).first()
+    db_post = (await db.execute(select(Post).where(Post.id == post_id))).scalar_one_or_none()
     
     if not db_post:
         raise HTTPException(
@@ -97,71 +188,162 @@ async def delete_post(
             detail="Post not found"
         )
     
+    previous_state = post_state(db_post)
+    await get_search_backend().remove_post(db, post_id)
+
     if soft_delete:
         db_post.deleted = True
         db_post.updated_at = datetime.now(timezone.utc)
-        db.commit()
+        await db.commit()
+        await response_cache.invalidate_post(post_id, previous_state)
         return {"message": "Post soft deleted successfully"}
     else:
-        db.delete(db_post)
-        db.commit()
+        await delete_post_tags(db, post_id)
+        await db.delete(db_post)
+        await db.commit()
+        await response_cache.invalidate_post(post_id, previous_state)
         return {"message": "Post permanently deleted successfully"}
     
-@router.post("/upload-image")
+@router.post("/upload-image", openapi_extra={
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "properties": {"file": {"type": "string", "format": "binary"}},
+            "required": ["file"],
+        }}},
+    },
+})
 async def upload_image(
-    file: UploadFile = File(...),
+    request: Request,
+    background_tasks: BackgroundTasks,
     current_admin = Depends(get_current_admin)
 ):
     """
     Upload an image to S3 and return the URL
     """
-    # Validate file type
-    allowed_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(status_code=400, detail="Invalid file type")
-    
-    # Validate file size (15MB limit)
-    contents = await file.read()
-    if len(contents) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File too large (max 15MB)")
-    
-    # Upload to S3
-    url = s3_service.upload_file(
-        file_content=contents,
-        file_name=file.filename,
-        content_type=file.content_type
-    )
+    # The form is parsed from the request stream rather than through
+    # UploadFile, which would spool the whole body first. The type is sniffed
+    # from the file's magic bytes and the size is checked per chunk, so an
+    # oversized upload is cut off once it passes the limit.
+    max_bytes = settings.MAX_IMAGE_UPLOAD_BYTES
+    try:
+        file = multipart_file(request.headers, request.stream(), "file", max_bytes)
+        content_type, chunks = await image_chunks(file, max_bytes)
+        url = await s3_service.upload_stream(chunks, content_type, EXTENSIONS[content_type])
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     if not url:
         raise HTTPException(status_code=500, detail="Failed to upload image")
     
+    # Start on the variants now; attaching the image to a post reuses the result
+    background_tasks.add_task(image_processor.variants_for, url)
     return {"url": url}
 
 
+@router.post("/uploads/presign", response_model=PresignResponse)
+async def presign_upload(
+    presign: PresignRequest,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Sign a short-lived direct upload to S3, limited to one image type and
+    MAX_IMAGE_UPLOAD_BYTES. Call /uploads/complete once the upload is done.
+    """
+    if presign.content_type not in EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Invalid file type")
+    try:
+        presigned = s3_service.presign_upload(
+            content_type=presign.content_type,
+            file_extension=EXTENSIONS[presign.content_type],
+            max_bytes=settings.MAX_IMAGE_UPLOAD_BYTES,
+            method=presign.method,
+            size=presign.size
+        )
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return PresignResponse(
+        **presigned,
+        expires_in=settings.S3_PRESIGN_EXPIRES_SECONDS,
+        max_bytes=settings.MAX_IMAGE_UPLOAD_BYTES
+    )
+
+@router.post("/uploads/complete", response_model=UploadResult)
+async def complete_upload(
+    upload: UploadComplete,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_write_db),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Verify a presigned upload (size, type, magic bytes) and optionally set it
+    as a post's cover image
+    """
+    if not _UPLOAD_KEY_RE.fullmatch(upload.key):
+        raise HTTPException(status_code=400, detail="Invalid upload key")
+
+    # Verified before the post is read, so the write transaction does not
+    # span the S3 requests
+    try:
+        verified = await s3_service.verify_upload(upload.key, settings.MAX_IMAGE_UPLOAD_BYTES, EXTENSIONS)
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    post = None
+    if upload.post_id:
+        post = (await db.execute(select(Post).where(Post.id == upload.post_id))).scalar_one_or_none()
+        if not post:
+            raise HTTPException(status_code=404, detail="Post not found")
+
+    if post is None:
+        background_tasks.add_task(image_processor.variants_for, verified["url"])
+    elif post.cover_image_url != verified["url"]:
+        post.cover_image_url = verified["url"]
+        post.cover_image_variants = None
+        post.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+        await response_cache.invalidate_post(post.id, post_state(post))
+        background_tasks.add_task(attach_cover_variants, post.id, post.cover_image_url)
+
+    return UploadResult(**verified, post_id=upload.post_id)
+
 @router.post("/posts/{post_id}/pin", response_model=PostResponse)
 async def pin_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    post = db.query(Post).filter(Post.id == post_id, Post.deleted == False).first()
+    post = (await db.execute(
+        select(Post).where(Post.id == post_id, Post.deleted == False)
+    )).scalar_one_or_none()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     post.pinned = True
-    db.commit()
-    db.refresh(post)
+    # The ETag and Last-Modified of the post derive from updated_at
+    post.updated_at = datetime.now(timezone.utc)
+    await db.commit()
+    await db.refresh(post)
+    await response_cache.invalidate_post(post.id, post_state(post))
     return post
 
 @router.post("/posts/{post_id}/unpin", response_model=PostResponse)
 async def unpin_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    post = db.query(Post).filter(Post.id == post_id, Post.deleted == False).first()
+    post = (await db.execute(
+        select(Post).where(Post.id == post_id, Post.deleted == False)
+    )).scalar_one_or_none()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     post.pinned = False
-    db.commit()
-    db.refresh(post)
+    # The ETag and Last-Modified of the post derive from updated_at
+    post.updated_at = datetime.now(timezone.utc)
+    await db.commit()
+    await db.refresh(post)
+    await response_cache.invalidate_post(post.id, post_state(post))
     return post
\ No newline at end of file
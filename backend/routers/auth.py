@@ -1,10 +1,14 @@
 from datetime import timedelta
+from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from core.config import settings
-from core.dependencies import get_db
-from core.security import verify_password, create_access_token
+from core.auth_cache import admin_auth_cache
+from core.dependencies import get_db, oauth2_scheme
+from core.security import create_access_token, password_hasher
+from db.database import WriteSessionLocal
 from models.admin_user import AdminUser
 from schemas.auth import Token
 
@@ -13,27 +17,54 @@ router = APIRouter()
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    user = db.query(AdminUser).filter(
-        AdminUser.username == form_data.username
-    ).first()
+    result = await db.execute(
+        select(AdminUser).where(AdminUser.username == form_data.username)
+    )
+    user = result.scalar_one_or_none()
+    # Hand the connection back before hashing; the loaded user stays usable
+    await db.close()
     
-    if not user or not verify_password(form_data.password, user.password_hash):
+    # bcrypt runs off the event loop; a saturated pool surfaces as a 503
+    verified, new_hash = (
+        await password_hasher.verify_and_update(form_data.password, user.password_hash)
+        if user else (False, None)
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS; upgrade it transparently.
+        # A Core UPDATE leaves token_version alone: the password is the same,
+        # so the admin's other sessions stay valid. Only this UPDATE takes
+        # the write lock, not the hashing before it.
+        async with WriteSessionLocal() as write_db:
+            await write_db.execute(update(AdminUser).where(AdminUser.id == user.id).values(password_hash=new_hash))
+            await write_db.commit()
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    identity = admin_auth_cache.remember_admin(user)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "ver": identity.token_version},
+        expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/logout")
-async def logout():
-    # For JWT, logout is typically handled client-side
+async def logout(token: Annotated[str, Depends(oauth2_scheme)]):
+    claims = admin_auth_cache.decode(token)
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # The token stays rejected until it would have expired
+    await admin_auth_cache.revoke(claims)
     return {"message": "Successfully logged out"}
\ No newline at end of file
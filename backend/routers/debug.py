@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from models.admin_user import AdminUser
+from core.dependencies import get_current_admin
+from utils.query_profiler import recent_profiles
+
+router = APIRouter()
+
+@router.get("/queries/{profile_id}")
+async def query_timeline(
+    profile_id: str,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    SQL timeline of a recent request, by the id in its X-Query-Profile
+    response header. Only available with SQL_PROFILING enabled.
+    """
+    profile = recent_profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found or expired"
+        )
+    return profile.as_dict()
@@ -1,25 +1,36 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from core.dependencies import get_db
+from core.dependencies import get_current_admin, get_db
+from db.replicas import replica_router
+from models.admin_user import AdminUser
+from utils.cache import response_cache
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.get("/healthz")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_db)):
     try:
         # Check database connection
-        db.execute(text("SELECT 1"))
-        return {
+        await db.execute(text("SELECT 1"))
+        result = {
             "status": "healthy",
             "database": "connected"
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return {
+        result = {
             "status": "unhealthy",
             "database": "disconnected",
             "error": str(e)
-        }
\ No newline at end of file
+        }
+    if replica_router.enabled:
+        # From the background health checks; no replica is queried here
+        result["replicas"] = replica_router.status()
+    return result
+
+@router.get("/cache")
+async def cache_stats(current_admin: AdminUser = Depends(get_current_admin)):
+    return response_cache.stats()
@@ -0,0 +1,18 @@
+import hmac
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from core.config import settings
+from utils.metrics import CONTENT_TYPE, registry
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied, settings.METRICS_TOKEN):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
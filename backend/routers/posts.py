@@ -1,78 +1,265 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc, asc
-from core.dependencies import get_db
-from models.post import Post, PostStatus, PostType
-from schemas.post import PostResponse, PostList
+import uuid
+from typing import Any, List, NamedTuple, Optional, Set, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import Select, select, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
+from core.dependencies import from_replica, get_read_db
+from models.post import Post, PostType
+from schemas.post import SUMMARY_FIELD_COLUMNS, PostHtmlResponse, PostList, PostResponse, summary_data
 from schemas.common import PaginationParams
 from models.admin_user import AdminUser
 from core.dependencies import get_current_admin
+from utils.search import get_search_backend
+from utils.cache import response_cache
+from utils.markdown import apply_rendered_content
+from utils.http_cache import (
+    CachedResponse, as_utc, conditional_response, is_not_modified, make_etag, not_modified_response
+)
+from utils.pagination import LISTING_ORDER, VISIBLE, encode_cursor, keyset_filter, listing_query
+from utils.responses import dumps
 
 router = APIRouter()
 
+
+class _Page(NamedTuple):
+    rows: List[Any]
+    total: Optional[int]
+    page: Optional[int]
+    page_size: int
+    next_cursor: Optional[str] = None
+    has_more: Optional[bool] = None
+
+def _version(row) -> str:
+    return f"{row.id}@{as_utc(row.updated_at or row.created_at)}"
+
 @router.get("", response_model=PostList)
 async def list_posts(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     type: Optional[PostType] = None,
     tag: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    tag_match: str = Query("all", pattern="^(all|any)$"),
     q: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    sort: str = Query("newest", regex="^(newest|oldest|title)$")
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    fields: Optional[str] = Query(None, description="Comma-separated PostSummary fields to return")
 ):
-    # Base query - only published and not deleted posts
-    query = db.query(Post).filter(
-        Post.status == PostStatus.published,
-        Post.deleted == False
+    """
+    List published posts as summaries; the Markdown body is never loaded.
+    Pinned posts come first, then the newest by published_at; a search
+    ranks by relevance instead. `fields=title,slug,cover_image` returns
+    only those fields (plus id).
+    """
+    field_set = _parse_fields(fields)
+    cursor_mode = pagination == "cursor" or cursor is not None
+    if cursor_mode and q:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor pagination is not supported for search queries"
+        )
+    tag_list = ([tag] if tag else []) + (tags or [])
+    type_key = type.value if type else None
+
+    cache_key = await response_cache.list_key("list", type_key, {
+        "tags": sorted(tag_list), "tag_match": tag_match, "q": q, "page": page,
+        "page_size": page_size, "cursor_mode": cursor_mode,
+        "cursor": cursor, "include_total": include_total,
+        "fields": sorted(field_set) if field_set else None,
+    })
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, CachedResponse.unpack(cached))
+
+    query = listing_query(type, tag_list, tag_match)
+    search = get_search_backend() if q else None
+    if cursor_mode:
+        count_key = await response_cache.list_key("count", type_key, {
+            "tags": sorted(tag_list), "tag_match": tag_match,
+        })
+        result = await _page_by_cursor(db, query, cursor, page_size, include_total, count_key)
+    else:
+        result = await _page_by_offset(db, query, search, q, page, page_size, include_total)
+
+    # The version stamp covers the page rows and the total, so a 304 can be
+    # answered before the full rows are loaded and serialized
+    etag = make_etag(result.total, result.next_cursor, *(_version(row) for row in result.rows))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    # Late row lookup: only the rows of this page load, and only the
+    # columns the summary needs. Rows are serialized as they come, without
+    # building ORM objects or validating models.
+    columns = {column for name in (field_set or SUMMARY_FIELD_COLUMNS) for column in SUMMARY_FIELD_COLUMNS[name]}
+    if search:
+        columns.update(search.snippet_columns)
+    loaded = await db.execute(
+        select(*(getattr(Post, column) for column in sorted(columns)))
+        .where(Post.id.in_([row.id for row in result.rows]))
     )
-    # Apply filters
-    if type:
-        query = query.filter(Post.type == type)
-    if tag:
-        query = query.filter(Post.tags.contains(f'"{tag}"'))
-    if q:
-        search_term = f"%{q}%"
-        query = query.filter(
-            or_(
-                Post.title.ilike(search_term),
-                Post.summary.ilike(search_term),
-                Post.content_md.ilike(search_term)
-            )
+    loaded = {post.id: post for post in loaded}
+    posts = []
+    for row in result.rows:
+        post = summary_data(loaded[row.id], field_set)
+        if search:
+            post["snippet"] = search.snippet_for(loaded[row.id], q, row.snippet)
+        posts.append(post)
+
+    body = dumps({
+        "posts": posts,
+        "total": result.total,
+        "page": result.page,
+        "page_size": result.page_size,
+        "total_pages": (result.total + page_size - 1) // page_size if result.total is not None else None,
+        "next_cursor": result.next_cursor,
+        "has_more": result.has_more,
+    })
+    entry = await response_cache.set_response(cache_key, CachedResponse(body=body, etag=etag), from_replica(db))
+    return conditional_response(request, entry)
+
+def lookup_queries(id_or_slug: str, *columns) -> List[Select]:
+    """Queries for a published post by id and by slug, the likelier match first.
+
+    Each is a plain equality on one unique index; a single `id = x OR
+    slug = x` query is not reliably planned as two index lookups.
+    UUID-shaped values are tried as ids first, anything else as a slug
+    (imported posts may carry ids of any shape, so both are always tried).
+    """
+    try:
+        uuid.UUID(id_or_slug)
+        keys = (Post.id, Post.slug)
+    except ValueError:
+        keys = (Post.slug, Post.id)
+    return [select(*columns).where(key == id_or_slug, *VISIBLE).limit(1) for key in keys]
+
+async def _find_published(db: AsyncSession, id_or_slug: str, *columns):
+    for query in lookup_queries(id_or_slug, *columns):
+        row = (await db.execute(query)).first()
+        if row is not None:
+            return row
+    return None
+
+def _parse_fields(fields: Optional[str]) -> Optional[Set[str]]:
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(SUMMARY_FIELD_COLUMNS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
         )
-    # Apply sorting (pinned first)
-    query = query.order_by(desc(Post.pinned), desc(Post.published_at))
-    # Get total count
-    total = query.count()
+    return requested | {"id"}
+
+async def _count(db: AsyncSession, query: Select) -> int:
+    return await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+async def _page_by_offset(db: AsyncSession, query: Select, search, q: Optional[str], page: int, page_size: int, include_total: bool) -> _Page:
+    if search:
+        match = await search.apply(db, query, q)
+        query = match.stmt
+    # Get total count; unknown when the search kept only its best matches
+    total = await _count(db, query) if include_total and (not search or match.complete) else None
+    # Apply sorting (best match first when searching, otherwise pinned first)
+    if search:
+        query = query.add_columns(match.snippet.label("snippet")).order_by(desc(match.rank), desc(Post.published_at).nulls_last())
+    else:
+        query = query.order_by(*LISTING_ORDER)
     # Apply pagination
     offset = (page - 1) * page_size
-    posts = query.offset(offset).limit(page_size).all()
-    return PostList(
-        posts=posts,
+    rows = (await db.execute(query.offset(offset).limit(page_size))).all()
+    return _Page(rows=rows, total=total, page=page, page_size=page_size)
+
+async def _page_by_cursor(db: AsyncSession, query: Select, cursor: Optional[str], page_size: int, include_total: bool, count_key: str) -> _Page:
+    # Counting ignores the seek position, so it is cached per filter set
+    total = None
+    if include_total:
+        cached_total = await response_cache.get(count_key)
+        if cached_total is not None:
+            total = int(cached_total)
+        else:
+            total = await _count(db, query)
+            await response_cache.set(
+                count_key, str(total).encode(), ttl=settings.LIST_COUNT_CACHE_TTL, from_replica=from_replica(db)
+            )
+
+    if cursor:
+        try:
+            query = query.where(keyset_filter(cursor))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    query = query.order_by(*LISTING_ORDER)
+    # Fetch one extra row to learn whether another page exists
+    rows = (await db.execute(query.limit(page_size + 1))).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return _Page(
+        rows=rows,
         total=total,
-        page=page,
+        page=None,
         page_size=page_size,
-        total_pages=(total + page_size - 1) // page_size
+        next_cursor=encode_cursor(rows[-1]) if has_more else None,
+        has_more=has_more
     )
 
-@router.get("/{id_or_slug}", response_model=PostResponse)
+@router.get("/{id_or_slug}", response_model=Union[PostResponse, PostHtmlResponse])
 async def get_post(
+    request: Request,
     id_or_slug: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
+    format: str = Query("json", pattern="^(json|html)$")
 ):
-    # Try to find by ID first, then by slug
-    post = db.query(Post).filter(
-        and_(
-            or_(Post.id == id_or_slug, Post.slug == id_or_slug),
-            Post.status == PostStatus.published,
-            Post.deleted == False
-        )
-    ).first()
-    
+    """
+    Get a published post by id or slug. With `format=html` the Markdown is
+    replaced by its pre-rendered, sanitized HTML, table of contents and
+    reading time.
+    """
+    cache_key = response_cache.post_key(id_or_slug, format)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, CachedResponse.unpack(cached))
+
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        # Revalidation only needs the version columns, not content_md
+        row = await _find_published(db, id_or_slug, Post.id, Post.updated_at, Post.created_at, Post.content_hash)
+        if row:
+            etag, last_modified = _post_etag(row, format), row.updated_at or row.created_at
+            if is_not_modified(request, etag, last_modified):
+                return not_modified_response(etag, last_modified)
+
+    row = await _find_published(db, id_or_slug, Post)
+    post = row[0] if row else None
+
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
-    
-    return post
\ No newline at end of file
+
+    if format == "html":
+        # Rows written before a renderer upgrade are rendered for this
+        # response only; `manage.py render-markdown` stores the new output
+        apply_rendered_content(post)
+        body = PostHtmlResponse.model_validate(post)
+    else:
+        body = PostResponse.model_validate(post)
+    entry = CachedResponse(
+        body=dumps(body),
+        etag=_post_etag(post, format),
+        last_modified=post.updated_at or post.created_at
+    )
+    entry = await response_cache.set_response(cache_key, entry, from_replica(db))
+    return conditional_response(request, entry)
+
+def _post_etag(row, format: str) -> str:
+    # Re-rendering leaves updated_at alone, so the HTML tag also covers the render
+    if format == "html":
+        return make_etag(_version(row), format, row.content_hash)
+    return make_etag(_version(row))
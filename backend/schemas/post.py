@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, Field, ConfigDict
+from typing import Annotated, Any, Dict, Iterable, List, Literal, Mapping, Optional, Set, Tuple, Union
+from pydantic import BaseModel, Field, ConfigDict, computed_field
 from models.post import PostType, PostStatus
 
 class PostBase(BaseModel):
@@ -26,6 +26,49 @@ class PostUpdate(BaseModel):
     cover_image_url: Optional[str] = None
     external_links: Optional[List[str]] = None
 
+class ImageVariant(BaseModel):
+    url: str
+    width: int
+    height: int
+    format: str
+
+class ResponsiveImage(BaseModel):
+    src: str  # the original upload, as a fallback <img src>
+    width: Optional[int] = None  # of the largest variant
+    height: Optional[int] = None
+    # "image/webp" -> "https://.../320w.webp 320w, https://.../640w.webp 640w", one <source> each
+    srcset: Dict[str, str] = {}
+    variants: List[ImageVariant] = []
+
+def responsive_image_data(
+    cover_image_url: Optional[str], cover_image_variants: Optional[Iterable[Mapping[str, Any]]]
+) -> Optional[Dict[str, Any]]:
+    """A cover's ResponsiveImage as plain data, from stored variant dicts."""
+    if not cover_image_url:
+        return None
+    variants = sorted(
+        ({"url": v["url"], "width": v["width"], "height": v["height"], "format": v["format"]}
+         for v in cover_image_variants or []),
+        key=lambda v: v["width"]
+    )
+    srcset: Dict[str, List[str]] = {}
+    for variant in variants:
+        srcset.setdefault(f"image/{variant['format']}", []).append(f"{variant['url']} {variant['width']}w")
+    largest = variants[-1] if variants else None
+    return {
+        "src": cover_image_url,
+        "width": largest["width"] if largest else None,
+        "height": largest["height"] if largest else None,
+        "srcset": {content_type: ", ".join(entries) for content_type, entries in srcset.items()},
+        "variants": variants,
+    }
+
+def responsive_image(
+    cover_image_url: Optional[str], cover_image_variants: Optional[List[ImageVariant]]
+) -> Optional[ResponsiveImage]:
+    data = responsive_image_data(cover_image_url, [v.model_dump() for v in cover_image_variants or []])
+    return ResponsiveImage.model_validate(data) if data else None
+
 class PostResponse(PostBase):
     model_config = ConfigDict(from_attributes=True)
     
@@ -36,10 +79,149 @@ class PostResponse(PostBase):
     updated_at: Optional[datetime]
     published_at: Optional[datetime]
     pinned: bool
+    snippet: Optional[str] = None  # highlighted match, only set for search results
+    cover_image_variants: Optional[List[ImageVariant]] = Field(None, exclude=True)
+
+    @computed_field
+    @property
+    def cover_image(self) -> Optional[ResponsiveImage]:
+        return responsive_image(self.cover_image_url, self.cover_image_variants)
+
+class PostSummary(BaseModel):
+    """A post as shown on list pages: everything except the body."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    slug: str
+    title: str
+    summary: Optional[str] = None
+    type: PostType
+    status: PostStatus
+    tags: Optional[List[str]] = []
+    cover_image_url: Optional[str] = None
+    external_links: Optional[List[str]] = []
+    pinned: bool
+    created_at: datetime
+    updated_at: Optional[datetime]
+    published_at: Optional[datetime]
+    reading_time_minutes: Optional[int] = None
+    snippet: Optional[str] = None  # highlighted match, only set for search results
+    cover_image_variants: Optional[List[ImageVariant]] = Field(None, exclude=True)
+
+    @computed_field
+    @property
+    def cover_image(self) -> Optional[ResponsiveImage]:
+        return responsive_image(self.cover_image_url, self.cover_image_variants)
+
+# Values accepted by `fields=` on list endpoints, and the columns each one needs
+SUMMARY_FIELD_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    **{name: (name,) for name in PostSummary.model_fields if name not in ("snippet", "cover_image_variants")},
+    "cover_image": ("cover_image_url", "cover_image_variants"),
+}
+
+def summary_data(row: Any, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """A PostSummary as plain data, read straight off a row without validation.
+
+    `row` needs the columns of the requested fields (all by default). This is
+    what list pages serialize; PostSummary documents the same shape.
+    """
+    data: Dict[str, Any] = {}
+    for name in SUMMARY_FIELD_COLUMNS:
+        if fields is not None and name not in fields:
+            continue
+        if name == "cover_image":
+            data[name] = responsive_image_data(row.cover_image_url, row.cover_image_variants)
+        else:
+            data[name] = getattr(row, name)
+    data["snippet"] = None
+    return data
+
+class TocEntry(BaseModel):
+    level: int
+    id: str  # anchor of the heading in content_html
+    text: str
+
+class PostHtmlResponse(PostResponse):
+    """A post with its Markdown rendered to sanitized HTML (`format=html`)."""
+    content_md: Optional[str] = Field(None, exclude=True)
+    content_html: Optional[str] = None
+    toc: List[TocEntry] = Field([], validation_alias="content_toc")
+    reading_time_minutes: Optional[int] = None
 
 class PostList(BaseModel):
-    posts: List[PostResponse]
-    total: int
-    page: int
+    posts: List[PostSummary]
+    total: Optional[int]  # None when include_total=false; cached in cursor mode
+    page: Optional[int]  # None in cursor mode
     page_size: int
-    total_pages: int
\ No newline at end of file
+    total_pages: Optional[int]
+    next_cursor: Optional[str] = None
+    has_more: Optional[bool] = None
+
+class BatchCreate(BaseModel):
+    op: Literal["create"]
+    data: PostCreate
+
+class BatchUpdate(BaseModel):
+    op: Literal["update"]
+    post_id: str
+    data: PostUpdate
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    post_id: str
+    soft_delete: bool = True
+
+class BatchPin(BaseModel):
+    op: Literal["pin", "unpin"]
+    post_id: str
+
+BatchOperation = Annotated[Union[BatchCreate, BatchUpdate, BatchDelete, BatchPin], Field(discriminator="op")]
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=500)
+    # atomic: any failing item rolls back the whole batch
+    # continue: failing items are reported and the rest is committed
+    mode: Literal["atomic", "continue"] = "atomic"
+
+class BatchItemResult(BaseModel):
+    index: int
+    op: str
+    status: Literal["ok", "error", "skipped"]
+    post_id: Optional[str] = None
+    slug: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    mode: str
+    committed: bool
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+class PostImport(PostBase):
+    """One line of an NDJSON import; the export writes every column, and
+    columns not listed here are ignored."""
+    id: Optional[str] = Field(None, max_length=36)
+    slug: Optional[str] = Field(None, max_length=250)
+    status: PostStatus = PostStatus.draft
+    deleted: bool = False
+    published_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    cover_image_variants: Optional[List[ImageVariant]] = None
+    # A rendering from the export, reused when it matches content_md
+    content_html: Optional[str] = None
+    content_hash: Optional[str] = None
+    content_toc: Optional[List[Dict[str, Any]]] = None
+    reading_time_minutes: Optional[int] = None
+
+class ImportLineError(BaseModel):
+    line: int
+    error: str
+
+class ImportResponse(BaseModel):
+    imported: int
+    skipped: int  # ids that already exist
+    failed: int
+    completed: bool  # False when the import stopped early
+    errors: List[ImportLineError]  # the first IMPORT_MAX_ERRORS failures
@@ -0,0 +1,28 @@
+from typing import Dict, Literal, Optional
+from pydantic import BaseModel, Field
+
+class PresignRequest(BaseModel):
+    content_type: str
+    method: Literal["post", "put"] = "post"
+    # Required for PUT, where the exact size is part of the signature
+    size: Optional[int] = Field(None, ge=1)
+
+class PresignResponse(BaseModel):
+    method: Literal["post", "put"]
+    url: str
+    key: str
+    fields: Dict[str, str] = {}  # form fields to send before the file (POST only)
+    headers: Dict[str, str] = {}  # headers to send with the PUT
+    expires_in: int
+    max_bytes: int
+
+class UploadComplete(BaseModel):
+    key: str
+    post_id: Optional[str] = None  # attach the image as this post's cover
+
+class UploadResult(BaseModel):
+    url: str
+    key: str
+    size: int
+    content_type: str
+    post_id: Optional[str] = None
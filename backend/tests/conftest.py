@@ -0,0 +1,110 @@
+"""Settings for the test run, applied before anything from the app is imported.
+
+Tests use their own SQLite files, a primary and a replica, whatever
+DATABASE_URL says: the schema is dropped and recreated. Set
+TEST_POSTGRES_URL to also run the Postgres variants against a scratch
+database.
+"""
+import os
+import shutil
+import tempfile
+
+import httpx
+import pytest
+from sqlalchemy.engine import make_url
+
+ROOT = tempfile.mkdtemp(prefix="tests-")
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(ROOT, 'primary.db')}",
+    "DATABASE_REPLICA_URLS": f"sqlite:///{os.path.join(ROOT, 'replica', 'replica.db')}",
+    "REPLICA_HEALTH_CHECK_SECONDS": "0.2",
+    "REPLICA_RETRY_SECONDS": "60",
+    "SECRET_KEY": "test-secret",
+    "ADMIN_USERNAME": "admin",
+    "ADMIN_PASSWORD": "test-password",
+    "BCRYPT_ROUNDS": "4",
+    "AWS_ACCESS_KEY_ID": "test",
+    "AWS_SECRET_ACCESS_KEY": "test",
+    "AWS_REGION": "us-east-1",
+    "S3_BUCKET_NAME": "test-bucket",
+    "CACHE_BACKEND": "none",
+    "SNAPSHOTS_ENABLED": "false",
+    "AUTO_MIGRATE": "false",
+    "WEB_CONCURRENCY": "1",
+})
+
+
+@pytest.fixture(autouse=True)
+async def fresh_pools():
+    """Close pooled connections after each test, since each test runs its own event loop."""
+    yield
+    from db.database import dispose_engine
+    from db.replicas import replica_router
+
+    await dispose_engine()
+    for replica in replica_router.replicas:
+        await replica.engine.dispose()
+
+
+@pytest.fixture
+async def fresh_primary():
+    """An empty primary database, migrated, with the admin user."""
+    from core.auth_cache import admin_auth_cache
+    from core.config import settings
+    from db.database import dispose_engine
+    from db.init_db import migrate
+
+    await dispose_engine()
+    path = make_url(settings.DATABASE_URL).database
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    admin_auth_cache.clear()
+    await migrate()
+
+
+@pytest.fixture
+async def client(fresh_primary, monkeypatch):
+    """The app on a fresh primary, with replica routing off."""
+    from db.replicas import replica_router
+    from main import app
+
+    monkeypatch.setattr(replica_router, "replicas", [])
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+
+@pytest.fixture
+async def admin_headers(client):
+    from core.config import settings
+
+    login = await client.post(f"{settings.API_PREFIX or ''}/auth/login", data={
+        "username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD,
+    })
+    login.raise_for_status()
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+@pytest.fixture
+def create_post(client, admin_headers):
+    """Create a post through the admin API and return its JSON."""
+    from core.config import settings
+
+    async def create(**fields):
+        data = {"title": "A post", "content_md": "Hello", "type": "tech", "status": "published", **fields}
+        response = await client.post(f"{settings.API_PREFIX or ''}/admin/posts", headers=admin_headers, json=data)
+        response.raise_for_status()
+        return response.json()
+
+    return create
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cleanup():
+    yield
+    from core.security import password_hasher
+
+    password_hasher.shutdown()
+    shutil.rmtree(ROOT, ignore_errors=True)
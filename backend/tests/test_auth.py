@@ -0,0 +1,73 @@
+import sqlite3
+from contextlib import closing
+
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+
+from core.config import settings
+from core.security import get_password_hash, password_hasher
+from db.database import SessionLocal
+from models.admin_user import AdminUser
+
+PREFIX = settings.API_PREFIX or ""
+
+
+async def login(client, password=None):
+    return await client.post(f"{PREFIX}/auth/login", data={
+        "username": settings.ADMIN_USERNAME, "password": password or settings.ADMIN_PASSWORD,
+    })
+
+
+async def bearer(client, password=None) -> dict:
+    response = await login(client, password)
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def accepted(client, headers) -> bool:
+    status_code = (await client.get(f"{PREFIX}/health/cache", headers=headers)).status_code
+    assert status_code in (200, 401)
+    return status_code == 200
+
+
+async def test_logout_revokes_only_that_token(client):
+    first, second = await bearer(client), await bearer(client)
+
+    assert (await client.post(f"{PREFIX}/auth/logout", headers=first)).status_code == 200
+
+    assert not await accepted(client, first)
+    assert await accepted(client, second)
+
+
+async def test_password_change_revokes_earlier_tokens(client):
+    old = await bearer(client)
+    assert await accepted(client, old)
+
+    async with SessionLocal() as db:
+        admin = (await db.execute(select(AdminUser).where(AdminUser.username == settings.ADMIN_USERNAME))).scalar_one()
+        version = admin.token_version
+        admin.password_hash = get_password_hash("new-password")
+        await db.commit()
+        assert admin.token_version == version + 1
+
+    assert not await accepted(client, old)
+    assert (await login(client)).status_code == 401
+    assert await accepted(client, await bearer(client, "new-password"))
+
+
+async def test_login_does_not_hold_the_write_lock_while_hashing(client, monkeypatch):
+    verify_and_update = password_hasher.verify_and_update
+    writers = []
+
+    async def verify_while_writing(plain, hashed):
+        # A writer on another connection must not wait for the hash
+        with closing(sqlite3.connect(make_url(settings.DATABASE_URL).database, timeout=0)) as other:
+            other.execute("BEGIN IMMEDIATE")
+            other.rollback()
+        writers.append(True)
+        return await verify_and_update(plain, hashed)
+
+    monkeypatch.setattr(password_hasher, "verify_and_update", verify_while_writing)
+
+    assert (await login(client)).status_code == 200
+    assert writers == [True]
@@ -0,0 +1,49 @@
+from core.config import settings
+
+PREFIX = settings.API_PREFIX or ""
+
+
+def operations(post_id: str) -> list:
+    return [
+        {"op": "create", "data": {"title": "Created in a batch", "content_md": "Hi", "type": "tech", "status": "published"}},
+        {"op": "pin", "post_id": post_id},
+        {"op": "update", "post_id": "missing", "data": {"summary": "Nowhere"}},
+    ]
+
+
+async def batch(client, admin_headers, post_id: str, mode: str):
+    return await client.post(f"{PREFIX}/admin/posts/batch", headers=admin_headers, json={
+        "operations": operations(post_id), "mode": mode,
+    })
+
+
+async def public_titles(client) -> list:
+    return [post["title"] for post in (await client.get(f"{PREFIX}/posts")).json()["posts"]]
+
+
+async def test_atomic_batch_rolls_back_on_a_failing_item(client, admin_headers, create_post):
+    post = await create_post(title="Existing")
+
+    response = await batch(client, admin_headers, post["id"], "atomic")
+
+    assert response.status_code == 400
+    body = response.json()
+    assert body["committed"] is False
+    assert body["results"][2]["status"] == "error"
+    assert await public_titles(client) == ["Existing"]
+    assert (await client.get(f"{PREFIX}/posts/{post['id']}")).json()["pinned"] is False
+
+
+async def test_continue_batch_commits_the_items_that_succeed(client, admin_headers, create_post):
+    post = await create_post(title="Existing")
+
+    response = await batch(client, admin_headers, post["id"], "continue")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["committed"] is True
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert [result["status"] for result in body["results"]] == ["ok", "ok", "error"]
+    # The pinned post lists first
+    assert await public_titles(client) == ["Existing", "Created in a batch"]
+    assert (await client.get(f"{PREFIX}/posts/{post['id']}")).json()["pinned"] is True
@@ -0,0 +1,52 @@
+import pytest
+
+from core.config import settings
+from utils.cache import MemoryCache, response_cache
+
+PREFIX = settings.API_PREFIX or ""
+
+
+async def test_cache_stats_are_for_admins_only(client, admin_headers):
+    assert (await client.get(f"{PREFIX}/health/cache")).status_code == 401
+    assert (await client.get(f"{PREFIX}/health/cache", headers=admin_headers)).status_code == 200
+
+
+async def test_memory_cache_counters_are_bounded():
+    cache = MemoryCache(max_counters=2)
+    await cache.set("posts:list:1", b"cached at generation 1")
+    for key in ("a", "b", "a", "c"):
+        await cache.incr(key)
+
+    assert await cache.get("a") == b"2"
+    assert await cache.get("b") is None
+    # Entries keyed on the evicted counter cannot outlive it
+    assert await cache.get("posts:list:1") is None
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", MemoryCache())
+    monkeypatch.setattr(response_cache, "hits", 0)
+    return response_cache
+
+
+async def test_writes_invalidate_cached_posts_and_lists(client, admin_headers, create_post, memory_cache):
+    post = await create_post(title="Before")
+    path, old_slug_path = f"{PREFIX}/posts/{post['id']}", f"{PREFIX}/posts/{post['slug']}"
+    for _ in range(2):
+        assert (await client.get(path)).json()["title"] == "Before"
+        assert (await client.get(old_slug_path)).json()["title"] == "Before"
+        assert [p["title"] for p in (await client.get(f"{PREFIX}/posts")).json()["posts"]] == ["Before"]
+    assert memory_cache.hits == 3
+
+    # The new title renames the post, so its old slug must stop resolving too
+    response = await client.put(f"{PREFIX}/admin/posts/{post['id']}", headers=admin_headers, json={"title": "After"})
+    response.raise_for_status()
+    assert (await client.get(path)).json()["title"] == "After"
+    assert (await client.get(old_slug_path)).status_code == 404
+    assert [p["title"] for p in (await client.get(f"{PREFIX}/posts")).json()["posts"]] == ["After"]
+
+    response = await client.delete(f"{PREFIX}/admin/posts/{post['id']}", headers=admin_headers)
+    response.raise_for_status()
+    assert (await client.get(path)).status_code == 404
+    assert (await client.get(f"{PREFIX}/posts")).json()["posts"] == []
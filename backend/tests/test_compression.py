@@ -0,0 +1,65 @@
+import pytest
+
+from core.config import settings
+from utils import compression
+from utils.cache import MemoryCache, response_cache
+from utils.compression import negotiate
+
+PREFIX = settings.API_PREFIX or ""
+BODY = " ".join(f"word{i % 50}" for i in range(2000))
+
+
+def test_negotiate_prefers_the_server_order_among_accepted_encodings():
+    assert negotiate("gzip, br", ["br", "gzip"]) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0", ["br", "gzip"]) == "gzip"
+    assert negotiate("*", ["br", "gzip"]) == "br"
+    assert negotiate("*;q=0, gzip", ["br", "gzip"]) == "gzip"
+    assert negotiate("identity", ["br", "gzip"]) is None
+    assert negotiate(None, ["br", "gzip"]) is None
+
+
+async def get(client, path, encoding):
+    return await client.get(path, headers={"Accept-Encoding": encoding})
+
+
+async def test_large_responses_are_compressed_when_accepted(client, create_post):
+    post = await create_post(content_md=BODY)
+    path = f"{PREFIX}/posts/{post['slug']}"
+
+    plain = await get(client, path, "identity")
+    assert "content-encoding" not in plain.headers
+    assert "accept-encoding" in plain.headers["vary"].lower()
+
+    compressed = await get(client, path, "gzip")
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == f"W/{plain.headers['etag']}"
+    assert compressed.content == plain.content
+
+
+@pytest.fixture
+def counted_compress(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", MemoryCache())
+    calls = []
+    compress = compression.compress
+
+    def counted(data, encoding, level=None):
+        calls.append(encoding)
+        return compress(data, encoding, level)
+
+    monkeypatch.setattr(compression, "compress", counted)
+    return calls
+
+
+async def test_cache_hits_serve_the_precompressed_body(client, create_post, counted_compress):
+    post = await create_post(content_md=BODY)
+    path = f"{PREFIX}/posts/{post['slug']}"
+
+    first = await get(client, path, "gzip")
+    compressed_once = len(counted_compress)
+    assert "gzip" in counted_compress
+
+    for _ in range(3):
+        hit = await get(client, path, "gzip")
+        assert hit.headers["content-encoding"] == "gzip"
+        assert hit.content == first.content
+    assert len(counted_compress) == compressed_once
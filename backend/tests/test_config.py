@@ -0,0 +1,18 @@
+from core.config import Settings
+
+
+def settings(**overrides) -> Settings:
+    return Settings(_env_file=None, **overrides)
+
+
+def test_metrics_are_off_without_a_token():
+    assert settings().METRICS_ENABLED is False
+
+
+def test_metrics_are_on_with_a_token():
+    assert settings(METRICS_TOKEN="scraper").METRICS_ENABLED is True
+
+
+def test_metrics_can_be_enabled_or_disabled_explicitly():
+    assert settings(METRICS_ENABLED=True).METRICS_ENABLED is True
+    assert settings(METRICS_TOKEN="scraper", METRICS_ENABLED=False).METRICS_ENABLED is False
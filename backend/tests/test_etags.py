@@ -0,0 +1,80 @@
+from core.config import settings
+
+PREFIX = settings.API_PREFIX or ""
+
+
+async def etag_of(client, path):
+    response = await client.get(path)
+    assert response.status_code == 200
+    return response.headers["etag"], response.json()
+
+
+async def test_matching_etag_answers_304(client, create_post):
+    post = await create_post()
+    path = f"{PREFIX}/posts/{post['slug']}"
+    etag, _ = await etag_of(client, path)
+
+    response = await client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not response.content
+    assert (await client.get(path, headers={"If-None-Match": '"other"'})).status_code == 200
+
+
+async def test_edit_changes_the_etag(client, admin_headers, create_post):
+    post = await create_post()
+    path = f"{PREFIX}/posts/{post['slug']}"
+    etag, _ = await etag_of(client, path)
+
+    response = await client.put(f"{PREFIX}/admin/posts/{post['id']}", headers=admin_headers, json={"summary": "Edited"})
+    response.raise_for_status()
+
+    assert (await client.get(path, headers={"If-None-Match": etag})).status_code == 200
+    assert (await etag_of(client, path))[0] != etag
+
+
+async def test_pin_and_unpin_change_the_etag(client, admin_headers, create_post):
+    post = await create_post()
+    path = f"{PREFIX}/posts/{post['slug']}"
+    etags = [(await etag_of(client, path))[0]]
+    list_etags = [(await etag_of(client, f"{PREFIX}/posts"))[0]]
+
+    for action, pinned in (("pin", True), ("unpin", False)):
+        response = await client.post(f"{PREFIX}/admin/posts/{post['id']}/{action}", headers=admin_headers)
+        response.raise_for_status()
+        assert (await client.get(path, headers={"If-None-Match": etags[-1]})).status_code == 200
+        etag, body = await etag_of(client, path)
+        assert body["pinned"] is pinned
+        etags.append(etag)
+        list_etags.append((await etag_of(client, f"{PREFIX}/posts"))[0])
+
+    assert len(set(etags)) == 3
+    assert len(set(list_etags)) == 3
+
+
+async def test_batch_pin_changes_the_etag(client, admin_headers, create_post):
+    post = await create_post()
+    path = f"{PREFIX}/posts/{post['slug']}"
+    etag, _ = await etag_of(client, path)
+
+    response = await client.post(f"{PREFIX}/admin/posts/batch", headers=admin_headers, json={
+        "operations": [{"op": "pin", "post_id": post["id"]}],
+    })
+    response.raise_for_status()
+
+    assert (await client.get(path, headers={"If-None-Match": etag})).status_code == 200
+    new_etag, body = await etag_of(client, path)
+    assert body["pinned"] is True
+    assert new_etag != etag
+
+
+async def test_html_format_has_its_own_etag(client, create_post):
+    post = await create_post(content_md="# Title\n\nSome *text*")
+    path = f"{PREFIX}/posts/{post['slug']}"
+    json_etag, _ = await etag_of(client, path)
+    html_etag, body = await etag_of(client, f"{path}?format=html")
+
+    assert html_etag != json_etag
+    assert "<em>text</em>" in body["content_html"]
+    assert (await client.get(f"{path}?format=html", headers={"If-None-Match": html_etag})).status_code == 304
+    assert (await client.get(f"{path}?format=html", headers={"If-None-Match": json_etag})).status_code == 200
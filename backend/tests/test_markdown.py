@@ -0,0 +1,41 @@
+import pytest
+
+from core.config import settings
+from utils.markdown import render_markdown
+
+PREFIX = settings.API_PREFIX or ""
+
+
+@pytest.mark.parametrize("source", [
+    "<script>alert(1)</script>\n\nHi",
+    "[x](javascript:alert(1))",
+    '<a href="javascript:alert(1)">x</a>',
+    '<a href="JaVaScRiPt:alert(1)">x</a>',
+    '<img src="a.png" onerror="alert(1)">',
+    '<p style="background:url(javascript:alert(1))">x</p>',
+])
+def test_scripts_and_javascript_urls_are_stripped(source):
+    html = render_markdown(source).html.lower()
+
+    # What is left may mention javascript: as text, never as a link or handler
+    assert "<script" not in html
+    assert "href=\"javascript" not in html
+    assert "onerror" not in html and "style=" not in html
+
+
+def test_markdown_features_survive_sanitizing():
+    html = render_markdown("# Title\n\n[ok](https://example.com)\n\n```python\nx\n```\n\n<code class=\"evil\">y</code>").html
+
+    assert '<h1 id="title">Title</h1>' in html
+    assert '<a href="https://example.com" rel="noopener noreferrer nofollow">ok</a>' in html
+    assert '<code class="language-python">' in html
+    assert "<code>y</code>" in html
+
+
+async def test_stored_html_is_sanitized(client, create_post):
+    post = await create_post(content_md='Hello <script>alert(1)</script><a href="javascript:alert(1)">x</a>')
+
+    html = (await client.get(f"{PREFIX}/posts/{post['slug']}", params={"format": "html"})).json()["content_html"]
+
+    assert "Hello" in html
+    assert "<script" not in html and "javascript:" not in html
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from db.database import SessionLocal, get_engine
+from models import Base
+from models.post import Post, PostStatus, PostType
+from utils.pagination import LISTING_ORDER, encode_cursor, keyset_filter, listing_query
+
+
+async def seed() -> None:
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    now = datetime.now(timezone.utc)
+    async with SessionLocal() as db:
+        await db.execute(insert(Post), [
+            {
+                "id": f"{i:04d}",
+                "slug": f"post-{i}",
+                "title": f"Post {i}",
+                "type": PostType.tech,
+                "status": PostStatus.published,
+                # Every third post lacks published_at, as rows written before it was set do
+                "published_at": None if i % 3 == 0 else now - timedelta(hours=i // 2),
+                "deleted": False,
+                "pinned": i % 7 == 0,
+            }
+            for i in range(40)
+        ])
+        await db.commit()
+
+
+async def test_cursor_pages_follow_the_listing_order_with_null_published_at():
+    await seed()
+    async with SessionLocal() as db:
+        expected = [row.id for row in await db.execute(listing_query().order_by(*LISTING_ORDER))]
+        seen, cursor = [], None
+        while True:
+            query = listing_query().order_by(*LISTING_ORDER).limit(6)
+            if cursor:
+                query = query.where(keyset_filter(cursor))
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+            seen.extend(row.id for row in rows)
+            cursor = encode_cursor(rows[-1])
+
+    assert seen == expected
+    # Unpinned posts without published_at come after every dated one
+    unpinned = [post_id for post_id in expected if int(post_id) % 7]
+    undated = [post_id for post_id in unpinned if int(post_id) % 3 == 0]
+    assert unpinned[-len(undated):] == undated
@@ -0,0 +1,71 @@
+"""The hot public queries must be planned as index scans, on SQLite and Postgres.
+
+The same checks as `python -m benchmarks.query_plans`, on a small corpus.
+Plans are checked before and after ANALYZE, since a freshly migrated
+database has no statistics.
+"""
+import os
+
+import pytest
+from sqlalchemy import insert, text
+
+from benchmarks.dataset import CorpusOptions, generate_posts
+from benchmarks.query_plans import build_checks, explain
+from db.database import SessionLocal, create_engine_for, get_engine
+from models import Base
+from models.post import Post
+from models.post_tag import PostTag
+
+POSTS = 3000
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+async def engine(request):
+    if request.param == "sqlite":
+        yield get_engine()
+        return
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_engine_for(POSTGRES_URL)
+    yield engine
+    await engine.dispose()
+
+
+async def seed(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionLocal(bind=engine) as db:
+        for posts, post_tags in generate_posts(CorpusOptions(posts=POSTS, body_words=20)):
+            await db.execute(insert(Post), posts)
+            await db.execute(insert(PostTag), post_tags)
+        await db.commit()
+
+
+async def analyze(engine) -> None:
+    if engine.dialect.name == "sqlite":
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+        return
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE posts"))
+
+
+async def assert_index_plans(engine) -> None:
+    primary_key_index = "sqlite_autoindex_posts_1" if engine.dialect.name == "sqlite" else "posts_pkey"
+    async with SessionLocal(bind=engine) as db:
+        for check in await build_checks(db, primary_key_index):
+            plan = await explain(db, check.statement)
+            assert set(plan.indexes) & set(check.indexes), f"{check.name} does not use {check.indexes}: {plan.detail}"
+            if check.no_sort:
+                assert not plan.sorts, f"{check.name} sorts the rows: {plan.detail}"
+
+
+async def test_listing_and_lookups_use_their_indexes(engine):
+    await seed(engine)
+    await assert_index_plans(engine)
+    await analyze(engine)
+    await assert_index_plans(engine)
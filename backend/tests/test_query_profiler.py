@@ -0,0 +1,59 @@
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.config import settings
+from utils.query_profiler import QueryProfilerMiddleware, install_query_profiler, recent_profiles
+
+
+@pytest.fixture
+async def profiled_client():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    install_query_profiler(engine)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE admin_users (username TEXT, password_hash TEXT)"))
+        await conn.execute(text("CREATE TABLE posts (id TEXT)"))
+
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT * FROM admin_users WHERE username = :name"), {"name": "secret-admin"})
+            for post_id in range(settings.SQL_N_PLUS_ONE_THRESHOLD):
+                await conn.execute(text("SELECT * FROM posts WHERE id = :id"), {"id": str(post_id)})
+        return {}
+
+    app.add_middleware(QueryProfilerMiddleware)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    await engine.dispose()
+
+
+async def test_profile_headers_and_redacted_timeline(profiled_client, caplog, monkeypatch):
+    caplog.set_level(logging.WARNING, logger="utils.query_profiler")
+    # Every statement counts as slow, so every one is logged
+    monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 0)
+
+    response = await profiled_client.get("/work")
+
+    queries = 1 + settings.SQL_N_PLUS_ONE_THRESHOLD
+    assert response.headers["x-query-count"] == str(queries)
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert response.headers["server-timing"].endswith(f'desc="{queries} queries"')
+
+    profile = recent_profiles.get(response.headers["x-query-profile"]).as_dict()
+    assert profile["route"] == "/work"
+    admin_query, *post_queries = profile["queries"]
+    assert admin_query["parameters"] == "<redacted>"
+    assert "secret-admin" not in str(profile)
+    assert post_queries[0]["parameters"] == "('0',)"
+    assert profile["repeated"] == [
+        {"statement": "SELECT * FROM posts WHERE id = ?", "count": settings.SQL_N_PLUS_ONE_THRESHOLD}
+    ]
+    assert "Possible N+1 in GET /work" in caplog.text
+    assert "Slow query" in caplog.text and "secret-admin" not in caplog.text
@@ -0,0 +1,123 @@
+"""Read-replica routing, with two SQLite files.
+
+The replica is a copy of the primary's file, so it stands still while the
+primary takes writes, like a replica with unbounded lag.
+"""
+import asyncio
+import os
+import shutil
+import sqlite3
+from contextlib import closing
+
+import httpx
+import pytest
+from sqlalchemy.engine import make_url
+
+from core.config import settings
+from db.database import dispose_engine
+from db.replicas import replica_router
+from main import app
+from utils.cache import MemoryCache, PostState, ResponseCache
+
+PREFIX = settings.API_PREFIX or ""
+PRIMARY_PATH = make_url(settings.DATABASE_URL).database
+REPLICA_PATH = make_url(settings.DATABASE_REPLICA_URLS).database
+REPLICA_DIR = os.path.dirname(REPLICA_PATH)
+
+
+def copy_primary_to_replica() -> None:
+    os.makedirs(REPLICA_DIR, exist_ok=True)
+    # The backup API includes commits still in the primary's WAL file
+    with closing(sqlite3.connect(PRIMARY_PATH)) as primary, closing(sqlite3.connect(REPLICA_PATH)) as replica:
+        primary.backup(replica)
+
+
+async def remove_replica() -> None:
+    shutil.rmtree(REPLICA_DIR)
+    # Pooled connections would keep the unlinked file open
+    await replica_router.replicas[0].engine.dispose()
+
+
+@pytest.fixture
+async def clients(fresh_primary):
+    """An admin client and a fresh visitor, with a replica that lacks nothing yet."""
+    # Closing the last connection checkpoints the WAL into the file
+    await dispose_engine()
+    copy_primary_to_replica()
+    for replica in replica_router.replicas:
+        replica_router.mark_up(replica)
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as admin, \
+                httpx.AsyncClient(transport=transport, base_url="http://test") as visitor:
+            login = await admin.post(f"{PREFIX}/auth/login", data={
+                "username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD,
+            })
+            login.raise_for_status()
+            admin.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+            yield admin, visitor
+
+
+async def create_post(admin: httpx.AsyncClient) -> str:
+    created = await admin.post(f"{PREFIX}/admin/posts", json={
+        "title": "Written to the primary", "content_md": "Hello", "type": "tech", "status": "published",
+    })
+    created.raise_for_status()
+    return f"{PREFIX}/posts/{created.json()['slug']}"
+
+
+async def replica_healthy(client: httpx.AsyncClient) -> bool:
+    health = (await client.get(f"{PREFIX}/health/healthz")).json()
+    return health["replicas"]["replica0"]["healthy"]
+
+
+async def test_visitors_read_the_replica_and_writers_their_own_writes(clients):
+    admin, visitor = clients
+    path = await create_post(admin)
+
+    assert (await admin.get(path)).status_code == 200
+    assert (await visitor.get(path)).status_code == 404
+    assert (await visitor.get(f"{PREFIX}/posts")).status_code == 200
+
+
+async def test_writers_read_their_writes_by_token_without_cookies(clients):
+    admin, _ = clients
+    path = await create_post(admin)
+    # A cross-site frontend sends the token but no cookies
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as frontend:
+        assert (await frontend.get(path)).status_code == 404
+        frontend.headers["Authorization"] = admin.headers["Authorization"]
+        assert (await frontend.get(path)).status_code == 200
+
+
+async def test_unreachable_replica_falls_back_to_the_primary(clients):
+    admin, visitor = clients
+    path = await create_post(admin)
+    await remove_replica()
+
+    assert (await visitor.get(path)).status_code == 200
+    assert not await replica_healthy(visitor)
+
+
+async def test_restored_replica_returns_to_rotation(clients):
+    admin, visitor = clients
+    path = await create_post(admin)
+    await remove_replica()
+    assert (await visitor.get(path)).status_code == 200
+
+    copy_primary_to_replica()
+    await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_SECONDS * 3)
+
+    assert await replica_healthy(visitor)
+    assert (await visitor.get(path)).status_code == 200
+
+
+async def test_replica_reads_are_not_cached_right_after_a_write():
+    cache = ResponseCache(MemoryCache(), replica_lag=5)
+    await cache.invalidate_posts({"1": [PostState("old-slug", "tech", True)]})
+
+    await cache.set("posts:list", b"stale", from_replica=True)
+    assert await cache.get("posts:list") is None
+    await cache.set("posts:list", b"fresh")
+    assert await cache.get("posts:list") == b"fresh"
@@ -0,0 +1,112 @@
+"""Streaming uploads, presigned uploads and their verification, against moto's S3."""
+import boto3
+import pytest
+from moto import mock_aws
+
+from core.config import settings
+from utils.s3 import S3Service
+from utils.uploads import UploadRejected
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+MiB = 1024 * 1024
+IMAGE_TYPES = ("image/jpeg", "image/png")
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name=settings.AWS_REGION)
+        client.create_bucket(Bucket=settings.S3_BUCKET_NAME)
+        yield S3Service(client=client)
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def stored(s3: S3Service, url: str):
+    return s3.s3_client.get_object(Bucket=s3.bucket_name, Key=s3.key_from_url(url))
+
+
+async def test_upload_stream_puts_small_files_in_one_request(s3):
+    url = await s3.upload_stream(chunks(PNG[:10], PNG[10:]), "image/png", "png")
+
+    obj = stored(s3, url)
+    assert obj["Body"].read() == PNG
+    assert obj["ContentType"] == "image/png"
+    assert "-" not in obj["ETag"]
+
+
+async def test_upload_stream_uses_multipart_for_large_files(s3):
+    data = bytes(range(256)) * (11 * MiB // 256)
+    url = await s3.upload_stream(
+        chunks(*(data[i:i + MiB] for i in range(0, len(data), MiB))), "image/png", "png", part_size=5 * MiB
+    )
+
+    obj = stored(s3, url)
+    assert obj["Body"].read() == data
+    # Multipart ETags end in the number of parts
+    assert obj["ETag"].strip('"').endswith("-3")
+
+
+async def test_upload_stream_aborts_multipart_upload_when_the_stream_fails(s3):
+    async def failing():
+        yield b"x" * (5 * MiB)
+        raise RuntimeError("client went away")
+
+    with pytest.raises(RuntimeError):
+        await s3.upload_stream(failing(), "image/png", "png", part_size=5 * MiB)
+
+    assert s3.s3_client.list_multipart_uploads(Bucket=s3.bucket_name).get("Uploads", []) == []
+    assert s3.s3_client.list_objects_v2(Bucket=s3.bucket_name)["KeyCount"] == 0
+
+
+def test_presigned_post_enforces_type_and_size(s3):
+    upload = s3.presign_upload("image/png", "png", max_bytes=MiB)
+
+    assert upload["method"] == "post"
+    assert upload["key"].startswith("posts/") and upload["key"].endswith(".png")
+    assert upload["fields"]["Content-Type"] == "image/png"
+    assert upload["fields"]["key"] == upload["key"]
+    assert "policy" in upload["fields"]
+
+
+def test_presigned_put_signs_the_exact_size(s3):
+    upload = s3.presign_upload("image/png", "png", max_bytes=MiB, method="put", size=len(PNG))
+
+    assert upload["headers"] == {"Content-Type": "image/png", "Content-Length": str(len(PNG))}
+    assert upload["key"] in upload["url"]
+    with pytest.raises(UploadRejected):
+        s3.presign_upload("image/png", "png", max_bytes=MiB, method="put", size=MiB + 1)
+    with pytest.raises(UploadRejected):
+        s3.presign_upload("image/png", "png", max_bytes=MiB, method="put")
+
+
+async def test_verify_upload_accepts_matching_images(s3):
+    key = s3.new_key("png")
+    s3.s3_client.put_object(Bucket=s3.bucket_name, Key=key, Body=PNG, ContentType="image/png")
+
+    result = await s3.verify_upload(key, MiB, IMAGE_TYPES)
+
+    assert result == {"url": s3.public_url(key), "key": key, "size": len(PNG), "content_type": "image/png"}
+
+
+@pytest.mark.parametrize("body, content_type, max_bytes", [
+    (PNG, "image/png", 16),  # too large
+    (PNG, "text/html", MiB),  # type not allowed
+    (b"<html>not an image</html>", "image/png", MiB),  # content does not match the type
+])
+async def test_verify_upload_rejects_and_deletes(s3, body, content_type, max_bytes):
+    key = s3.new_key("png")
+    s3.s3_client.put_object(Bucket=s3.bucket_name, Key=key, Body=body, ContentType=content_type)
+
+    with pytest.raises(UploadRejected):
+        await s3.verify_upload(key, max_bytes, IMAGE_TYPES)
+
+    assert s3.s3_client.list_objects_v2(Bucket=s3.bucket_name)["KeyCount"] == 0
+
+
+async def test_verify_upload_rejects_missing_objects(s3):
+    with pytest.raises(UploadRejected):
+        await s3.verify_upload(s3.new_key("png"), MiB, IMAGE_TYPES)
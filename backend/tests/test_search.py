@@ -0,0 +1,49 @@
+from sqlalchemy import insert, select
+
+from db.database import SessionLocal
+from models.post import Post, PostStatus, PostType
+from utils import search
+from utils.cache import MemoryCache, ResponseCache, post_state
+
+
+def row(post_id: str, title: str, status: PostStatus = PostStatus.published) -> dict:
+    return {
+        "id": post_id, "slug": f"post-{post_id}", "title": title, "type": PostType.tech,
+        "status": status, "deleted": False, "pinned": False,
+    }
+
+
+async def test_memory_index_holds_public_posts_and_rebuilds_only_for_other_workers(fresh_primary, monkeypatch):
+    cache = ResponseCache(MemoryCache())
+    monkeypatch.setattr(search, "response_cache", cache)
+    backend = search.InMemorySearchBackend()
+    rebuilds = []
+    rebuild = backend.rebuild
+
+    async def counted_rebuild(db):
+        rebuilds.append(True)
+        return await rebuild(db)
+
+    monkeypatch.setattr(backend, "rebuild", counted_rebuild)
+
+    async with SessionLocal() as db:
+        await db.execute(insert(Post), [row("1", "Alpha"), row("2", "Alpha draft", PostStatus.draft)])
+        await db.commit()
+
+        await backend.apply(db, select(Post), "alpha")
+        assert set(backend.search("alpha")[0]) == {"1"}
+
+        # A write by this worker is indexed directly
+        post = Post(**row("3", "Alpha again"))
+        db.add(post)
+        await backend.index_post(db, post)
+        await db.commit()
+        await cache.invalidate_post(post.id, post_state(post))
+        await backend.apply(db, select(Post), "alpha")
+        assert set(backend.search("alpha")[0]) == {"1", "3"}
+        assert len(rebuilds) == 1
+
+        # Another worker's write only shows as a generation bump
+        await cache.backend.incr(cache._generation_key(None))
+        await backend.apply(db, select(Post), "alpha")
+        assert len(rebuilds) == 2
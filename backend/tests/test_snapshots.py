@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+from core.config import settings
+from utils.snapshots import LocalSnapshotStore, SnapshotPublisher
+
+PREFIX = settings.API_PREFIX or ""
+PAGE_SIZE = 2
+
+
+@pytest.fixture
+async def publisher(client, tmp_path):
+    publisher = SnapshotPublisher(LocalSnapshotStore(str(tmp_path)), pages=2, page_size=PAGE_SIZE, debounce=0.2, max_delay=5)
+    publisher.start()
+    yield publisher
+    await publisher.close()
+
+
+def document(publisher: SnapshotPublisher, path: str):
+    with open(os.path.join(publisher.store.root, path)) as f:
+        return json.load(f)
+
+
+def exists(publisher: SnapshotPublisher, path: str) -> bool:
+    return os.path.exists(os.path.join(publisher.store.root, path))
+
+
+async def api(client, path: str, **params):
+    return (await client.get(f"{PREFIX}{path}", params=params)).json()
+
+
+async def test_snapshots_match_the_api_after_writes(client, admin_headers, create_post, publisher):
+    posts = [await create_post(title=f"Post {i}", tags=["python"]) for i in range(3)]
+    await publisher.wait()
+
+    for post in posts:
+        assert document(publisher, f"posts/{post['slug']}.json") == await api(client, f"/posts/{post['slug']}")
+    for page in (1, 2):
+        expected = await api(client, "/posts", page=page, page_size=PAGE_SIZE)
+        assert document(publisher, f"lists/all/page-{page}.json") == expected
+        assert document(publisher, f"lists/tag/python/page-{page}.json") == await api(
+            client, "/posts", tag="python", page=page, page_size=PAGE_SIZE
+        )
+        assert document(publisher, f"lists/type/tech/page-{page}.json") == expected
+
+    # Renaming and unpublishing remove the documents they made stale
+    renamed = await client.put(f"{PREFIX}/admin/posts/{posts[0]['id']}", headers=admin_headers, json={"title": "Renamed"})
+    renamed.raise_for_status()
+    unpublished = await client.put(f"{PREFIX}/admin/posts/{posts[1]['id']}", headers=admin_headers, json={"status": "draft"})
+    unpublished.raise_for_status()
+    await publisher.wait()
+
+    assert not exists(publisher, f"posts/{posts[0]['slug']}.json")
+    assert document(publisher, f"posts/{renamed.json()['slug']}.json") == await api(client, f"/posts/{renamed.json()['slug']}")
+    assert not exists(publisher, f"posts/{posts[1]['slug']}.json")
+    assert document(publisher, "lists/all/page-1.json") == await api(client, "/posts", page=1, page_size=PAGE_SIZE)
+    assert not exists(publisher, "lists/all/page-2.json")
+
+
+async def test_a_burst_of_edits_is_published_once(client, admin_headers, create_post, publisher):
+    post = await create_post(title="Edited")
+    await publisher.wait()
+    batches = publisher.batches
+
+    for i in range(5):
+        response = await client.put(f"{PREFIX}/admin/posts/{post['id']}", headers=admin_headers, json={"summary": f"Edit {i}"})
+        response.raise_for_status()
+    await publisher.wait()
+
+    assert publisher.batches == batches + 1
+    assert document(publisher, f"posts/{post['slug']}.json")["summary"] == "Edit 4"
@@ -0,0 +1,34 @@
+from core.config import settings
+
+PREFIX = settings.API_PREFIX or ""
+
+
+async def titles(client, **params) -> set:
+    response = await client.get(f"{PREFIX}/posts", params=params)
+    assert response.status_code == 200
+    return {post["title"] for post in response.json()["posts"]}
+
+
+async def test_tag_filters_match_all_or_any(client, create_post):
+    await create_post(title="Both", tags=["Python", "web"])
+    await create_post(title="Python", tags=["python"])
+    await create_post(title="Web", tags=[" WEB "])
+    await create_post(title="Untagged")
+
+    assert await titles(client, tag="python") == {"Both", "Python"}
+    assert await titles(client, tags=["python", "web"]) == {"Both"}
+    assert await titles(client, tags=["PYTHON", "web"], tag_match="any") == {"Both", "Python", "Web"}
+    assert await titles(client, tag="python", tags=["web"]) == {"Both"}
+    assert await titles(client, tags=["rust"], tag_match="any") == set()
+
+
+async def test_editing_tags_updates_the_filter(client, admin_headers, create_post):
+    post = await create_post(title="Retagged", tags=["python"])
+
+    response = await client.put(
+        f"{PREFIX}/admin/posts/{post['id']}", json={"tags": ["web"]}, headers=admin_headers
+    )
+    assert response.status_code == 200
+
+    assert await titles(client, tag="python") == set()
+    assert await titles(client, tag="web") == {"Retagged"}
@@ -0,0 +1,61 @@
+import gzip
+import json
+
+from sqlalchemy import delete
+
+from core.config import settings
+from db.database import SessionLocal
+from models.post import Post
+from models.post_tag import PostTag
+
+PREFIX = settings.API_PREFIX or ""
+
+
+async def export(client, admin_headers) -> bytes:
+    response = await client.get(f"{PREFIX}/admin/posts/export", params={"gzip": "true"}, headers=admin_headers)
+    assert response.status_code == 200
+    return response.content
+
+
+async def import_body(client, admin_headers, body: bytes) -> dict:
+    response = await client.post(f"{PREFIX}/admin/posts/import", content=body, headers=admin_headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def posts_by_id(exported: bytes) -> dict:
+    return {post["id"]: post for post in map(json.loads, gzip.decompress(exported).splitlines())}
+
+
+async def test_export_imports_back_unchanged(client, admin_headers, create_post):
+    await create_post(title="Published", tags=["python"])
+    await create_post(title="Draft", status="draft")
+    deleted = await create_post(title="Deleted")
+    response = await client.delete(f"{PREFIX}/admin/posts/{deleted['id']}", headers=admin_headers)
+    response.raise_for_status()
+    exported = await export(client, admin_headers)
+    assert len(posts_by_id(exported)) == 3
+
+    async with SessionLocal() as db:
+        await db.execute(delete(PostTag))
+        await db.execute(delete(Post))
+        await db.commit()
+    result = await import_body(client, admin_headers, exported)
+
+    assert (result["imported"], result["skipped"], result["failed"]) == (3, 0, 0)
+    assert posts_by_id(await export(client, admin_headers)) == posts_by_id(exported)
+    public = (await client.get(f"{PREFIX}/posts", params={"tag": "python"})).json()["posts"]
+    assert [post["title"] for post in public] == ["Published"]
+
+
+async def test_import_skips_existing_ids_and_reports_bad_lines(client, admin_headers, create_post):
+    await create_post(title="Existing")
+    exported = gzip.decompress(await export(client, admin_headers))
+    new_post = json.dumps({"title": "New", "content_md": "Hi", "type": "tech", "status": "published"}).encode()
+
+    result = await import_body(client, admin_headers, exported + new_post + b"\n{not json\n")
+
+    assert (result["imported"], result["skipped"], result["failed"]) == (1, 1, 1)
+    assert result["errors"][0]["line"] == 3
+    titles = {post["title"] for post in (await client.get(f"{PREFIX}/posts")).json()["posts"]}
+    assert titles == {"Existing", "New"}
@@ -0,0 +1,83 @@
+"""POST /admin/upload-image, parsed from the request stream, against moto's S3."""
+import boto3
+import pytest
+import starlette.formparsers
+from moto import mock_aws
+
+from core.config import settings
+from utils.s3 import s3_service
+
+PREFIX = settings.API_PREFIX or ""
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+BOUNDARY = "upload-boundary"
+MiB = 1024 * 1024
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    with mock_aws():
+        client = boto3.client("s3", region_name=settings.AWS_REGION)
+        client.create_bucket(Bucket=settings.S3_BUCKET_NAME)
+        monkeypatch.setattr(s3_service, "_client", client)
+        yield client
+
+
+@pytest.fixture
+def no_spooling(monkeypatch):
+    def spool(*args, **kwargs):
+        raise AssertionError("the upload was spooled to a temporary file")
+
+    monkeypatch.setattr(starlette.formparsers, "SpooledTemporaryFile", spool)
+
+
+class Body:
+    """A multipart body sent in chunks, counting how much of it was read."""
+
+    def __init__(self, data: bytes, chunk_size: int = 64 * 1024):
+        self.chunks = [
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="note"\r\n\r\nhello\r\n'.encode(),
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="a.png"\r\n'
+            f'Content-Type: image/png\r\n\r\n'.encode(),
+            *(data[i:i + chunk_size] for i in range(0, len(data), chunk_size)),
+            f"\r\n--{BOUNDARY}--\r\n".encode(),
+        ]
+        self.size = sum(map(len, self.chunks))
+        self.sent = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.sent += len(chunk)
+            yield chunk
+
+
+async def upload(client, admin_headers, body: Body):
+    return await client.post(f"{PREFIX}/admin/upload-image", content=body, headers={
+        **admin_headers, "Content-Type": f"multipart/form-data; boundary={BOUNDARY}",
+    })
+
+
+async def test_upload_streams_the_file_to_s3(client, admin_headers, bucket, no_spooling):
+    response = await upload(client, admin_headers, Body(PNG, chunk_size=5))
+
+    assert response.status_code == 200
+    obj = bucket.get_object(Bucket=settings.S3_BUCKET_NAME, Key=s3_service.key_from_url(response.json()["url"]))
+    assert obj["Body"].read() == PNG
+    assert obj["ContentType"] == "image/png"
+
+
+async def test_oversized_upload_is_cut_off_with_413(client, admin_headers, bucket, no_spooling, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_IMAGE_UPLOAD_BYTES", MiB)
+    body = Body(PNG + b"\x00" * (4 * MiB))
+
+    response = await upload(client, admin_headers, body)
+
+    assert response.status_code == 413
+    assert body.sent < body.size / 2
+    assert "Contents" not in bucket.list_objects_v2(Bucket=settings.S3_BUCKET_NAME)
+    assert "Uploads" not in bucket.list_multipart_uploads(Bucket=settings.S3_BUCKET_NAME)
+
+
+async def test_upload_rejects_files_that_are_not_images(client, admin_headers, bucket):
+    response = await upload(client, admin_headers, Body(b"<html></html>"))
+
+    assert response.status_code == 400
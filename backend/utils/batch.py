@@ -0,0 +1,213 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.post import Post, PostStatus
+from models.post_tag import PostTag
+from schemas.post import BatchItemResult, BatchOperation, BatchResponse
+from utils.markdown import apply_rendered_content
+from utils.cache import PostState, post_state, response_cache
+from utils.search import get_search_backend
+from utils.slug import SLUG_RETRY_ATTEMPTS, SlugAllocator
+from utils.tags import replace_post_tags
+
+class BatchItemError(ValueError):
+    """An operation that cannot be applied; reported in its item result."""
+
+
+class BatchOutcome(NamedTuple):
+    response: BatchResponse
+    # (post_id, cover_image_url) pairs whose cover variants should be generated
+    new_covers: List[Tuple[str, str]]
+
+
+class PostBatch:
+    """Applies many admin post operations in one transaction.
+
+    Referenced posts are loaded with one query and slugs for every new
+    title come from one lookup. New posts go in with a single executemany
+    INSERT, updates are flushed together by the unit of work, and hard
+    deletes and tag rows use one statement each.
+
+    Operations are checked while they are planned, before anything is
+    written, so in "continue" mode a failing item is simply left out.
+    """
+
+    def __init__(self, db: AsyncSession, operations: List[BatchOperation]):
+        self.db = db
+        self.operations = operations
+
+    async def run(self, mode: str) -> BatchOutcome:
+        for attempt in range(1, SLUG_RETRY_ATTEMPTS + 1):
+            try:
+                return await self._run_once(mode)
+            except IntegrityError:
+                # Another writer took one of the planned slugs; plan again
+                await self.db.rollback()
+                if attempt == SLUG_RETRY_ATTEMPTS:
+                    raise
+
+    async def _run_once(self, mode: str) -> BatchOutcome:
+        db = self.db
+        ids = {op.post_id for op in self.operations if op.op != "create"}
+        posts: Dict[str, Post] = {}
+        if ids:
+            result = await db.execute(select(Post).where(Post.id.in_(ids)).execution_options(populate_existing=True))
+            posts = {post.id: post for post in result.scalars()}
+        before: Dict[str, PostState] = {post_id: post_state(post) for post_id, post in posts.items()}
+
+        titles = [op.data.title for op in self.operations if op.op in ("create", "update") and op.data.title]
+        self.slugs = await SlugAllocator.load(db, titles)
+        self.now = datetime.now(timezone.utc)
+        self.posts = posts
+        self.created: Dict[str, Post] = {}
+        self.touched: Set[str] = set()
+        self.reindex: Set[str] = set()
+        self.unindex: Set[str] = set()
+        self.hard_deleted: Set[str] = set()
+        self.tags: Dict[str, List[str]] = {}
+        self.new_covers: Dict[str, str] = {}
+
+        results = []
+        for index, op in enumerate(self.operations):
+            try:
+                post_id, slug = getattr(self, f"_plan_{op.op}")(op)
+                results.append(BatchItemResult(index=index, op=op.op, status="ok", post_id=post_id, slug=slug))
+            except BatchItemError as e:
+                results.append(BatchItemResult(
+                    index=index, op=op.op, status="error", post_id=getattr(op, "post_id", None), error=str(e)
+                ))
+
+        failed = sum(1 for r in results if r.status == "error")
+        if failed and mode == "atomic":
+            await db.rollback()
+            for r in results:
+                if r.status == "ok":
+                    r.status, r.post_id, r.slug = "skipped", getattr(self.operations[r.index], "post_id", None), None
+            response = BatchResponse(mode=mode, committed=False, succeeded=0, failed=failed, results=results)
+            return BatchOutcome(response, [])
+
+        await self._write()
+        await db.commit()
+
+        changes: Dict[str, List[PostState]] = {}
+        for post_id in self.touched | self.hard_deleted:
+            states = [before[post_id]]
+            if post_id not in self.hard_deleted:
+                states.append(post_state(self.posts[post_id]))
+            changes[post_id] = states
+        for post_id, post in self.created.items():
+            changes[post_id] = [post_state(post)]
+        await response_cache.invalidate_posts(changes)
+
+        response = BatchResponse(
+            mode=mode, committed=True, succeeded=len(results) - failed, failed=failed, results=results
+        )
+        return BatchOutcome(response, list(self.new_covers.items()))
+
+    def _existing(self, post_id: str, allow_deleted: bool = True) -> Post:
+        post = self.posts.get(post_id)
+        if post is None or (post.deleted and not allow_deleted):
+            raise BatchItemError("Post not found")
+        return post
+
+    def _plan_create(self, op) -> Tuple[str, str]:
+        data = op.data
+        post = Post(
+            id=str(uuid.uuid4()),
+            slug=self.slugs.allocate(data.title),
+            title=data.title,
+            summary=data.summary,
+            content_md=data.content_md,
+            type=data.type,
+            status=data.status,
+            tags=data.tags or [],
+            cover_image_url=data.cover_image_url,
+            external_links=data.external_links or [],
+            published_at=self.now if data.status == PostStatus.published else None,
+            deleted=False,
+            pinned=False
+        )
+        apply_rendered_content(post)
+        self.created[post.id] = post
+        self.tags[post.id] = post.tags
+        self.reindex.add(post.id)
+        if post.cover_image_url:
+            self.new_covers[post.id] = post.cover_image_url
+        return post.id, post.slug
+
+    def _plan_update(self, op) -> Tuple[str, str]:
+        post = self._existing(op.post_id)
+        update_data = op.data.model_dump(exclude_unset=True)
+        if "title" in update_data and update_data["title"] != post.title:
+            update_data["slug"] = self.slugs.allocate(update_data["title"], current_slug=post.slug)
+        if "status" in update_data:
+            if update_data["status"] == PostStatus.published and post.status != PostStatus.published:
+                update_data["published_at"] = self.now
+            elif update_data["status"] != PostStatus.published:
+                update_data["published_at"] = None
+        if "cover_image_url" in update_data and update_data["cover_image_url"] != post.cover_image_url:
+            update_data["cover_image_variants"] = None
+            if update_data["cover_image_url"]:
+                self.new_covers[post.id] = update_data["cover_image_url"]
+            else:
+                self.new_covers.pop(post.id, None)
+
+        for key, value in update_data.items():
+            setattr(post, key, value)
+        apply_rendered_content(post)
+        post.updated_at = self.now
+        if "tags" in update_data:
+            self.tags[post.id] = post.tags
+        self.touched.add(post.id)
+        self.reindex.add(post.id)
+        return post.id, post.slug
+
+    def _plan_delete(self, op) -> Tuple[str, Optional[str]]:
+        post = self._existing(op.post_id)
+        self.unindex.add(post.id)
+        self.reindex.discard(post.id)
+        self.touched.add(post.id)
+        if op.soft_delete:
+            post.deleted = True
+            post.updated_at = self.now
+        else:
+            self.hard_deleted.add(post.id)
+            self.touched.discard(post.id)
+            self.tags.pop(post.id, None)
+            self.new_covers.pop(post.id, None)
+            del self.posts[post.id]
+        return post.id, post.slug
+
+    def _plan_pin(self, op) -> Tuple[str, str]:
+        post = self._existing(op.post_id, allow_deleted=False)
+        post.pinned = op.op == "pin"
+        # The ETag and Last-Modified of the post derive from updated_at
+        post.updated_at = self.now
+        self.touched.add(post.id)
+        return post.id, post.slug
+
+    _plan_unpin = _plan_pin
+
+    async def _write(self) -> None:
+        db = self.db
+        if self.created:
+            rows = [
+                {column.key: getattr(post, column.key) for column in Post.__table__.columns
+                 if column.key not in ("created_at", "updated_at", "cover_image_variants")}
+                for post in self.created.values()
+            ]
+            await db.execute(insert(Post), rows)
+        # Updates, soft deletes and pins are flushed together
+        await db.flush()
+        if self.hard_deleted:
+            hard_deleted = list(self.hard_deleted)
+            await db.execute(delete(PostTag).where(PostTag.post_id.in_(hard_deleted)))
+            await db.execute(delete(Post).where(Post.id.in_(hard_deleted)))
+        await replace_post_tags(db, self.tags)
+
+        search = get_search_backend()
+        await search.remove_posts(db, self.unindex | self.hard_deleted)
+        await search.index_posts(db, [self.created.get(post_id) or self.posts[post_id] for post_id in self.reindex])
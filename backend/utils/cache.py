@@ -0,0 +1,348 @@
+import asyncio
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, AsyncContextManager, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+from core.config import settings
+
+if TYPE_CHECKING:
+    from utils.http_cache import CachedResponse
+
+_MISSING = object()
+
+# Locks of backends that are not shared between workers
+_LOCAL_LOCKS: Dict[str, asyncio.Lock] = {}
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend:
+    """Async key/value store holding serialized responses."""
+
+    name = "base"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def lock(self, name: str, timeout: float) -> AsyncContextManager:
+        """A lock on `name`, released after `timeout` seconds if its holder dies.
+
+        Only excludes other tasks of this worker; RedisCache excludes every
+        worker sharing the server.
+        """
+        return _LOCAL_LOCKS.setdefault(name, asyncio.Lock())
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class NullCache(CacheBackend):
+    """Backend that never stores anything; used when caching is disabled."""
+
+    name = "none"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    async def incr(self, key: str) -> int:
+        return 0
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU + TTL backend. Invalidation only reaches this worker."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 60.0, max_counters: int = 1024):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counters: "OrderedDict[str, int]" = OrderedDict()
+        self.max_counters = max_counters
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._counters:
+                self._counters.move_to_end(key)
+                return str(self._counters[key]).encode()
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._entries.set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.delete(key)
+
+    async def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            self._counters.move_to_end(key)
+            if len(self._counters) > self.max_counters:
+                # An evicted counter restarts from zero, and entries keyed on
+                # its old values could be served again; drop them all
+                self._counters.popitem(last=False)
+                self._entries.clear()
+            return self._counters[key]
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+    """Backend speaking the Redis protocol, shared by every worker.
+
+    Pass `client` to use any `redis.asyncio.Redis`-compatible object, e.g.
+    `fakeredis.aioredis.FakeRedis()` for local runs (locks need `fakeredis[lua]`).
+    """
+
+    name = "redis"
+
+    def __init__(self, url: Optional[str] = None, client=None):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self.client.set(key, value, ex=int(ttl) if ttl else None)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    def lock(self, name: str, timeout: float) -> AsyncContextManager:
+        return self.client.lock(name, timeout=timeout)
+
+
+class PostState(NamedTuple):
+    """What a post looked like to the public API at one point in time."""
+    slug: str
+    type: str
+    public: bool
+    tags: Tuple[str, ...] = ()
+
+
+def post_state(post) -> PostState:
+    # utils.tags imports the models, and db.database imports this module (via the query profiler)
+    from utils.tags import normalize_tags
+
+    post_type = post.type.value if hasattr(post.type, "value") else post.type
+    status = post.status.value if hasattr(post.status, "value") else post.status
+    return PostState(post.slug, post_type, status == "published" and not post.deleted, tuple(normalize_tags(post.tags)))
+
+
+class ResponseCache:
+    """Read-through cache for the public post endpoints.
+
+    Single posts are cached under their id and slug and deleted on write.
+    List keys embed a generation number per post type (plus one for
+    untyped lists), so a write only bumps the generations of the lists the
+    post could appear in.
+    """
+
+    ALL_TYPES = "*"
+
+    def __init__(self, backend: CacheBackend, ttl: float = 60.0, prefix: str = "posts:", replica_lag: float = 0.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        # How long after a write replicas may still serve the old rows; what
+        # they return in that window is not cached
+        self.replica_lag = replica_lag
+        self.hits = 0
+        self.misses = 0
+        # Called with the changes of every invalidation, e.g. to republish snapshots
+        self.listeners: List[Callable[[Dict[str, List[PostState]]], None]] = []
+        # Called with the new list generation after each of this worker's bumps
+        self.generation_listeners: List[Callable[[int], None]] = []
+
+    @staticmethod
+    def _digest(params: Dict[str, Any]) -> str:
+        payload = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    # Representations of a single post, each cached under its own key
+    POST_FORMATS = ("json", "html")
+
+    def post_key(self, id_or_slug: str, format: str = "json") -> str:
+        suffix = "" if format == "json" else f":{format}"
+        return f"{self.prefix}post:{id_or_slug}{suffix}"
+
+    def _generation_key(self, post_type: Optional[str]) -> str:
+        return f"{self.prefix}gen:{post_type or self.ALL_TYPES}"
+
+    async def generation(self, post_type: Optional[str] = None) -> str:
+        """Changes whenever a post in lists of `post_type` (default: any list) changes."""
+        generation = await self.backend.get(self._generation_key(post_type))
+        return generation.decode() if generation else "0"
+
+    async def list_key(self, kind: str, post_type: Optional[str], params: Dict[str, Any]) -> str:
+        generation = await self.generation(post_type)
+        return f"{self.prefix}{kind}:{post_type or self.ALL_TYPES}:{generation}:{self._digest(params)}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def lock(self, name: str, timeout: float) -> AsyncContextManager:
+        """A lock on `name`, shared by the workers sharing the backend."""
+        return self.backend.lock(f"{self.prefix}lock:{name}", timeout)
+
+    @property
+    def _written_key(self) -> str:
+        return f"{self.prefix}written"
+
+    async def recently_written(self) -> bool:
+        """Whether any worker invalidated posts within the last `replica_lag` seconds."""
+        return bool(self.replica_lag) and await self.backend.get(self._written_key) is not None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None, from_replica: bool = False) -> None:
+        """Store a value, unless it was read from a replica that may not have a recent write yet."""
+        if from_replica and await self.recently_written():
+            return
+        await self.backend.set(key, value, self.ttl if ttl is None else ttl)
+
+    async def set_response(self, key: str, entry: "CachedResponse", from_replica: bool = False) -> "CachedResponse":
+        """Cache a response together with its compressed bodies and return the stored entry.
+
+        Compression happens once here, off the event loop, instead of on
+        every hit.
+        """
+        if isinstance(self.backend, NullCache) or (from_replica and await self.recently_written()):
+            return entry
+        if len(entry.body) >= settings.COMPRESSION_MIN_SIZE:
+            entry = await asyncio.to_thread(entry.precompressed)
+        await self.backend.set(key, entry.pack(), self.ttl)
+        return entry
+
+    async def invalidate_post(self, post_id: str, *states: PostState) -> None:
+        """Drop cached copies of a post given its state before and/or after a write."""
+        await self.invalidate_posts({post_id: states})
+
+    async def invalidate_posts(self, changes: Dict[str, Iterable[PostState]]) -> None:
+        """Like `invalidate_post` for many posts, bumping each list generation once."""
+        changes = {post_id: list(states) for post_id, states in changes.items()}
+        for listener in self.listeners:
+            listener(changes)
+        if self.replica_lag:
+            # Set before the keys go, so no replica read refills them with old rows
+            await self.backend.set(self._written_key, b"1", math.ceil(self.replica_lag))
+        keys = set()
+        types = set()
+        for post_id, states in changes.items():
+            for format in self.POST_FORMATS:
+                keys.add(self.post_key(post_id, format))
+                keys.update(self.post_key(state.slug, format) for state in states)
+            for state in states:
+                if state.public:
+                    types.add(state.type)
+        if keys:
+            await self.backend.delete(*sorted(keys))
+        if types:
+            for post_type in sorted(types):
+                await self.backend.incr(self._generation_key(post_type))
+            generation = await self.backend.incr(self._generation_key(None))
+            for listener in self.generation_listeners:
+                listener(generation)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "entries": self.backend.size(),
+        }
+
+
+def create_cache_backend(name: str) -> CacheBackend:
+    if name == "memory":
+        return MemoryCache(maxsize=settings.CACHE_MAX_ENTRIES, ttl=settings.CACHE_TTL_SECONDS)
+    if name == "redis":
+        return RedisCache(url=settings.CACHE_URL)
+    if name == "none":
+        return NullCache()
+    raise ValueError(f"Unknown cache backend: {name}")
+
+
+response_cache = ResponseCache(
+    create_cache_backend(settings.CACHE_BACKEND),
+    ttl=settings.CACHE_TTL_SECONDS,
+    replica_lag=settings.READ_YOUR_WRITES_SECONDS if settings.DATABASE_REPLICA_URLS.strip() else 0.0,
+)
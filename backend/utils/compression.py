@@ -0,0 +1,224 @@
+import gzip
+import logging
+import zlib
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Content types worth compressing; images and archives are already compressed
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "text/", "image/svg+xml")
+
+
+class StreamCompressor(NamedTuple):
+    process: Callable[[bytes], bytes]
+    finish: Callable[[], bytes]
+
+
+class Codec(NamedTuple):
+    """One content coding: one-shot compression plus a streaming compressor."""
+    name: str
+    compress: Callable[[bytes, int], bytes]
+    stream: Callable[[int], StreamCompressor]
+
+
+def _gzip_stream(level: int) -> StreamCompressor:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return StreamCompressor(
+        # Sync-flush each chunk so streamed responses reach the client promptly
+        lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def _load_codecs() -> Dict[str, Codec]:
+    codecs = {
+        "gzip": Codec("gzip", lambda data, level: gzip.compress(data, compresslevel=level, mtime=0), _gzip_stream),
+    }
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        def brotli_stream(level: int) -> StreamCompressor:
+            compressor = brotli.Compressor(quality=level)
+            return StreamCompressor(lambda data: compressor.process(data) + compressor.flush(), compressor.finish)
+
+        codecs["br"] = Codec("br", lambda data, level: brotli.compress(data, quality=level), brotli_stream)
+    try:
+        import zstandard
+    except ImportError:
+        pass
+    else:
+        def zstd_stream(level: int) -> StreamCompressor:
+            compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            return StreamCompressor(
+                lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+                compressor.flush,
+            )
+
+        codecs["zstd"] = Codec(
+            "zstd", lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), zstd_stream
+        )
+    return codecs
+
+
+CODECS = _load_codecs()
+
+
+def enabled_encodings() -> List[str]:
+    """Configured encodings in preference order, minus those whose package is missing."""
+    missing = [name for name in settings.COMPRESSION_ENCODINGS if name not in CODECS]
+    if missing:
+        logger.debug(f"Compression encodings unavailable (install the 'compression' extra): {missing}")
+    return [name for name in settings.COMPRESSION_ENCODINGS if name in CODECS]
+
+
+def negotiate(accept_encoding: Optional[str], encodings: Iterable[str]) -> Optional[str]:
+    """Pick the first of `encodings` the client accepts (RFC 9110 12.5.3).
+
+    The server's preference order wins among acceptable encodings, which is
+    how browsers expect `br` to be chosen over `gzip`. Returns None for the
+    identity encoding.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    for name in encodings:
+        if weights.get(name, weights.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if level is None:
+        level = settings.COMPRESSION_LEVELS[encoding]
+    return CODECS[encoding].compress(data, level)
+
+
+def precompress(data: bytes) -> Dict[str, bytes]:
+    """Compress a body once per enabled encoding, for storing in the response cache.
+
+    Uses COMPRESSION_CACHED_LEVELS, which can afford to be higher than the
+    per-request levels since hits reuse the result.
+    """
+    if len(data) < settings.COMPRESSION_MIN_SIZE:
+        return {}
+    return {
+        encoding: compress(data, encoding, settings.COMPRESSION_CACHED_LEVELS[encoding])
+        for encoding in enabled_encodings()
+    }
+
+
+def weak_etag(etag: str) -> str:
+    # A strong validator must change with the content coding (RFC 9110 8.8.1)
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts.
+
+    Bodies below `minimum_size` and non-text content types are sent as is.
+    Responses that already carry a Content-Encoding, such as precompressed
+    cache hits, are passed through untouched. Streaming responses are
+    compressed chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Optional[List[str]] = None,
+        minimum_size: int = 1024,
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.encodings = enabled_encodings() if encodings is None else encodings
+        self.minimum_size = minimum_size
+        self.levels = levels if levels is not None else settings.COMPRESSION_LEVELS
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        await _CompressedResponder(self, encoding, send).run(scope, receive)
+
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: Optional[str], send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.compressor: Optional[StreamCompressor] = None
+        self.passthrough = False
+
+    async def run(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self.on_send)
+
+    async def on_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            compressible = is_compressible(headers.get("content-type"))
+            vary = {value.strip().lower() for value in headers.get("vary", "").split(",")}
+            if compressible and "content-encoding" not in headers and "accept-encoding" not in vary:
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            self.passthrough = not compressible or "content-encoding" in headers or self.encoding is None
+            self.start = message
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        level = self.middleware.levels[self.encoding]
+        if self.compressor is None:
+            if not more_body:
+                # Whole body in one message
+                if len(body) < self.middleware.minimum_size:
+                    await self.send(self.start)
+                    await self.send(message)
+                    return
+                await self._send_start(content_length=True, body=compress(body, self.encoding, level))
+                return
+            self.compressor = CODECS[self.encoding].stream(level)
+            await self._send_start(content_length=False)
+
+        chunk = self.compressor.process(body) if body else b""
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _send_start(self, content_length: bool, body: Optional[bytes] = None) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        if "etag" in headers:
+            headers["ETag"] = weak_etag(headers["etag"])
+        if content_length:
+            headers["Content-Length"] = str(len(body))
+        elif "content-length" in headers:
+            del headers["Content-Length"]
+        await self.send(self.start)
+        if body is not None:
+            await self.send({"type": "http.response.body", "body": body, "more_body": False})
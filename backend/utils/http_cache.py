@@ -0,0 +1,107 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, NamedTuple, Optional
+from fastapi import Request, Response
+from core.config import settings
+from utils.compression import negotiate, precompress, weak_etag
+
+class CachedResponse(NamedTuple):
+    """A serialized response body together with its validators.
+
+    `encoded` holds the body already compressed per content coding, so
+    cache hits are served without compressing again.
+    """
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime] = None
+    encoded: Optional[Dict[str, bytes]] = None
+
+    def precompressed(self) -> "CachedResponse":
+        return self._replace(encoded=precompress(self.body))
+
+    def pack(self) -> bytes:
+        encoded = self.encoded or {}
+        header = {
+            "etag": self.etag,
+            "last_modified": self.last_modified.isoformat() if self.last_modified else None,
+            # Lengths of the identity body and each encoded body, in order
+            "parts": [["identity", len(self.body)]] + [[name, len(data)] for name, data in encoded.items()],
+        }
+        return b"".join([json.dumps(header).encode(), b"\n", self.body, *encoded.values()])
+
+    @classmethod
+    def unpack(cls, raw: bytes) -> "CachedResponse":
+        header, payload = raw.split(b"\n", 1)
+        header = json.loads(header)
+        last_modified = header["last_modified"]
+        parts, offset = {}, 0
+        for name, length in header.get("parts", [["identity", len(payload)]]):
+            parts[name] = payload[offset:offset + length]
+            offset += length
+        body = parts.pop("identity")
+        return cls(
+            body=body,
+            etag=header["etag"],
+            last_modified=datetime.fromisoformat(last_modified) if last_modified else None,
+            encoded=parts or None,
+        )
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """SQLite hands back naive datetimes; they are stored in UTC."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the given version parts."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since (RFC 9110 13.2.2)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses the weak comparison function
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return as_utc(last_modified).replace(microsecond=0) <= as_utc(since)
+    return False
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": settings.POSTS_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(as_utc(last_modified), usegmt=True)
+    return headers
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
+
+def conditional_response(request: Request, cached: CachedResponse) -> Response:
+    """Return 304 when the client copy is current, otherwise the full body."""
+    if is_not_modified(request, cached.etag, cached.last_modified):
+        return not_modified_response(cached.etag, cached.last_modified)
+    headers = cache_headers(cached.etag, cached.last_modified)
+    encoding = negotiate(request.headers.get("accept-encoding"), cached.encoded or ())
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        headers["ETag"] = weak_etag(cached.etag)
+        return Response(content=cached.encoded[encoding], media_type="application/json", headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
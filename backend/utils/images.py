@@ -0,0 +1,201 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import posixpath
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from core.config import settings
+from db.database import WriteSessionLocal
+from models.post import Post
+from utils.cache import TTLCache, post_state, response_cache
+from utils.s3 import S3Service, s3_service
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+
+# Variant objects never change once written, so browsers and CDNs may keep them
+VARIANT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def variant_key(source_key: str, width: int, image_format: str) -> str:
+    """Deterministic key of one variant: posts/<id>.png -> posts/<id>/640w.webp"""
+    stem, _ = posixpath.splitext(source_key)
+    return f"{stem}/{width}w.{image_format}"
+
+
+def render_variants(
+    data: bytes,
+    widths: Sequence[int],
+    formats: Sequence[str],
+    quality: int
+) -> List[Tuple[int, int, str, bytes]]:
+    """Resize and re-encode an image; returns (width, height, format, bytes) tuples.
+
+    Runs in a worker process. Widths wider than the original are skipped,
+    but the smallest requested width is always produced.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError as e:
+        raise RuntimeError("Image variants require the 'images' extra (Pillow)") from e
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+    targets = sorted({w for w in widths if w < image.width} or {min(min(widths), image.width)})
+    variants = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for image_format in formats:
+            out = io.BytesIO()
+            resized.save(out, format=image_format.upper(), quality=quality)
+            variants.append((width, height, image_format, out.getvalue()))
+    return variants
+
+
+class ImageProcessor:
+    """Generates cover image variants in a process pool and stores them in S3.
+
+    Results are remembered per source URL for a while, so the variants
+    started right after an upload are reused when the image is attached to
+    a post. Regenerating is harmless since the keys are deterministic.
+    """
+
+    def __init__(
+        self,
+        storage: S3Service,
+        widths: Sequence[int],
+        formats: Sequence[str],
+        quality: int = 80,
+        max_workers: int = 2
+    ):
+        self.storage = storage
+        self.widths = list(widths)
+        self.formats = [f.lower() for f in formats]
+        self.quality = quality
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._results = TTLCache(maxsize=256, ttl=600)
+
+    @property
+    def enabled(self) -> bool:
+        if not self.widths or not self.formats:
+            return False
+        try:
+            from PIL import features
+        except ImportError:
+            return False
+        return all(features.check(f) for f in self.formats)
+
+    def owns(self, url: Optional[str]) -> bool:
+        return bool(url) and url.startswith(self.storage.base_url)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs DB and bcrypt threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def _generate(self, source_url: str) -> List[Dict[str, Any]]:
+        source_key = self.storage.key_from_url(source_url)
+        response = await asyncio.to_thread(
+            self.storage.s3_client.get_object, Bucket=self.storage.bucket_name, Key=source_key
+        )
+        data = await asyncio.to_thread(response["Body"].read)
+        rendered = await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), render_variants, data, self.widths, self.formats, self.quality
+        )
+        del data
+
+        variants = []
+        for width, height, image_format, body in rendered:
+            key = variant_key(source_key, width, image_format)
+            await asyncio.to_thread(
+                self.storage.s3_client.put_object,
+                Bucket=self.storage.bucket_name,
+                Key=key,
+                Body=body,
+                ContentType=CONTENT_TYPES.get(image_format, f"image/{image_format}"),
+                CacheControl=VARIANT_CACHE_CONTROL,
+            )
+            variants.append({
+                "url": self.storage.public_url(key),
+                "width": width,
+                "height": height,
+                "format": image_format,
+            })
+        return variants
+
+    async def variants_for(self, source_url: str) -> Optional[List[Dict[str, Any]]]:
+        """Variants of an image in our bucket, generating them if needed.
+
+        Returns None when variants are disabled, the URL points elsewhere or
+        the image cannot be processed.
+        """
+        if not self.enabled or not self.owns(source_url):
+            return None
+        cached = self._results.get(source_url)
+        if cached is not None:
+            return cached
+        task = self._tasks.get(source_url)
+        if task is None:
+            task = asyncio.ensure_future(self._generate(source_url))
+            self._tasks[source_url] = task
+            task.add_done_callback(lambda _: self._tasks.pop(source_url, None))
+        try:
+            variants = await asyncio.shield(task)
+        except Exception as e:
+            logger.warning(f"Could not generate variants for {source_url}: {e}")
+            return None
+        self._results.set(source_url, variants)
+        return variants
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+image_processor = ImageProcessor(
+    s3_service,
+    widths=settings.IMAGE_VARIANT_WIDTHS,
+    formats=settings.IMAGE_VARIANT_FORMATS,
+    quality=settings.IMAGE_VARIANT_QUALITY,
+    max_workers=settings.IMAGE_PROCESS_WORKERS,
+)
+
+
+async def attach_cover_variants(post_id: str, cover_url: str) -> bool:
+    """Generate variants for a post's cover and store them on the post.
+
+    Runs as a background task after the post is saved, and from the
+    backfill command. Returns True if the post was updated.
+    """
+    variants = await image_processor.variants_for(cover_url)
+    if variants is None:
+        return False
+    async with WriteSessionLocal() as db:
+        post = (await db.execute(select(Post).where(Post.id == post_id))).scalar_one_or_none()
+        # The cover may have been replaced while the variants were generated
+        if post is None or post.cover_image_url != cover_url:
+            return False
+        post.cover_image_variants = variants
+        post.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+    await response_cache.invalidate_post(post.id, post_state(post))
+    return True
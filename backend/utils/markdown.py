@@ -0,0 +1,123 @@
+import hashlib
+import math
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import nh3
+from markdown_it import MarkdownIt
+
+from utils.slug import slugify
+
+# Bump when the rendering or sanitizing rules change; every stored
+# content_hash then goes stale and `manage.py render-markdown` re-renders
+RENDERER_VERSION = "1"
+
+WORDS_PER_MINUTE = 200
+
+_md = MarkdownIt("commonmark", {"linkify": False}).enable(["table", "strikethrough"])
+
+_ALLOWED_ATTRIBUTES = {tag: set(attrs) for tag, attrs in nh3.ALLOWED_ATTRIBUTES.items()}
+for _heading in ("h1", "h2", "h3", "h4", "h5", "h6"):
+    _ALLOWED_ATTRIBUTES.setdefault(_heading, set()).add("id")
+_ALLOWED_ATTRIBUTES.setdefault("a", set()).add("title")
+_ALLOWED_ATTRIBUTES.setdefault("img", set()).add("title")
+_ALLOWED_ATTRIBUTES.setdefault("code", set()).add("class")
+
+_LANGUAGE_CLASS = re.compile(r"language-[\w+#-]+")
+
+
+class RenderedMarkdown(NamedTuple):
+    html: str
+    toc: List[Dict[str, Any]]  # [{"level": 2, "id": "step-1", "text": "Step 1"}, ...]
+    reading_time_minutes: int
+    content_hash: str
+
+
+def content_hash(content_md: Optional[str]) -> str:
+    """Digest of the Markdown source and the renderer version."""
+    return hashlib.sha256(f"{RENDERER_VERSION}\n{content_md or ''}".encode()).hexdigest()
+
+
+def _keep_attribute(element: str, attribute: str, value: str) -> Optional[str]:
+    # Only syntax-highlighting classes survive on <code>
+    if element == "code" and attribute == "class":
+        return value if _LANGUAGE_CLASS.fullmatch(value) else None
+    return value
+
+
+def sanitize_html(html: str) -> str:
+    """Strip everything but the tags and attributes rendered Markdown may use."""
+    return nh3.clean(
+        html,
+        attributes=_ALLOWED_ATTRIBUTES,
+        attribute_filter=_keep_attribute,
+        link_rel="noopener noreferrer nofollow",
+    )
+
+
+def render_markdown(content_md: Optional[str]) -> RenderedMarkdown:
+    """Render Markdown to sanitized HTML with anchored headings."""
+    source = content_md or ""
+    tokens = _md.parse(source)
+
+    toc = []
+    used_ids = set()
+    for position, token in enumerate(tokens):
+        if token.type != "heading_open":
+            continue
+        inline = tokens[position + 1]
+        text = "".join(child.content for child in inline.children or [] if child.type in ("text", "code_inline"))
+        base = slugify(text) or "section"
+        anchor, suffix = base, 0
+        while anchor in used_ids:
+            suffix += 1
+            anchor = f"{base}-{suffix}"
+        used_ids.add(anchor)
+        token.attrSet("id", anchor)
+        toc.append({"level": int(token.tag[1]), "id": anchor, "text": text})
+
+    html = sanitize_html(_md.renderer.render(tokens, _md.options, {}))
+    words = len(source.split())
+    return RenderedMarkdown(
+        html=html,
+        toc=toc,
+        reading_time_minutes=math.ceil(words / WORDS_PER_MINUTE) if words else 0,
+        content_hash=content_hash(source),
+    )
+
+
+def apply_rendered_content(post, force: bool = False) -> bool:
+    """Refresh a post's stored HTML, TOC and reading time if its Markdown changed.
+
+    Returns True when the post was re-rendered.
+    """
+    if not force and post.content_hash == content_hash(post.content_md):
+        return False
+    rendered = render_markdown(post.content_md)
+    post.content_html = rendered.html
+    post.content_toc = rendered.toc
+    post.reading_time_minutes = rendered.reading_time_minutes
+    post.content_hash = rendered.content_hash
+    return True
+
+
+def adopt_rendered_content(
+    post,
+    content_html: Optional[str],
+    content_toc: Optional[List[Dict[str, Any]]],
+    reading_time_minutes: Optional[int],
+    stored_hash: Optional[str],
+) -> bool:
+    """Reuse a rendering made elsewhere, such as an export, if it is current.
+
+    The HTML is sanitized again rather than trusted; a rendering of other
+    Markdown or by another renderer version is discarded and the post is
+    rendered afresh. Returns True when the post had to be re-rendered.
+    """
+    if content_html is None or stored_hash != content_hash(post.content_md):
+        return apply_rendered_content(post, force=True)
+    post.content_html = sanitize_html(content_html)
+    post.content_toc = content_toc or []
+    post.reading_time_minutes = reading_time_minutes
+    post.content_hash = stored_hash
+    return False
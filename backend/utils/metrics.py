@@ -0,0 +1,335 @@
+import bisect
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Prometheus' default buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """A value that goes up and down; pass `function` to read it at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def samples(self) -> Iterable[str]:
+        if self._function is not None:
+            values = list(self._function().items())
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        for labelvalues, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labelvalues -> [per-bucket counts (non-cumulative)..., sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * len(self.buckets) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, *labelvalues: str) -> "_Timer":
+        return _Timer(self, labelvalues)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            series = [(labelvalues, list(values)) for labelvalues, values in self._series.items()]
+        for labelvalues, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {_format_value(values[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labelvalues)} {cumulative}"
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labelvalues: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, *self.labelvalues)
+
+
+class MetricsRegistry:
+    """Metrics of this worker process, rendered in the Prometheus text format.
+
+    Observations are a dict lookup and a counter increment under a lock, so
+    instrumentation is cheap enough to leave on. Each worker keeps its own
+    numbers; scrape every worker (or run one) to see them all.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), function=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ["method"]
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status",
+    ["method", "route", "status"],
+)
+db_pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time to check out a pooled connection, including opening new ones",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+db_pool_checkout_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total", "Connection checkouts that hit pool_timeout"
+)
+db_read_sessions = registry.counter(
+    "db_read_sessions_total", "Sessions opened for public reads, by the database serving them", ["database"]
+)
+db_replica_failures = registry.counter(
+    "db_replica_failures_total", "Replica queries and health checks that could not reach the replica", ["database"]
+)
+s3_request_duration = registry.histogram(
+    "s3_request_duration_seconds", "S3 API call latency", ["operation", "outcome"]
+)
+snapshot_publish_duration = registry.histogram(
+    "snapshot_publish_duration_seconds", "Time to publish one batch of snapshot changes", ["kind"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+snapshot_documents = registry.counter(
+    "snapshot_documents_total", "Snapshot documents written and deleted", ["operation"]
+)
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "Time bcrypt spends per call on the hashing pool", ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0),
+)
+password_hash_queue_wait = registry.histogram(
+    "password_hash_queue_wait_seconds", "Time a bcrypt call waits for a free hashing thread",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """The default async pool, recording how long each checkout waits."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_checkout_timeouts.inc()
+            raise
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started)
+
+
+# Pools log through a logger named after their class; keep this one as quiet
+# as SQLAlchemy keeps its own "sqlalchemy" loggers unless echo_pool is set
+logging.getLogger(f"{__name__}.{TimedQueuePool.__name__}").setLevel(logging.WARNING)
+
+
+def register_pool_gauges(engines: Callable[[], Dict[str, object]]) -> None:
+    """Expose pool size, checked-out and overflow counts per engine, read at scrape time.
+
+    `engines` returns the open engines by name (the `database` label), so
+    engines created after registration are picked up by the next scrape.
+    """
+    def stat(method: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+        def read() -> Dict[Tuple[str, ...], float]:
+            # Looked up on every scrape since engine.dispose() replaces the pool
+            pools = {name: engine.sync_engine.pool for name, engine in engines().items()}
+            return {(name,): float(getattr(pool, method)()) for name, pool in pools.items() if hasattr(pool, method)}
+        return read
+
+    registry.gauge("db_pool_size", "Configured pool size", ["database"], function=stat("size"))
+    registry.gauge("db_pool_checked_out", "Connections currently checked out", ["database"], function=stat("checkedout"))
+    registry.gauge("db_pool_checked_in", "Idle connections in the pool", ["database"], function=stat("checkedin"))
+    # Negative while the pool has not yet opened pool_size connections
+    registry.gauge("db_pool_overflow", "Connections open beyond pool_size", ["database"], function=stat("overflow"))
+
+
+def instrument_boto_client(client) -> None:
+    """Time every call a boto3 S3 client makes, by operation and outcome."""
+    def before_call(context, **kwargs):
+        context["metrics_started"] = time.perf_counter()
+
+    def observe(event_name: str, context, outcome: str) -> None:
+        started = context.pop("metrics_started", None)
+        if started is not None:
+            operation = event_name.rsplit(".", 1)[-1]
+            s3_request_duration.observe(time.perf_counter() - started, operation, outcome)
+
+    def after_call(event_name, http_response, context, **kwargs):
+        observe(event_name, context, "ok" if http_response.status_code < 300 else "error")
+
+    def after_call_error(event_name, context, **kwargs):
+        # Connection-level failures; botocore may retry and call again
+        observe(event_name, context, "error")
+
+    events = client.meta.events
+    events.register("before-call.s3", before_call)
+    events.register("after-call.s3", after_call)
+    events.register("after-call-error.s3", after_call_error)
+
+
+class MetricsMiddleware:
+    """Records in-flight requests and latency per route template.
+
+    Requests that match no route are labelled "unmatched" so scanners
+    cannot blow up the number of series.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method)
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(time.perf_counter() - started, method, template, str(status_code))
@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import Select, and_, desc, or_, select
+from models.post import Post, PostStatus, PostType
+from utils.tags import tag_filter
+
+# Posts the public API shows
+VISIBLE = (Post.status == PostStatus.published, Post.deleted == False)
+# Sort order of the public listing, served by the ix_posts_listing index.
+# NULLS LAST is spelled out: it is SQLite's default for DESC but not Postgres'
+LISTING_ORDER = (desc(Post.pinned), desc(Post.published_at).nulls_last(), desc(Post.id))
+# Narrow columns fetched for a page before the full rows are loaded; the
+# listing indexes cover all of them
+PAGE_COLUMNS = (Post.id, Post.pinned, Post.published_at, Post.updated_at, Post.created_at)
+
+def listing_query(type: Optional[PostType] = None, tags: Optional[List[str]] = None, tag_match: str = "all") -> Select:
+    """The unordered page query of the public listing: published, not deleted posts."""
+    query = select(*PAGE_COLUMNS).where(*VISIBLE)
+    if type:
+        query = query.where(Post.type == type)
+    if tags:
+        query = query.where(tag_filter(tags, tag_match))
+    return query
+
+def encode_cursor(post: Post) -> str:
+    """Encode the (pinned, published_at, id) sort key of a post as an opaque cursor."""
+    published_at = post.published_at.isoformat() if post.published_at else None
+    payload = json.dumps([bool(post.pinned), published_at, post.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[bool, Optional[datetime], str]:
+    """Decode a cursor produced by `encode_cursor`; raises ValueError when malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        pinned, published_at, post_id = json.loads(base64.urlsafe_b64decode(padded))
+        if published_at is not None:
+            published_at = datetime.fromisoformat(published_at)
+        return bool(pinned), published_at, str(post_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def keyset_filter(cursor: str):
+    """Seek past the cursor for LISTING_ORDER: pinned DESC, published_at DESC NULLS LAST, id DESC."""
+    pinned, published_at, post_id = decode_cursor(cursor)
+    if published_at is None:
+        # Published posts normally always carry published_at; those that do
+        # not come last, in id order
+        same_pinned = and_(Post.published_at.is_(None), Post.id < post_id)
+    else:
+        same_pinned = or_(
+            Post.published_at < published_at,
+            and_(Post.published_at == published_at, Post.id < post_id),
+            Post.published_at.is_(None),
+        )
+    same_pinned = and_(Post.pinned == pinned, same_pinned)
+    if pinned:
+        # Unpinned posts all sort after the pinned ones
+        return or_(Post.pinned == False, same_pinned)
+    return same_pinned
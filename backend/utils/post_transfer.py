@@ -0,0 +1,225 @@
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.database import SessionLocal
+from models.post import Post, PostStatus, PostType
+from models.post_tag import PostTag
+from schemas.post import ImportLineError, ImportResponse, PostImport
+from utils.cache import post_state, response_cache
+from utils.compression import CODECS
+from utils.markdown import adopt_rendered_content
+from utils.responses import dumps
+from utils.search import get_search_backend
+from utils.slug import SLUG_RETRY_ATTEMPTS, SlugAllocator
+from utils.tags import normalize_tags
+
+EXPORT_BATCH_SIZE = 500
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ERRORS = 100
+# Longest accepted line, which bounds what an import buffers
+IMPORT_MAX_LINE_BYTES = 8 * 1024 * 1024
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+async def export_posts(
+    status: Optional[PostStatus] = None,
+    post_type: Optional[PostType] = None,
+    include_deleted: bool = True,
+    compress: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yield every matching post as NDJSON, drafts and soft-deleted posts included.
+
+    Rows are streamed `batch_size` at a time (a server-side cursor on
+    Postgres, fetchmany on SQLite) in primary key order, so memory stays
+    flat however many posts there are. Each line holds every column,
+    rendered HTML included, which `PostImporter` can reuse. The session is
+    opened here rather than taken from a request dependency, since it must
+    outlive the endpoint while the response streams.
+    """
+    query = select(*Post.__table__.columns).order_by(Post.id)
+    if status:
+        query = query.where(Post.status == status)
+    if post_type:
+        query = query.where(Post.type == post_type)
+    if not include_deleted:
+        query = query.where(Post.deleted == False)
+
+    compressor = CODECS["gzip"].stream(6) if compress else None
+    async with SessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            chunk = b"".join(dumps(row._asdict()) + b"\n" for row in rows)
+            yield compressor.process(chunk) if compressor else chunk
+    if compressor:
+        yield compressor.finish()
+
+
+async def ndjson_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines, gunzipping it first if it is gzip.
+
+    Raises ValueError for a line longer than IMPORT_MAX_LINE_BYTES.
+    """
+    decompressor = None
+    first = True
+    pending = b""
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if first:
+            first = False
+            if chunk.startswith(_GZIP_MAGIC):
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if decompressor:
+            chunk = decompressor.decompress(chunk)
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+        if len(pending) > IMPORT_MAX_LINE_BYTES:
+            raise ValueError(f"Line longer than {IMPORT_MAX_LINE_BYTES} bytes")
+    if decompressor:
+        pending += decompressor.flush()
+    for line in pending.split(b"\n"):
+        yield line
+
+
+class PostImporter:
+    """Bulk-inserts posts from NDJSON, one transaction per chunk of lines.
+
+    Each chunk costs a handful of statements: one lookup of the ids that
+    already exist (those lines are skipped, so re-running an import is
+    safe), one query for the taken slugs, and executemany INSERTs for posts
+    and tag rows. Exported slugs are kept when free; otherwise one is
+    allocated from the title. A rendering that matches the Markdown is
+    reused, so importing an export does not render every post again.
+
+    Invalid lines are reported and skipped; chunks committed before a
+    failure stay committed.
+    """
+
+    def __init__(self, db: AsyncSession, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors: List[ImportLineError] = []
+
+    async def run(self, lines: AsyncIterable[bytes]) -> ImportResponse:
+        chunk: List[PostImport] = []
+        completed = True
+        line_number = 0
+        try:
+            async for line in lines:
+                line_number += 1
+                if not line.strip():
+                    continue
+                try:
+                    chunk.append(PostImport.model_validate_json(line))
+                except ValidationError as e:
+                    error = e.errors()[0]
+                    location = ".".join(str(part) for part in error["loc"])
+                    self._fail(line_number, f"{location}: {error['msg']}" if location else error["msg"])
+                    continue
+                if len(chunk) >= self.chunk_size:
+                    await self._import_chunk(chunk)
+                    chunk = []
+            if chunk:
+                await self._import_chunk(chunk)
+        except (ValueError, zlib.error) as e:
+            # Unreadable input (too-long line, corrupt gzip); keep what was committed
+            await self.db.rollback()
+            self._fail(line_number + 1, str(e))
+            completed = False
+        return ImportResponse(
+            imported=self.imported,
+            skipped=self.skipped,
+            failed=self.failed,
+            completed=completed,
+            errors=self.errors,
+        )
+
+    def _fail(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append(ImportLineError(line=line, error=error))
+
+    async def _import_chunk(self, chunk: List[PostImport]) -> None:
+        for attempt in range(1, SLUG_RETRY_ATTEMPTS + 1):
+            try:
+                return await self._import_chunk_once(chunk)
+            except IntegrityError:
+                # A concurrent writer took one of the planned slugs; plan again
+                await self.db.rollback()
+                if attempt == SLUG_RETRY_ATTEMPTS:
+                    raise
+
+    async def _import_chunk_once(self, chunk: List[PostImport]) -> None:
+        db = self.db
+        given_ids = [item.id for item in chunk if item.id]
+        existing = set()
+        if given_ids:
+            existing = set(await db.scalars(select(Post.id).where(Post.id.in_(given_ids))))
+        # Exported slugs count as base slugs too, so custom slugs are checked exactly
+        slugs = await SlugAllocator.load(
+            db, [item.title for item in chunk] + [item.slug for item in chunk if item.slug]
+        )
+        now = datetime.now(timezone.utc)
+
+        posts: List[Post] = []
+        skipped = 0
+        for item in chunk:
+            if item.id in existing:
+                skipped += 1
+                continue
+            # Repeated ids within the chunk count as existing from here on
+            post_id = item.id or str(uuid.uuid4())
+            existing.add(post_id)
+            post = Post(
+                id=post_id,
+                slug=slugs.claim(item.slug, item.title),
+                title=item.title,
+                summary=item.summary,
+                content_md=item.content_md,
+                type=item.type,
+                status=item.status,
+                tags=item.tags or [],
+                cover_image_url=item.cover_image_url,
+                cover_image_variants=(
+                    [variant.model_dump() for variant in item.cover_image_variants]
+                    if item.cover_image_variants else None
+                ),
+                external_links=item.external_links or [],
+                published_at=item.published_at or (now if item.status == PostStatus.published else None),
+                created_at=item.created_at or now,
+                updated_at=item.updated_at,
+                deleted=item.deleted,
+                pinned=bool(item.pinned),
+            )
+            adopt_rendered_content(
+                post, item.content_html, item.content_toc, item.reading_time_minutes, item.content_hash
+            )
+            posts.append(post)
+
+        if posts:
+            await db.execute(insert(Post), [
+                {column.key: getattr(post, column.key) for column in Post.__table__.columns}
+                for post in posts
+            ])
+            tag_rows = [{"post_id": post.id, "tag": tag} for post in posts for tag in normalize_tags(post.tags)]
+            if tag_rows:
+                await db.execute(insert(PostTag), tag_rows)
+            await get_search_backend().add_posts(db, posts)
+        await db.commit()
+
+        self.imported += len(posts)
+        self.skipped += skipped
+        changes: Dict[str, list] = {post.id: [post_state(post)] for post in posts}
+        await response_cache.invalidate_posts(changes)
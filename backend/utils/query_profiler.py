@@ -0,0 +1,169 @@
+import logging
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Parameters of statements touching these tables are never logged or kept
+_REDACTED_TABLES = ("admin_users",)
+_MAX_PARAM_LENGTH = 200
+# Queries kept per request for the timeline; later ones are only counted
+_MAX_RECORDS = 500
+
+
+class QueryRecord(NamedTuple):
+    offset_ms: float  # since the request started
+    duration_ms: float
+    statement: str
+    parameters: str
+    executemany: bool
+
+
+class RequestProfile:
+    """The SQL one request issued, in order."""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total_ms = 0.0
+        self.records: List[QueryRecord] = []
+        self.statements: Counter = Counter()
+
+    def add(self, started: float, duration: float, statement: str, parameters: str, executemany: bool) -> None:
+        self.count += 1
+        self.total_ms += duration * 1000
+        self.statements[statement] += 1
+        if len(self.records) < _MAX_RECORDS:
+            self.records.append(QueryRecord(
+                round((started - self.started) * 1000, 3), round(duration * 1000, 3),
+                statement, parameters, executemany,
+            ))
+
+    def repeated(self, threshold: int) -> List[tuple]:
+        """Statements run at least `threshold` times: likely N+1 loops."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "query_count": self.count,
+            "query_ms": round(self.total_ms, 3),
+            "repeated": [
+                {"statement": statement, "count": count}
+                for statement, count in self.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+            ],
+            "queries": [record._asdict() for record in self.records],
+        }
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+# Recent request profiles by id, for GET /debug/queries/{id}
+recent_profiles = TTLCache(maxsize=200, ttl=600)
+
+
+def _format_parameters(statement: str, parameters: Any) -> str:
+    if any(table in statement for table in _REDACTED_TABLES):
+        return "<redacted>"
+    text = repr(parameters)
+    return text if len(text) <= _MAX_PARAM_LENGTH else text[:_MAX_PARAM_LENGTH] + "..."
+
+
+def install_query_profiler(engine) -> None:
+    """Time every statement on `engine`, attribute it to the current request and log slow ones.
+
+    The cursor events run inside the greenlet that carries the awaiting
+    task's context, so `current_profile` is the request that issued them.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        duration = time.perf_counter() - started
+        profile = current_profile.get()
+        slow = duration * 1000 >= settings.SQL_SLOW_QUERY_MS
+        if profile is None and not slow:
+            return
+        formatted = _format_parameters(statement, parameters)
+        if profile is not None:
+            profile.add(started, duration, statement, formatted, executemany)
+        if slow:
+            where = f" [{profile.method} {profile.path}]" if profile else ""
+            logger.warning(f"Slow query ({duration * 1000:.1f}ms){where}: {statement} -- parameters: {formatted}")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+class QueryProfilerMiddleware:
+    """Profiles the SQL of each request.
+
+    Adds `X-Query-Count`, `X-Query-Profile` (an id for
+    `GET /debug/queries/{id}`) and a `Server-Timing` db entry to responses,
+    and logs requests over SQL_QUERY_BUDGET or with repeated statements.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Query-Count"] = str(profile.count)
+                headers["X-Query-Profile"] = profile.id
+                headers.append("Server-Timing", f'db;dur={profile.total_ms:.1f};desc="{profile.count} queries"')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            route = scope.get("route")
+            profile.route = getattr(route, "path", None)
+            recent_profiles.set(profile.id, profile)
+            self._check(profile)
+
+    @staticmethod
+    def _check(profile: RequestProfile) -> None:
+        label = f"{profile.method} {profile.route or profile.path}"
+        if profile.count > settings.SQL_QUERY_BUDGET:
+            logger.warning(
+                f"{label} ran {profile.count} queries ({profile.total_ms:.1f}ms), "
+                f"over the budget of {settings.SQL_QUERY_BUDGET} (profile {profile.id})"
+            )
+        for statement, count in profile.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD):
+            logger.warning(f"Possible N+1 in {label}: statement ran {count} times: {statement}")
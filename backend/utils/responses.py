@@ -0,0 +1,30 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Z for UTC matches what Pydantic's model_dump_json emits
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode to JSON bytes with orjson.
+
+    Handles datetimes, enums, UUIDs and Pydantic models, so plain row data
+    can be encoded without going through jsonable_encoder.
+    """
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """The app's default response class."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
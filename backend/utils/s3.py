@@ -1,21 +1,72 @@
-import boto3
+import asyncio
+import logging
+import threading
 from botocore.exceptions import ClientError
 import uuid
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
 import os
 from core.config import settings
+from utils.metrics import instrument_boto_client
+from utils.uploads import UploadRejected, sniff_image_type
+
+logger = logging.getLogger(__name__)
 
 class S3Service:
-    def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
-        )
+    def __init__(self, client=None):
+        # Pass `client` to use a pre-built client, e.g. one created inside moto's mock_aws()
+        self._client = client
+        self._client_lock = threading.Lock()
+        if client is not None:
+            instrument_boto_client(client)
         self.bucket_name = settings.S3_BUCKET_NAME
         self.region = settings.AWS_REGION
 
+    @property
+    def s3_client(self):
+        """The boto3 client, built on first use.
+
+        Importing boto3 and building a client takes a few hundred
+        milliseconds, which processes that never upload should not pay at
+        startup. Calls come from worker threads, hence the lock.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import boto3
+
+                    client = boto3.client(
+                        's3',
+                        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                        region_name=settings.AWS_REGION,
+                        endpoint_url=settings.S3_ENDPOINT_URL
+                    )
+                    instrument_boto_client(client)
+                    self._client = client
+        return self._client
+
+    @s3_client.setter
+    def s3_client(self, client) -> None:
+        self._client = client
+
+    @property
+    def base_url(self) -> str:
+        if settings.S3_ENDPOINT_URL:
+            return f"{settings.S3_ENDPOINT_URL.rstrip('/')}/{self.bucket_name}/"
+        return f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/"
+
+    def public_url(self, key: str) -> str:
+        return f"{self.base_url}{key}"
+
+    def key_from_url(self, file_url: str) -> str:
+        if file_url.startswith(self.base_url):
+            return file_url[len(self.base_url):]
+        return file_url.split('.amazonaws.com/')[-1]
+
+    @staticmethod
+    def new_key(file_extension: str) -> str:
+        return f"posts/{uuid.uuid4()}.{file_extension}"
+
     def upload_file(self, file_content: bytes, file_name: str, content_type: str) -> Optional[str]:
         """
         Upload a file to S3 and return the public URL
@@ -23,8 +74,8 @@ class S3Service:
         try:
             # Generate unique filename
             file_extension = file_name.split('.')[-1] if '.' in file_name else 'jpg'
-            unique_filename = f"posts/{uuid.uuid4()}.{file_extension}"
-            
+            unique_filename = self.new_key(file_extension)
+
             # Upload to S3
             self.s3_client.put_object(
                 Bucket=self.bucket_name,
@@ -32,31 +83,197 @@ class S3Service:
                 Body=file_content,
                 ContentType=content_type
             )
-            
+
             # Return the public URL
-            url = f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{unique_filename}"
-            return url
-            
+            return self.public_url(unique_filename)
+
         except ClientError as e:
             print(f"Error uploading to S3: {e}")
             return None
 
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+        file_extension: str,
+        part_size: int = settings.S3_MULTIPART_PART_SIZE
+    ) -> Optional[str]:
+        """
+        Stream chunks to S3 and return the public URL.
+
+        At most one part is buffered. Files smaller than `part_size` go up
+        in a single PUT; larger ones use a multipart upload that is aborted
+        if the stream raises. All boto3 calls run in worker threads.
+        """
+        key = self.new_key(file_extension)
+        buffer = bytearray()
+        upload_id = None
+        parts = []
+
+        async def flush_part() -> None:
+            nonlocal upload_id
+            if upload_id is None:
+                response = await asyncio.to_thread(
+                    self.s3_client.create_multipart_upload,
+                    Bucket=self.bucket_name, Key=key, ContentType=content_type
+                )
+                upload_id = response["UploadId"]
+            part_number = len(parts) + 1
+            response = await asyncio.to_thread(
+                self.s3_client.upload_part,
+                Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                PartNumber=part_number, Body=bytes(buffer)
+            )
+            parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+            buffer.clear()
+
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                if len(buffer) >= part_size:
+                    await flush_part()
+
+            if upload_id is None:
+                await asyncio.to_thread(
+                    self.s3_client.put_object,
+                    Bucket=self.bucket_name, Key=key, Body=bytes(buffer), ContentType=content_type
+                )
+            else:
+                if buffer:
+                    await flush_part()
+                await asyncio.to_thread(
+                    self.s3_client.complete_multipart_upload,
+                    Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                    MultipartUpload={"Parts": parts}
+                )
+            return self.public_url(key)
+
+        except BaseException as e:
+            if upload_id is not None:
+                try:
+                    await asyncio.to_thread(
+                        self.s3_client.abort_multipart_upload,
+                        Bucket=self.bucket_name, Key=key, UploadId=upload_id
+                    )
+                except ClientError as abort_error:
+                    logger.warning(f"Failed to abort multipart upload {upload_id}: {abort_error}")
+            if isinstance(e, ClientError):
+                logger.error(f"Error uploading to S3: {e}")
+                return None
+            raise
+
+    def presign_upload(
+        self,
+        content_type: str,
+        file_extension: str,
+        max_bytes: int,
+        method: str = "post",
+        size: Optional[int] = None,
+        expires_in: int = settings.S3_PRESIGN_EXPIRES_SECONDS
+    ) -> Dict[str, Any]:
+        """
+        Sign a direct browser-to-S3 upload of one new object.
+
+        A presigned POST enforces the content type and a size range in its
+        policy. A presigned PUT signs the content type and the exact size.
+        Signing is local; no request is made to S3.
+        """
+        key = self.new_key(file_extension)
+        if method == "post":
+            presigned = self.s3_client.generate_presigned_post(
+                Bucket=self.bucket_name,
+                Key=key,
+                Fields={"Content-Type": content_type},
+                Conditions=[
+                    {"Content-Type": content_type},
+                    ["content-length-range", 1, max_bytes],
+                ],
+                ExpiresIn=expires_in
+            )
+            return {"method": "post", "url": presigned["url"], "key": key, "fields": presigned["fields"]}
+
+        if size is None or size > max_bytes:
+            raise UploadRejected(f"A size of at most {max_bytes} bytes is required for PUT uploads")
+        url = self.s3_client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket_name, "Key": key, "ContentType": content_type, "ContentLength": size},
+            ExpiresIn=expires_in
+        )
+        return {
+            "method": "put",
+            "url": url,
+            "key": key,
+            "headers": {"Content-Type": content_type, "Content-Length": str(size)},
+        }
+
+    async def verify_upload(self, key: str, max_bytes: int, allowed_types: Iterable[str]) -> Dict[str, Any]:
+        """
+        Check a directly uploaded object before it is used.
+
+        HEADs the object for size and declared type, then reads its first
+        bytes to confirm the type. Rejected objects are deleted.
+        """
+        try:
+            head = await asyncio.to_thread(self.s3_client.head_object, Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            raise UploadRejected("Uploaded object not found") from e
+
+        size = head["ContentLength"]
+        content_type = head.get("ContentType")
+        problem = None
+        if size > max_bytes:
+            problem = f"File too large (max {max_bytes // (1024 * 1024)}MB)"
+        elif content_type not in allowed_types:
+            problem = "Invalid file type"
+        else:
+            response = await asyncio.to_thread(
+                self.s3_client.get_object, Bucket=self.bucket_name, Key=key, Range="bytes=0-31"
+            )
+            header = await asyncio.to_thread(response["Body"].read)
+            if sniff_image_type(header) != content_type:
+                problem = "File content does not match its type"
+
+        if problem:
+            await asyncio.to_thread(self.s3_client.delete_object, Bucket=self.bucket_name, Key=key)
+            raise UploadRejected(problem)
+        return {"url": self.public_url(key), "key": key, "size": size, "content_type": content_type}
+
+    async def put_object(
+        self, key: str, body: bytes, content_type: str, cache_control: Optional[str] = None
+    ) -> None:
+        """Write `body` under a key of the caller's choosing, e.g. a published snapshot."""
+        extra = {"CacheControl": cache_control} if cache_control else {}
+        await asyncio.to_thread(
+            self.s3_client.put_object,
+            Bucket=self.bucket_name, Key=key, Body=body, ContentType=content_type, **extra
+        )
+
+    async def delete_objects(self, keys: Iterable[str]) -> None:
+        """Delete keys, 1000 per request (the S3 limit); missing keys are not an error."""
+        keys = list(keys)
+        for start in range(0, len(keys), 1000):
+            await asyncio.to_thread(
+                self.s3_client.delete_objects,
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys[start:start + 1000]], "Quiet": True}
+            )
+
     def delete_file(self, file_url: str) -> bool:
         """
         Delete a file from S3 given its URL
         """
         try:
             # Extract the key from the URL
-            key = file_url.split('.amazonaws.com/')[-1]
-            
+            key = self.key_from_url(file_url)
+
             self.s3_client.delete_object(
                 Bucket=self.bucket_name,
                 Key=key
             )
             return True
-            
+
         except ClientError as e:
             print(f"Error deleting from S3: {e}")
             return False
 
-s3_service = S3Service()
\ No newline at end of file
+s3_service = S3Service()
@@ -0,0 +1,424 @@
+import logging
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Select, case, column, false, func, literal, literal_column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from core.config import settings
+from db.database import get_engine
+from models.post import Post
+from utils.cache import post_state, response_cache
+from utils.pagination import VISIBLE
+
+logger = logging.getLogger(__name__)
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text_value: Optional[str]) -> List[str]:
+    """Split text into lowercase word tokens."""
+    if not text_value:
+        return []
+    return _TOKEN_RE.findall(text_value.lower())
+
+
+class SearchMatch(NamedTuple):
+    """A post statement narrowed to the matches of a query."""
+    stmt: Select
+    rank: object
+    snippet: object
+    # False when only the best matches were kept, so counting `stmt` would
+    # understate the number of matches
+    complete: bool = True
+
+
+class SearchBackend:
+    """Full-text search engine used by `GET /posts?q=`.
+
+    `apply` narrows a post statement to the matches and returns the relevance
+    and snippet expressions so the caller can count before adding them.
+    """
+
+    name = "base"
+    # Post attributes `snippet_for` reads, loaded alongside a results page
+    snippet_columns: Tuple[str, ...] = ()
+
+    async def ensure_schema(self, bind: AsyncEngine) -> None:
+        pass
+
+    async def index_post(self, db: AsyncSession, post: Post) -> None:
+        pass
+
+    async def remove_post(self, db: AsyncSession, post_id: str) -> None:
+        pass
+
+    async def index_posts(self, db: AsyncSession, posts: Iterable[Post]) -> None:
+        for post in posts:
+            await self.index_post(db, post)
+
+    async def remove_posts(self, db: AsyncSession, post_ids: Iterable[str]) -> None:
+        for post_id in post_ids:
+            await self.remove_post(db, post_id)
+
+    async def add_posts(self, db: AsyncSession, posts: Iterable[Post]) -> None:
+        """Index posts that are known not to be indexed yet, such as fresh imports."""
+        await self.index_posts(db, posts)
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        raise NotImplementedError
+
+    async def apply(self, db: AsyncSession, stmt: Select, q: str) -> SearchMatch:
+        raise NotImplementedError
+
+    def snippet_for(self, post: Post, q: str, snippet: Optional[str]) -> Optional[str]:
+        return snippet
+
+
+class PostgresSearchBackend(SearchBackend):
+    """`tsvector` column on `posts` backed by a GIN index."""
+
+    name = "postgres"
+
+    def __init__(self, language: str = "english"):
+        if not re.fullmatch(r"\w+", language):
+            raise ValueError(f"Invalid search language: {language}")
+        self.language = language
+
+    @property
+    def _document(self) -> str:
+        lang = f"'{self.language}'"
+        return (
+            f"setweight(to_tsvector({lang}, coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector({lang}, coalesce(summary, '')), 'B') || "
+            f"setweight(to_tsvector({lang}, coalesce(content_md, '')), 'C')"
+        )
+
+    async def ensure_schema(self, bind: AsyncEngine) -> None:
+        async with bind.begin() as conn:
+            await conn.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)"
+            ))
+
+    async def index_post(self, db: AsyncSession, post: Post) -> None:
+        await db.execute(
+            text(f"UPDATE posts SET search_vector = {self._document} WHERE id = :id"),
+            {"id": post.id},
+        )
+
+    async def index_posts(self, db: AsyncSession, posts: Iterable[Post]) -> None:
+        ids = [post.id for post in posts]
+        if ids:
+            await db.execute(
+                text(f"UPDATE posts SET search_vector = {self._document} WHERE id = ANY(:ids)"),
+                {"ids": ids},
+            )
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        result = await db.execute(text(f"UPDATE posts SET search_vector = {self._document}"))
+        return result.rowcount
+
+    async def apply(self, db: AsyncSession, stmt: Select, q: str):
+        lang = literal_column(f"'{self.language}'")
+        tsquery = func.websearch_to_tsquery(lang, q)
+        vector = literal_column("posts.search_vector")
+        rank = func.ts_rank_cd(vector, tsquery)
+        snippet = func.ts_headline(
+            lang,
+            func.coalesce(Post.content_md, Post.summary, ""),
+            tsquery,
+            f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxFragments=2, MaxWords=30, MinWords=10",
+        )
+        return SearchMatch(stmt.where(vector.op("@@")(tsquery)), rank, snippet)
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5 virtual table `posts_fts` using the porter stemmer.
+
+    FTS5 can only look rows up by rowid, and post ids are strings, so
+    `posts_fts_keys` gives each post a stable integer rowid. Updates and
+    deletes go through it instead of scanning `posts_fts` for a post_id.
+    Rowids of `posts` itself are not used: VACUUM may renumber them.
+    """
+
+    name = "sqlite"
+
+    _fts = table("posts_fts", column("rowid"), column("post_id"))
+    _keys = table("posts_fts_keys", column("rowid"), column("post_id"))
+
+    async def ensure_schema(self, bind: AsyncEngine) -> None:
+        async with bind.begin() as conn:
+            await conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+                "post_id UNINDEXED, title, summary, content_md, "
+                "tokenize='porter unicode61')"
+            ))
+            await conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS posts_fts_keys ("
+                "rowid INTEGER PRIMARY KEY, post_id VARCHAR NOT NULL UNIQUE)"
+            ))
+
+    _insert_key = text("INSERT INTO posts_fts_keys (post_id) VALUES (:id) ON CONFLICT (post_id) DO NOTHING")
+    # REPLACE swaps out the post's previous row, found by rowid
+    _insert = text(
+        "INSERT OR REPLACE INTO posts_fts (rowid, post_id, title, summary, content_md) "
+        "SELECT rowid, post_id, :title, :summary, :content_md FROM posts_fts_keys WHERE post_id = :id"
+    )
+
+    @staticmethod
+    def _row(post: Post) -> Dict[str, str]:
+        return {
+            "id": post.id,
+            "title": post.title or "",
+            "summary": post.summary or "",
+            "content_md": post.content_md or "",
+        }
+
+    async def index_post(self, db: AsyncSession, post: Post) -> None:
+        await self.index_posts(db, [post])
+
+    async def remove_post(self, db: AsyncSession, post_id: str) -> None:
+        await self.remove_posts(db, [post_id])
+
+    async def index_posts(self, db: AsyncSession, posts: Iterable[Post]) -> None:
+        rows = [self._row(post) for post in posts]
+        if rows:
+            await db.execute(self._insert_key, [{"id": row["id"]} for row in rows])
+            await db.execute(self._insert, rows)
+
+    async def remove_posts(self, db: AsyncSession, post_ids: Iterable[str]) -> None:
+        post_ids = list(post_ids)
+        if post_ids:
+            rowids = select(self._keys.c.rowid).where(self._keys.c.post_id.in_(post_ids))
+            await db.execute(self._fts.delete().where(self._fts.c.rowid.in_(rowids)))
+            await db.execute(self._keys.delete().where(self._keys.c.post_id.in_(post_ids)))
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        await db.execute(text("DELETE FROM posts_fts"))
+        await db.execute(text("DELETE FROM posts_fts_keys WHERE post_id NOT IN (SELECT id FROM posts)"))
+        # WHERE true tells SQLite's parser the ON CONFLICT belongs to the upsert
+        await db.execute(text(
+            "INSERT INTO posts_fts_keys (post_id) SELECT id FROM posts WHERE true ON CONFLICT (post_id) DO NOTHING"
+        ))
+        result = await db.execute(text(
+            "INSERT INTO posts_fts (rowid, post_id, title, summary, content_md) "
+            "SELECT k.rowid, p.id, p.title, coalesce(p.summary, ''), coalesce(p.content_md, '') "
+            "FROM posts p JOIN posts_fts_keys k ON k.post_id = p.id"
+        ))
+        return result.rowcount
+
+    async def apply(self, db: AsyncSession, stmt: Select, q: str):
+        tokens = tokenize(q)
+        if not tokens:
+            return SearchMatch(stmt.where(false()), literal(0.0), literal(None))
+        # Quote every token so user input can never be parsed as FTS5 syntax
+        match = " ".join(f'"{token}"' for token in tokens)
+        stmt = stmt.join(self._fts, self._fts.c.post_id == Post.id).where(
+            text("posts_fts MATCH :fts_query").bindparams(fts_query=match)
+        )
+        # bm25() is lower-is-better; weights follow the column order title, summary, content_md
+        rank = -literal_column("bm25(posts_fts, 0.0, 10.0, 5.0, 1.0)")
+        snippet = literal_column(
+            f"snippet(posts_fts, -1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 24)"
+        )
+        return SearchMatch(stmt, rank, snippet)
+
+
+_SUFFIXES = (
+    "ational", "ization", "fulness", "iveness", "ations", "ation",
+    "ingly", "ings", "ing", "edly", "ies", "ied", "ed", "es", "ly", "s",
+)
+
+
+def stem(word: str) -> str:
+    """Light suffix-stripping stemmer used by the in-process index."""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)] + ("y" if suffix in ("ies", "ied") else "")
+            break
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+class InMemorySearchBackend(SearchBackend):
+    """Per-process inverted index with BM25 scoring.
+
+    Used when the database has no native full-text support. Only public
+    posts are indexed. The index is built lazily from the database on the
+    first search, kept current by this worker's writes, and rebuilt when
+    the response cache's list generation shows another worker changed a
+    public post. Only the best MAX_CANDIDATES matches are ranked; beyond
+    that the match is marked incomplete.
+    """
+
+    name = "memory"
+    snippet_columns = ("content_md", "summary")
+
+    FIELD_WEIGHTS = (("title", 3.0), ("summary", 2.0), ("content_md", 1.0))
+    MAX_CANDIDATES = 1000
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._built = False
+        # List generation the index is current with
+        self._generation: Optional[str] = None
+        response_cache.generation_listeners.append(self._advance)
+
+    def _analyze(self, post: Post) -> Dict[str, float]:
+        terms: Dict[str, float] = defaultdict(float)
+        for field, weight in self.FIELD_WEIGHTS:
+            for token in tokenize(getattr(post, field)):
+                terms[stem(token)] += weight
+        return terms
+
+    def _remove(self, post_id: str) -> None:
+        for term in self._doc_terms.pop(post_id, {}):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(post_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._doc_lengths.pop(post_id, None)
+
+    def _add(self, post: Post) -> None:
+        terms = self._analyze(post)
+        self._doc_terms[post.id] = terms
+        self._doc_lengths[post.id] = sum(terms.values())
+        for term, frequency in terms.items():
+            self._postings[term][post.id] = frequency
+
+    def _advance(self, generation: int) -> None:
+        # This worker's write bumped the generation and is already indexed;
+        # a gap means another worker wrote too, and the next search rebuilds
+        with self._lock:
+            if self._generation == str(generation - 1):
+                self._generation = str(generation)
+
+    async def index_post(self, db: AsyncSession, post: Post) -> None:
+        with self._lock:
+            self._remove(post.id)
+            if post_state(post).public:
+                self._add(post)
+
+    async def remove_post(self, db: AsyncSession, post_id: str) -> None:
+        with self._lock:
+            self._remove(post_id)
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        # Only the analyzed columns, of the posts a search can return
+        posts = (await db.execute(
+            select(Post.id, *(getattr(Post, field) for field, _ in self.FIELD_WEIGHTS)).where(*VISIBLE)
+        )).all()
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            for post in posts:
+                self._add(post)
+            self._built = True
+        return len(posts)
+
+    def search(self, q: str) -> Tuple[Dict[str, float], bool]:
+        """Return BM25 scores for the best matching post ids, and whether those are all the matches."""
+        terms = {stem(token) for token in tokenize(q)}
+        with self._lock:
+            total_docs = len(self._doc_terms)
+            if not terms or not total_docs:
+                return {}, True
+            avg_length = sum(self._doc_lengths.values()) / total_docs
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    # Every query term must match, like plainto_tsquery / FTS5
+                    return {}, True
+                idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for post_id, frequency in postings.items():
+                    norm = self.K1 * (1 - self.B + self.B * self._doc_lengths[post_id] / avg_length)
+                    scores[post_id] += idf * frequency * (self.K1 + 1) / (frequency + norm)
+            matches = [post_id for post_id in scores if all(post_id in self._postings[t] for t in terms)]
+        best = sorted(matches, key=scores.__getitem__, reverse=True)[: self.MAX_CANDIDATES]
+        return {post_id: scores[post_id] for post_id in best}, len(matches) <= self.MAX_CANDIDATES
+
+    async def apply(self, db: AsyncSession, stmt: Select, q: str):
+        generation = await response_cache.generation()
+        if not self._built or generation != self._generation:
+            self._generation = generation
+            await self.rebuild(db)
+        scores, complete = self.search(q)
+        if not scores:
+            return SearchMatch(stmt.where(false()), literal(0.0), literal(None))
+        rank = case(scores, value=Post.id, else_=0.0)
+        return SearchMatch(stmt.where(Post.id.in_(list(scores))), rank, literal(None), complete)
+
+    def snippet_for(self, post: Post, q: str, snippet: Optional[str]) -> Optional[str]:
+        terms = {stem(token) for token in tokenize(q)}
+        source = post.content_md or post.summary or ""
+        words = source.split()
+        for position, word in enumerate(words):
+            if any(stem(token) in terms for token in tokenize(word)):
+                window = words[max(0, position - 10): position + 20]
+                highlighted = [
+                    f"{HIGHLIGHT_START}{w}{HIGHLIGHT_END}"
+                    if any(stem(token) in terms for token in tokenize(w)) else w
+                    for w in window
+                ]
+                return " ".join(highlighted)
+        return None
+
+
+def _sqlite_has_fts5() -> bool:
+    # aiosqlite wraps the interpreter's sqlite3 module, so ask it directly
+    import sqlite3
+    conn = sqlite3.connect(":memory:")
+    try:
+        options = {row[0] for row in conn.execute("PRAGMA compile_options")}
+    finally:
+        conn.close()
+    return "ENABLE_FTS5" in options
+
+
+def create_search_backend(name: str, bind: Optional[AsyncEngine] = None) -> SearchBackend:
+    dialect = (bind or get_engine()).dialect.name
+    if name == "auto":
+        if dialect == "postgresql":
+            name = "postgres"
+        elif dialect == "sqlite" and _sqlite_has_fts5():
+            name = "sqlite"
+        else:
+            name = "memory"
+
+    if name == "postgres":
+        return PostgresSearchBackend(settings.SEARCH_LANGUAGE)
+    if name == "sqlite":
+        return SQLiteSearchBackend()
+    if name == "memory":
+        if settings.WEB_CONCURRENCY > 1 and settings.CACHE_BACKEND != "redis":
+            # Other workers' writes only reach this index through the shared list generation
+            raise RuntimeError("The in-process search index needs CACHE_BACKEND=redis with several workers")
+        return InMemorySearchBackend()
+    raise ValueError(f"Unknown search backend: {name}")
+
+
+_search_backend: Optional[SearchBackend] = None
+
+
+def get_search_backend() -> SearchBackend:
+    global _search_backend
+    if _search_backend is None:
+        _search_backend = create_search_backend(settings.SEARCH_BACKEND)
+        logger.info(f"Using '{_search_backend.name}' full-text search backend")
+    return _search_backend
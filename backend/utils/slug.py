@@ -1,8 +1,14 @@
 import re
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Set
+from sqlalchemy import and_, inspect, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.post import Post
 
+SLUG_RETRY_ATTEMPTS = 3
+# Base slugs looked up per query
+_SLUG_LOOKUP_BATCH = 200
+
 def slugify(text: str) -> str:
     """Convert text to URL-friendly slug."""
     text = text.lower()
@@ -10,19 +16,108 @@ def slugify(text: str) -> str:
     text = re.sub(r'[-\s]+', '-', text)
     return text.strip('-')
 
-def generate_unique_slug(title: str, db: Session, exclude_id: Optional[str] = None) -> str:
+async def _taken_slugs(db: AsyncSession, base_slugs: Iterable[str], exclude_id: Optional[str] = None) -> Set[str]:
+    """Fetch every existing `base` / `base-<n>` slug with queries on the slug index.
+
+    One query covers up to _SLUG_LOOKUP_BATCH base slugs; SQLite nests a
+    chain of ORs one level deep per term and refuses very long ones.
+    """
+    base_slugs = sorted(set(base_slugs))
+    # SQLite's LIKE is case-insensitive and so never uses the slug index;
+    # bounding the range as well turns each prefix test into an index seek.
+    # Postgres keeps plain LIKE, since its collation may not order bytewise.
+    bounded = db.bind is not None and db.bind.dialect.name == "sqlite"
+    taken = set()
+    for start in range(0, len(base_slugs), _SLUG_LOOKUP_BATCH):
+        conditions = []
+        for base_slug in base_slugs[start:start + _SLUG_LOOKUP_BATCH]:
+            conditions.append(Post.slug == base_slug)
+            prefixed = Post.slug.startswith(f"{base_slug}-", autoescape=True)
+            if bounded:
+                # "." is the character after "-"
+                prefixed = and_(Post.slug > f"{base_slug}-", Post.slug < f"{base_slug}.", prefixed)
+            conditions.append(prefixed)
+        query = select(Post.slug).where(or_(*conditions))
+        if exclude_id:
+            query = query.where(Post.id != exclude_id)
+        taken.update((await db.execute(query)).scalars())
+    return taken
+
+def _next_free_slug(base_slug: str, taken: Set[str]) -> str:
+    """Pick `base` or the lowest free `base-<n>`, like the old one-query-per-candidate loop."""
+    if base_slug not in taken:
+        return base_slug
+    pattern = re.compile(re.escape(base_slug) + r"-(\d+)")
+    suffixes = {int(match.group(1)) for match in map(pattern.fullmatch, taken) if match}
+    counter = 1
+    while counter in suffixes:
+        counter += 1
+    return f"{base_slug}-{counter}"
+
+async def generate_unique_slug(title: str, db: AsyncSession, exclude_id: Optional[str] = None) -> str:
     """Generate a unique slug from title, handling collisions."""
     base_slug = slugify(title)
-    slug = base_slug
-    counter = 1
-    
-    while True:
-        query = db.query(Post).filter(Post.slug == slug)
-        if exclude_id:
-            query = query.filter(Post.id != exclude_id)
-        
-        if not query.first():
+    return _next_free_slug(base_slug, await _taken_slugs(db, [base_slug], exclude_id))
+
+class SlugAllocator:
+    """Hands out unique slugs for many titles after one lookup of the taken ones."""
+
+    def __init__(self, taken: Set[str]):
+        self.taken = taken
+
+    @classmethod
+    async def load(cls, db: AsyncSession, titles: Iterable[str]) -> "SlugAllocator":
+        base_slugs = [slugify(title) for title in titles]
+        return cls(await _taken_slugs(db, base_slugs) if base_slugs else set())
+
+    def allocate(self, title: str, current_slug: Optional[str] = None) -> str:
+        """Next free slug for `title`; a post's `current_slug` does not count as taken."""
+        taken = self.taken - {current_slug} if current_slug else self.taken
+        slug = _next_free_slug(slugify(title), taken)
+        self.taken.add(slug)
+        return slug
+
+    def claim(self, slug: Optional[str], title: str) -> str:
+        """Keep `slug` if it is free, otherwise allocate one for `title` (imports)."""
+        if slug and slug not in self.taken:
+            self.taken.add(slug)
+            return slug
+        return self.allocate(title)
+
+async def generate_unique_slugs(titles: List[str], db: AsyncSession) -> List[str]:
+    """Assign unique slugs for many new titles at once (bulk imports).
+
+    One lookup covers every distinct base slug; titles sharing a base get
+    consecutive free suffixes in input order.
+    """
+    allocator = await SlugAllocator.load(db, titles)
+    return [allocator.allocate(title) for title in titles]
+
+async def assign_unique_slug(
+    db: AsyncSession,
+    post: Post,
+    title: str,
+    exclude_id: Optional[str] = None,
+    attempts: int = SLUG_RETRY_ATTEMPTS
+) -> str:
+    """Set `post.slug` and flush it, retrying if a concurrent write took the slug.
+
+    The flush runs in a SAVEPOINT, so a unique-constraint violation only
+    rolls back this attempt; the next one re-reads the taken suffixes.
+    Flush any other pending changes to `post` before calling this.
+    """
+    for attempt in range(1, attempts + 1):
+        slug = await generate_unique_slug(title, db, exclude_id)
+        try:
+            async with db.begin_nested():
+                post.slug = slug
+                db.add(post)
+                await db.flush()
             return slug
-        
-        slug = f"{base_slug}-{counter}"
-        counter += 1
\ No newline at end of file
+        except IntegrityError:
+            if attempt == attempts:
+                raise
+            # Rolling back the savepoint expires a persistent post; reload it
+            # here since async sessions cannot lazy-load attributes later
+            if inspect(post).persistent:
+                await db.refresh(post)
@@ -0,0 +1,334 @@
+"""Static JSON snapshots of the public listing and posts, for a CDN to serve.
+
+Documents mirror the API's responses, under these paths:
+
+- `lists/all/page-{n}.json`, `lists/type/{type}/page-{n}.json` and
+  `lists/tag/{tag}/page-{n}.json`: like `GET /posts?page=n`, filtered by
+  `type` or `tag`, for the first SNAPSHOT_PAGES pages
+- `posts/{slug}.json`: like `GET /posts/{slug}`
+
+Every write goes through `ResponseCache.invalidate_posts`, whose listeners
+feed `SnapshotPublisher.schedule`. Changes are collected until writes pause
+and then published together, rebuilding only the lists the changed posts
+were or are in. Each publish reads and writes under one lock shared through
+the cache backend, so a worker that read before another's commit cannot
+upload its documents after that worker's newer ones.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+from urllib.parse import quote
+from sqlalchemy import distinct, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
+from db.database import SessionLocal
+from models.post import Post, PostType
+from models.post_tag import PostTag
+from schemas.post import SUMMARY_FIELD_COLUMNS, PostResponse, summary_data
+from utils.cache import PostState, post_state, response_cache
+from utils.metrics import snapshot_documents, snapshot_publish_duration
+from utils.pagination import LISTING_ORDER, VISIBLE, listing_query
+from utils.responses import dumps
+from utils.s3 import S3Service, s3_service
+
+logger = logging.getLogger(__name__)
+
+# Posts loaded per query when publishing post documents
+POST_BATCH_SIZE = 500
+# Documents written at the same time
+WRITE_CONCURRENCY = 8
+# Seconds after which a publish lock left by a dead worker is released
+PUBLISH_LOCK_TIMEOUT = 600
+
+_SUMMARY_COLUMNS = sorted({column for columns in SUMMARY_FIELD_COLUMNS.values() for column in columns})
+
+class Listing(NamedTuple):
+    """One filtered list: kind is "all", "type" or "tag"."""
+    kind: str
+    value: str = ""
+
+    def path(self, page: int) -> str:
+        if self.kind == "all":
+            return f"lists/all/page-{page}.json"
+        return f"lists/{self.kind}/{quote(self.value, safe='')}/page-{page}.json"
+
+    def query(self):
+        if self.kind == "type":
+            return listing_query(type=PostType(self.value))
+        if self.kind == "tag":
+            return listing_query(tags=[self.value])
+        return listing_query()
+
+def post_path(slug: str) -> str:
+    return f"posts/{quote(slug, safe='')}.json"
+
+def post_document(post: Post) -> bytes:
+    """The body of `GET /posts/{slug}`, serialized like the list pages."""
+    return dumps(PostResponse.model_validate(post))
+
+def affected_listings(states: Iterable[PostState]) -> Set[Listing]:
+    """The lists a post in any of `states` appears in."""
+    listings = set()
+    for state in states:
+        if state.public:
+            listings.add(Listing("all"))
+            listings.add(Listing("type", state.type))
+            listings.update(Listing("tag", tag) for tag in state.tags)
+    return listings
+
+class SnapshotStore:
+    """Where documents are published."""
+
+    async def write(self, path: str, body: bytes) -> None:
+        raise NotImplementedError
+
+    async def delete(self, paths: List[str]) -> None:
+        raise NotImplementedError
+
+class S3SnapshotStore(SnapshotStore):
+    """Objects under `prefix` in the S3Service bucket, sent with POSTS_CACHE_CONTROL."""
+
+    def __init__(self, service: S3Service, prefix: str):
+        self.service = service
+        self.prefix = prefix
+
+    async def write(self, path: str, body: bytes) -> None:
+        await self.service.put_object(
+            self.prefix + path, body, "application/json", cache_control=settings.POSTS_CACHE_CONTROL
+        )
+
+    async def delete(self, paths: List[str]) -> None:
+        await self.service.delete_objects(self.prefix + path for path in paths)
+
+class LocalSnapshotStore(SnapshotStore):
+    """Files under `root`, e.g. a directory a web server or CDN origin serves."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _write(self, path: str, body: bytes) -> None:
+        target = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Replace atomically so readers never see a half-written document
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(temporary, target)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def _delete(self, paths: List[str]) -> None:
+        for path in paths:
+            try:
+                os.remove(os.path.join(self.root, path))
+            except FileNotFoundError:
+                pass
+
+    async def write(self, path: str, body: bytes) -> None:
+        await asyncio.to_thread(self._write, path, body)
+
+    async def delete(self, paths: List[str]) -> None:
+        await asyncio.to_thread(self._delete, paths)
+
+class SnapshotPublisher:
+    """Debounces post changes and publishes the affected documents in batches.
+
+    A burst of writes is published once: publishing starts when no change
+    came in for `debounce` seconds, or `max_delay` seconds after the first
+    pending change, whichever is sooner. Changes arriving while a batch is
+    published go into the next one. A failed batch is logged and dropped;
+    `manage.py publish-snapshots` rebuilds everything.
+    """
+
+    def __init__(self, store: SnapshotStore, pages: int, page_size: int, debounce: float, max_delay: float):
+        self.store = store
+        self.pages = pages
+        self.page_size = page_size
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.batches = 0
+        self._pending: Dict[str, List[PostState]] = {}
+        self._first_change: Optional[float] = None
+        self._last_change = 0.0
+        self._flush = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Publish the changes of every cache invalidation from now on."""
+        if self.schedule not in response_cache.listeners:
+            response_cache.listeners.append(self.schedule)
+
+    async def close(self) -> None:
+        """Stop listening and publish what is pending without waiting."""
+        if self.schedule in response_cache.listeners:
+            response_cache.listeners.remove(self.schedule)
+        if self._task is not None:
+            self._flush.set()
+            await self._task
+
+    async def wait(self) -> None:
+        """Wait until the pending changes have been published, debounce included."""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    def schedule(self, changes: Dict[str, List[PostState]]) -> None:
+        for post_id, states in changes.items():
+            self._pending.setdefault(post_id, []).extend(states)
+        now = time.monotonic()
+        self._last_change = now
+        if self._first_change is None:
+            self._first_change = now
+        if self._task is None or self._task.done():
+            self._flush.clear()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._pending:
+            while not self._flush.is_set():
+                deadline = min(self._last_change + self.debounce, self._first_change + self.max_delay)
+                delay = deadline - time.monotonic()
+                if delay <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._flush.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            changes, self._pending, self._first_change = self._pending, {}, None
+            try:
+                await self.publish(changes)
+            except Exception:
+                logger.exception(f"Publishing snapshots for {len(changes)} changed posts failed")
+
+    async def publish(self, changes: Dict[str, List[PostState]]) -> Dict[str, int]:
+        """Republish the documents of changed posts and of the lists they were or are in."""
+        started = time.perf_counter()
+        listings: Set[Listing] = set()
+        written = deleted = 0
+        post_ids = list(changes)
+        async with response_cache.lock("snapshots", PUBLISH_LOCK_TIMEOUT), SessionLocal() as db:
+            for start in range(0, len(post_ids), POST_BATCH_SIZE):
+                batch = post_ids[start:start + POST_BATCH_SIZE]
+                posts = {post.id: post for post in await db.scalars(select(Post).where(Post.id.in_(batch), *VISIBLE))}
+                documents = {}
+                stale = set()
+                for post_id in batch:
+                    post = posts.get(post_id)
+                    states = changes[post_id]
+                    if post is not None:
+                        documents[post_path(post.slug)] = post_document(post)
+                        listings.update(affected_listings([post_state(post)]))
+                    listings.update(affected_listings(states))
+                    # Old slugs, and posts that are no longer public
+                    stale.update(post_path(state.slug) for state in states if state.public)
+                written += await self._write_all(documents)
+                deleted += await self._delete_all(stale - documents.keys())
+                db.expunge_all()
+
+            for listing in sorted(listings):
+                documents, stale = await self._listing_documents(db, listing)
+                written += await self._write_all(documents)
+                deleted += await self._delete_all(stale)
+
+        self.batches += 1
+        snapshot_publish_duration.observe(time.perf_counter() - started, "incremental")
+        logger.info(f"Published snapshots for {len(changes)} changed posts: {written} written, {deleted} deleted")
+        return {"posts": len(changes), "listings": len(listings), "written": written, "deleted": deleted}
+
+    async def publish_all(self) -> Dict[str, int]:
+        """Publish every list and every public post.
+
+        Documents of posts that stopped being public outside the API are
+        left in place; incremental publishing removes them as they change.
+        """
+        started = time.perf_counter()
+        written = deleted = 0
+        async with response_cache.lock("snapshots", PUBLISH_LOCK_TIMEOUT), SessionLocal() as db:
+            tags = await db.scalars(
+                select(distinct(PostTag.tag)).join(Post, Post.id == PostTag.post_id).where(*VISIBLE)
+            )
+            listings = [Listing("all")] + [Listing("type", post_type.value) for post_type in PostType]
+            listings += [Listing("tag", tag) for tag in sorted(tags)]
+            for listing in listings:
+                documents, stale = await self._listing_documents(db, listing)
+                written += await self._write_all(documents)
+                deleted += await self._delete_all(stale)
+
+            post_ids = list(await db.scalars(select(Post.id).where(*VISIBLE).order_by(Post.id)))
+            for start in range(0, len(post_ids), POST_BATCH_SIZE):
+                posts = await db.scalars(select(Post).where(Post.id.in_(post_ids[start:start + POST_BATCH_SIZE])))
+                written += await self._write_all({
+                    post_path(post.slug): post_document(post)
+                    for post in posts
+                })
+                db.expunge_all()
+
+        snapshot_publish_duration.observe(time.perf_counter() - started, "full")
+        return {"posts": len(post_ids), "listings": len(listings), "written": written, "deleted": deleted}
+
+    async def _listing_documents(self, db: AsyncSession, listing: Listing):
+        """Pages 1..N of one list, plus the paths of pages it no longer fills."""
+        query = listing.query()
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        rows = (await db.execute(query.order_by(*LISTING_ORDER).limit(self.pages * self.page_size))).all()
+        ids = [row.id for row in rows]
+        loaded = {}
+        if ids:
+            loaded = {
+                row.id: row
+                for row in await db.execute(select(*(getattr(Post, column) for column in _SUMMARY_COLUMNS)).where(Post.id.in_(ids)))
+            }
+        summaries = [summary_data(loaded[post_id]) for post_id in ids]
+        total_pages = (total + self.page_size - 1) // self.page_size
+        # An empty list still gets its first page, so the CDN answers with an empty list
+        filled = max(1, min(self.pages, total_pages))
+        documents = {
+            listing.path(page): dumps({
+                "posts": summaries[(page - 1) * self.page_size:page * self.page_size],
+                "total": total,
+                "page": page,
+                "page_size": self.page_size,
+                "total_pages": total_pages,
+                "next_cursor": None,
+                "has_more": None,
+            })
+            for page in range(1, filled + 1)
+        }
+        return documents, [listing.path(page) for page in range(filled + 1, self.pages + 1)]
+
+    async def _write_all(self, documents: Dict[str, bytes]) -> int:
+        semaphore = asyncio.Semaphore(WRITE_CONCURRENCY)
+
+        async def write(path: str, body: bytes) -> None:
+            async with semaphore:
+                await self.store.write(path, body)
+
+        await asyncio.gather(*(write(path, body) for path, body in documents.items()))
+        snapshot_documents.inc("write", amount=len(documents))
+        return len(documents)
+
+    async def _delete_all(self, paths: Iterable[str]) -> int:
+        paths = sorted(paths)
+        if paths:
+            await self.store.delete(paths)
+            snapshot_documents.inc("delete", amount=len(paths))
+        return len(paths)
+
+def create_snapshot_store(target: str) -> SnapshotStore:
+    if target == "s3":
+        return S3SnapshotStore(s3_service, settings.SNAPSHOT_PREFIX)
+    if target == "local":
+        return LocalSnapshotStore(settings.SNAPSHOT_DIR)
+    raise ValueError(f"Unknown snapshot target: {target}")
+
+snapshot_publisher = SnapshotPublisher(
+    create_snapshot_store(settings.SNAPSHOT_TARGET),
+    pages=settings.SNAPSHOT_PAGES,
+    page_size=settings.SNAPSHOT_PAGE_SIZE,
+    debounce=settings.SNAPSHOT_DEBOUNCE_SECONDS,
+    max_delay=settings.SNAPSHOT_MAX_DELAY_SECONDS,
+)
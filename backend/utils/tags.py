@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, List
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.post import Post
+from models.post_tag import PostTag
+
+def normalize_tag(tag: str) -> str:
+    """Normalize a tag for indexing and lookups."""
+    return tag.strip().lower()
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Normalize tags, dropping blanks and duplicates while keeping order."""
+    seen = []
+    for tag in tags or []:
+        normalized = normalize_tag(tag)
+        if normalized and normalized not in seen:
+            seen.append(normalized)
+    return seen
+
+async def sync_post_tags(db: AsyncSession, post: Post) -> None:
+    """Bring the `post_tags` rows of a flushed post in line with `post.tags`."""
+    wanted = set(normalize_tags(post.tags))
+    result = await db.execute(select(PostTag.tag).where(PostTag.post_id == post.id))
+    existing = set(result.scalars())
+    stale = existing - wanted
+    if stale:
+        await db.execute(
+            delete(PostTag).where(PostTag.post_id == post.id, PostTag.tag.in_(stale))
+        )
+    db.add_all(PostTag(post_id=post.id, tag=tag) for tag in sorted(wanted - existing))
+
+async def replace_post_tags(db: AsyncSession, tags_by_post: Dict[str, Iterable[str]]) -> None:
+    """Rewrite the `post_tags` rows of many flushed posts with two statements."""
+    if not tags_by_post:
+        return
+    await db.execute(delete(PostTag).where(PostTag.post_id.in_(list(tags_by_post))))
+    rows = [
+        {"post_id": post_id, "tag": tag}
+        for post_id, tags in tags_by_post.items()
+        for tag in normalize_tags(tags)
+    ]
+    if rows:
+        await db.execute(insert(PostTag), rows)
+
+async def delete_post_tags(db: AsyncSession, post_id: str) -> None:
+    await db.execute(delete(PostTag).where(PostTag.post_id == post_id))
+
+def tag_filter(tags: Iterable[str], match: str = "all"):
+    """Build a `Post.id IN (...)` criterion served by the (tag, post_id) index.
+
+    `match="all"` requires every tag (AND), `match="any"` requires one (OR).
+    """
+    tags = normalize_tags(tags)
+    post_ids = select(PostTag.post_id).where(PostTag.tag.in_(tags))
+    if match == "all" and len(tags) > 1:
+        post_ids = post_ids.group_by(PostTag.post_id).having(
+            func.count(PostTag.tag) == len(tags)
+        )
+    return Post.id.in_(post_ids)
@@ -0,0 +1,169 @@
+from typing import AsyncIterator, List, Mapping, Optional, Tuple
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # python-multipart before 0.0.13
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Leading bytes of each accepted image format
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+# Enough leading bytes to recognise every format above
+_SNIFF_BYTES = 12
+
+# Room for the multipart boundaries and part headers around the file
+_FORM_OVERHEAD = 64 * 1024
+
+class UploadRejected(ValueError):
+    """The uploaded file is not an accepted image or exceeds the size limit."""
+
+
+class UploadTooLarge(UploadRejected):
+    """The uploaded file exceeds the size limit."""
+
+
+def _too_large(max_bytes: int) -> UploadTooLarge:
+    return UploadTooLarge(f"File too large (max {max_bytes // (1024 * 1024)}MB)")
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Detect the image content type from its magic bytes, ignoring what the client claims."""
+    for signature, content_type in _SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class _FileFieldReader:
+    """MultipartParser callbacks that keep the data of one file field."""
+
+    def __init__(self, field: bytes):
+        self.field = field
+        self.found = False
+        self.pending: List[bytes] = []
+        self._reading = False
+        self._headers: List[Tuple[bytes, bytes]] = []
+        self._name = b""
+        self._value = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+        }
+
+    def on_part_begin(self) -> None:
+        self._reading = False
+        self._headers = []
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers.append((self._name.lower(), self._value))
+        self._name = self._value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(dict(self._headers).get(b"content-disposition", b""))
+        # Only the first file sent under the field's name is read
+        self._reading = not self.found and b"filename" in options and options.get(b"name") == self.field
+        self.found = self.found or self._reading
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._reading:
+            self.pending.append(data[start:end])
+
+
+async def multipart_file(
+    headers: Mapping[str, str],
+    body: AsyncIterator[bytes],
+    field: str,
+    max_bytes: int
+) -> AsyncIterator[bytes]:
+    """Stream the contents of file field `field` out of a multipart/form-data body.
+
+    The body is parsed as it arrives and nothing is spooled to memory or
+    disk: other fields are discarded and the file's bytes are yielded chunk
+    by chunk. Raises `UploadTooLarge` as soon as the body passes
+    `max_bytes` plus room for the form's own framing.
+    """
+    content_type, params = parse_options_header(headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadRejected("Expected a multipart/form-data body")
+
+    reader = _FileFieldReader(field.encode())
+    parser = MultipartParser(params[b"boundary"], reader.callbacks())
+    limit = max_bytes + _FORM_OVERHEAD
+    total = 0
+    try:
+        async for chunk in body:
+            total += len(chunk)
+            if total > limit:
+                raise _too_large(max_bytes)
+            parser.write(chunk)
+            for data in reader.pending:
+                yield data
+            reader.pending.clear()
+        parser.finalize()
+    except MultipartParseError as e:
+        raise UploadRejected("Malformed multipart body") from e
+    if not reader.found:
+        raise UploadRejected(f"Missing file field {field!r}")
+
+
+async def image_chunks(
+    chunks: AsyncIterator[bytes],
+    max_bytes: int
+) -> Tuple[str, AsyncIterator[bytes]]:
+    """Sniff an uploaded image and return its content type and a chunk stream.
+
+    Only the first bytes are read before returning. The stream raises
+    `UploadTooLarge` as soon as the running total passes `max_bytes`, so an
+    oversized file is never read to the end.
+    """
+    chunks = aiter(chunks)
+    head = b""
+    while len(head) < _SNIFF_BYTES:
+        chunk = await anext(chunks, None)
+        if chunk is None:
+            break
+        head += chunk
+    content_type = sniff_image_type(head)
+    if content_type is None:
+        raise UploadRejected("Invalid file type")
+    if len(head) > max_bytes:
+        raise _too_large(max_bytes)
+
+    async def checked() -> AsyncIterator[bytes]:
+        total = len(head)
+        yield head
+        async for chunk in chunks:
+            total += len(chunk)
+            if total > max_bytes:
+                raise _too_large(max_bytes)
+            yield chunk
+
+    return content_type, checked()